@@ -1,12 +1,205 @@
-from summarizer import Summarizer
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fetcher.change_detector import ADDED, RENAMED, UPDATED
+
+# 这些 introduction 取值表示没有可摘要的内容
+PLACEHOLDER_TEXTS = {"Not fetched", "Not found...", "Error fetching details", "Error fetching introduction"}
+
+# 每个工作进程只加载一次模型
+_worker_summarizer = None
+_worker_options = None
+
+
+def _load_summarizer(model_options):
+    from summarizer import Summarizer
+    return Summarizer(**model_options)
+
+
+def _init_worker(model_options, summary_options):
+    global _worker_summarizer, _worker_options
+    _worker_summarizer = _load_summarizer(model_options)
+    _worker_options = summary_options
+
+
+def _summarize_batch(contents):
+    return [_worker_summarizer(content, **_worker_options) for content in contents]
+
+
+class SummaryCache:
+    """按内容哈希和摘要设置缓存摘要结果的 SQLite 存储，超过 max_bytes 时按最近访问时间淘汰"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS summaries (
+            key TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path="data/summary_cache.db", max_bytes=50 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(self.SCHEMA)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """返回 {key: summary}，命中的条目会刷新访问时间"""
+        keys = list(keys)
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self.conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})", batch
+                ).fetchall())
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE summaries SET accessed_at = ? WHERE key = ?",
+                    [(time.time(), key) for key in found],
+                )
+        return found
+
+    def put_many(self, items):
+        """写入 {key: summary} 并按需淘汰最久未访问的条目"""
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO summaries (key, summary, size, accessed_at) VALUES (?, ?, ?, ?)",
+                    [(key, summary, len(summary.encode("utf-8")), now) for key, summary in items.items()],
+                )
+                total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(total - self.max_bytes)
+
+    def _evict(self, excess):
+        freed = 0
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM summaries ORDER BY accessed_at"):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        self.conn.executemany("DELETE FROM summaries WHERE key = ?", victims)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
 
 class Analyzer:
-    def __init__(self):
-        self.summarizer = Summarizer()
+    """批量、带持久化缓存的摘要生成
+    Args:
+        workers: 进程池大小，0 表示在当前进程中执行
+        batch_size: 每个任务包含的文章数
+        model_options: 传给 Summarizer 构造函数的参数
+        summary_options: 每次摘要调用的参数（如 ratio）
+        cache_path, cache_max_bytes: 摘要缓存位置与大小上限
+    """
+
+    def __init__(self, workers=0, batch_size=8, model_options=None, summary_options=None,
+                 cache_path="data/summary_cache.db", cache_max_bytes=50 * 1024 * 1024):
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.model_options = model_options or {}
+        self.summary_options = summary_options or {}
+        self.cache = SummaryCache(cache_path, cache_max_bytes)
+        self.settings_key = json.dumps(
+            {"model": self.model_options, "summary": self.summary_options}, sort_keys=True
+        )
+        self.summarizer = None
+        self.executor = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.get("analyzer", {})
+        cache_settings = settings.get("cache", {})
+        return cls(
+            workers=settings.get("workers", 0),
+            batch_size=settings.get("batch_size", 8),
+            model_options=settings.get("model_options"),
+            summary_options=settings.get("summary_options"),
+            cache_path=cache_settings.get("path", "data/summary_cache.db"),
+            cache_max_bytes=cache_settings.get("max_bytes", 50 * 1024 * 1024),
+        )
+
+    def cache_key(self, content):
+        payload = f"{self.settings_key}\x1f{content}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def summarize_many(self, contents):
+        """对去重后的未缓存内容批量生成摘要，返回与 contents 等长的列表"""
+        keys = [self.cache_key(content) for content in contents]
+        summaries = self.cache.get_many(set(keys))
+
+        pending = {}
+        for key, content in zip(keys, contents):
+            if key not in summaries:
+                pending[key] = content
+
+        if pending:
+            pending_keys = list(pending)
+            results = self._run([pending[key] for key in pending_keys])
+            computed = dict(zip(pending_keys, results))
+            self.cache.put_many(computed)
+            summaries.update(computed)
+
+        return [summaries[key] for key in keys]
+
+    def _run(self, contents):
+        if self.workers <= 0:
+            if self.summarizer is None:
+                self.summarizer = _load_summarizer(self.model_options)
+            return [self.summarizer(content, **self.summary_options) for content in contents]
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.model_options, self.summary_options),
+            )
+        batches = [contents[i:i + self.batch_size] for i in range(0, len(contents), self.batch_size)]
+        results = []
+        for batch_result in self.executor.map(_summarize_batch, batches):
+            results.extend(batch_result)
+        return results
 
     def analyze(self, data):
-        summaries = []
-        for article in data:
-            summary = self.summarizer(article["content"])
-            summaries.append(summary)
-        return summaries
+        return self.summarize_many([article["content"] for article in data])
+
+    def analyze_changes(self, events):
+        """只为 fetcher 报告的新增、改名或更新模型的 introduction 生成摘要
+        Returns:
+            dict: {title: summary}
+        """
+        targets = {}
+        for event in events:
+            if event["type"] not in (ADDED, RENAMED, UPDATED):
+                continue
+            introduction = (event.get("model") or {}).get("introduction")
+            if introduction and introduction not in PLACEHOLDER_TEXTS:
+                targets[event["title"]] = introduction
+        if not targets:
+            return {}
+        titles = list(targets)
+        return dict(zip(titles, self.summarize_many([targets[title] for title in titles])))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.cache.close()
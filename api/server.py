@@ -0,0 +1,297 @@
+import argparse
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from flask import Flask, Response, abort, jsonify, request
+
+from storage.model_store import ModelStore
+from storage.search_index import SearchIndex
+from storage.stats_history import parse_count
+
+MAX_PER_PAGE = 500
+
+
+def content_fingerprint(lines):
+    """与顺序无关的内容摘要，用于生成 ETag"""
+    digest = hashlib.sha1()
+    for line in sorted(lines):
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class ModelIndex:
+    """模型存储的只读内存索引
+
+    按 data_version 判断存储是否被其他连接修改，变化时只比较内容哈希，
+    重新解析新增或变化的模型并移除已删除的模型，不重建整个索引。
+    """
+
+    def __init__(self, store, refresh_interval=1.0):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.models = {}
+        self.hashes = {}
+        self.by_subscription = {}
+        self.by_tag = {}
+        # (标题小写, 订阅源, 标题)，用于前缀查找和稳定排序
+        self.sorted_titles = []
+        # (点赞数, 订阅源, 标题)，用于点赞数区间查找
+        self.sorted_likes = []
+        # 全部 (订阅源, 标题, 内容哈希) 的摘要，只取决于数据内容，进程重启后不变
+        self.fingerprint = None
+        self.data_version = None
+        self.checked_at = 0.0
+
+    def refresh(self, force=False):
+        """按需增量更新索引，两次检查间隔不小于 refresh_interval
+        Returns:
+            int: 本次更新的模型数
+        """
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.checked_at < self.refresh_interval:
+                return 0
+            self.checked_at = now
+            data_version = self.store.data_version()
+            if not force and data_version == self.data_version:
+                return 0
+            self.data_version = data_version
+
+            hashes = self.store.get_content_hashes()
+            removed = [key for key in self.hashes if key not in hashes]
+            changed = {}
+            for key, content_hash in hashes.items():
+                if self.hashes.get(key) != content_hash:
+                    changed.setdefault(key[0], []).append(key[1])
+
+            for key in removed:
+                self._remove(key)
+            updated = 0
+            for subscription, titles in changed.items():
+                for title, model in self.store.get_models(subscription, titles).items():
+                    key = (subscription, title)
+                    self._remove(key)
+                    self._add(key, model, hashes[key])
+                    updated += 1
+
+            if removed or updated or self.fingerprint is None:
+                self.fingerprint = content_fingerprint(
+                    f"{subscription}\x1f{title}\x1f{content_hash}"
+                    for (subscription, title), content_hash in self.hashes.items()
+                )
+            return len(removed) + updated
+
+    def _likes(self, model):
+        return parse_count((model.get("model_stats") or {}).get("likes"))
+
+    def _add(self, key, model, content_hash):
+        subscription, title = key
+        self.models[key] = model
+        self.hashes[key] = content_hash
+        self.by_subscription.setdefault(subscription, set()).add(title)
+        for tag in model.get("tags") or []:
+            self.by_tag.setdefault(tag, set()).add(key)
+        insort(self.sorted_titles, (title.lower(), subscription, title))
+        likes = self._likes(model)
+        if likes is not None:
+            insort(self.sorted_likes, (likes, subscription, title))
+
+    def _remove(self, key):
+        model = self.models.pop(key, None)
+        if model is None:
+            return
+        subscription, title = key
+        del self.hashes[key]
+        titles = self.by_subscription.get(subscription)
+        if titles is not None:
+            titles.discard(title)
+            if not titles:
+                del self.by_subscription[subscription]
+        for tag in model.get("tags") or []:
+            keys = self.by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_tag[tag]
+        self._discard_sorted(self.sorted_titles, (title.lower(), subscription, title))
+        likes = self._likes(model)
+        if likes is not None:
+            self._discard_sorted(self.sorted_likes, (likes, subscription, title))
+
+    @staticmethod
+    def _discard_sorted(items, item):
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def get(self, subscription, title):
+        with self.lock:
+            return self.models.get((subscription, title))
+
+    def subscriptions(self):
+        with self.lock:
+            return {name: len(titles) for name, titles in sorted(self.by_subscription.items())}
+
+    def search(self, subscription=None, prefix=None, tag=None, likes_min=None, likes_max=None,
+               page=1, per_page=50):
+        """按条件筛选模型，结果按标题排序
+        Returns:
+            tuple: (总数, 当前页的模型列表)
+        """
+        with self.lock:
+            # 先用最有选择性的索引缩小候选集，再逐条检查其余条件
+            if prefix:
+                low = prefix.lower()
+                start = bisect_left(self.sorted_titles, (low,))
+                end = bisect_left(self.sorted_titles, (low + "\U0010ffff",))
+                candidates = [(sub, title) for _, sub, title in self.sorted_titles[start:end]]
+            elif tag is not None:
+                candidates = self.by_tag.get(tag, ())
+            elif subscription is not None:
+                candidates = [(subscription, title) for title in self.by_subscription.get(subscription, ())]
+            elif likes_min is not None or likes_max is not None:
+                start = 0 if likes_min is None else bisect_left(self.sorted_likes, (likes_min,))
+                end = len(self.sorted_likes) if likes_max is None else bisect_right(
+                    self.sorted_likes, (likes_max, "\U0010ffff"))
+                candidates = [(sub, title) for _, sub, title in self.sorted_likes[start:end]]
+            else:
+                candidates = [(sub, title) for _, sub, title in self.sorted_titles]
+
+            tagged = self.by_tag.get(tag, set()) if tag is not None else None
+            matches = []
+            for key in candidates:
+                if subscription is not None and key[0] != subscription:
+                    continue
+                if tagged is not None and key not in tagged:
+                    continue
+                if prefix and not key[1].lower().startswith(prefix.lower()):
+                    continue
+                if likes_min is not None or likes_max is not None:
+                    likes = self._likes(self.models[key])
+                    if likes is None:
+                        continue
+                    if likes_min is not None and likes < likes_min:
+                        continue
+                    if likes_max is not None and likes > likes_max:
+                        continue
+                matches.append(key)
+
+            matches.sort(key=lambda key: (key[1].lower(), key[0], key[1]))
+            start = (page - 1) * per_page
+            return len(matches), [self.models[key] for key in matches[start:start + per_page]]
+
+
+def _int_arg(name, default=None, minimum=None):
+    value = request.args.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        abort(400, description=f"{name} must be an integer")
+    if minimum is not None and value < minimum:
+        abort(400, description=f"{name} must be >= {minimum}")
+    return value
+
+
+def create_app(config):
+    """创建只读查询 API 的 Flask 应用"""
+    storage_settings = config.get("storage", {})
+    api_settings = config.get("api", {})
+    store = ModelStore(storage_settings.get("database", "data/models.db"), storage_settings.get("journal_mode", "WAL"))
+    index = ModelIndex(store, api_settings.get("refresh_interval_seconds", 1.0))
+    index.refresh(force=True)
+    search_index = SearchIndex(storage_settings.get("database", "data/models.db"),
+                               storage_settings.get("journal_mode", "WAL"))
+
+    app = Flask(__name__)
+    app.json.ensure_ascii = False
+    app.extensions["model_index"] = index
+
+    def conditional(build, fingerprint=None):
+        """以数据内容摘要和查询参数生成 ETag，客户端已持有最新版本时直接返回 304，不执行查询
+        Args:
+            fingerprint: 结果所依赖数据的摘要，默认为模型索引的摘要
+        """
+        if fingerprint is None:
+            index.refresh()
+            fingerprint = index.fingerprint
+        payload = f"{fingerprint}\x1f{request.path}\x1f{request.query_string.decode()}"
+        etag = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify(build())
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.route("/api/subscriptions")
+    def list_subscriptions():
+        return conditional(lambda: {
+            "subscriptions": [{"name": name, "models": count} for name, count in index.subscriptions().items()]
+        })
+
+    @app.route("/api/models")
+    def list_models():
+        page = _int_arg("page", 1, minimum=1)
+        per_page = min(_int_arg("per_page", 50, minimum=1), MAX_PER_PAGE)
+        filters = {
+            "subscription": request.args.get("subscription"),
+            "prefix": request.args.get("prefix"),
+            "tag": request.args.get("tag"),
+            "likes_min": _int_arg("likes_min"),
+            "likes_max": _int_arg("likes_max"),
+        }
+
+        def build():
+            total, models = index.search(page=page, per_page=per_page, **filters)
+            return {"total": total, "page": page, "per_page": per_page, "models": models}
+
+        return conditional(build)
+
+    @app.route("/api/search")
+    def search_models():
+        query = request.args.get("q", "").strip()
+        if not query:
+            abort(400, description="q is required")
+        subscription = request.args.get("subscription")
+        limit = min(_int_arg("limit", 50, minimum=1), MAX_PER_PAGE)
+        return conditional(lambda: search_index.search(query, subscription=subscription, limit=limit),
+                           search_index.fingerprint())
+
+    @app.route("/api/models/<subscription>/<path:title>")
+    def get_model(subscription, title):
+        index.refresh()
+        if index.get(subscription, title) is None:
+            abort(404)
+        return conditional(lambda: index.get(subscription, title))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only query API over collected models")
+    parser.add_argument("--config", default="config/config.json")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    api_settings = config.get("api", {})
+    app = create_app(config)
+    app.run(
+        host=args.host or api_settings.get("host", "127.0.0.1"),
+        port=args.port or api_settings.get("port", 5000),
+        threaded=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
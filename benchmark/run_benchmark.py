@@ -0,0 +1,284 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.stand_in_server import serve  # noqa: E402
+from fetcher.parser import NOT_FOUND  # noqa: E402
+
+
+class StageTimer:
+    """累计各阶段耗时（多线程安全性由 GIL 下的 += 保证足够精度）"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+        return timed
+
+    def wrap_iter(self, stage, func):
+        """生成器版本：只累计在生成器内部花费的时间，不含下游消费的时间"""
+        def timed(*args, **kwargs):
+            iterator = iter(func(*args, **kwargs))
+            self.calls[stage] += 1
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.totals[stage] += time.perf_counter() - start
+                yield item
+        return timed
+
+    def report(self):
+        return {
+            stage: {"seconds": round(self.totals[stage], 4), "calls": self.calls[stage]}
+            for stage in sorted(self.totals)
+        }
+
+
+def instrument(fetcher, timer):
+    """给 fetcher 的各阶段挂上计时"""
+    fetcher.iter_models = timer.wrap_iter("listing", fetcher.iter_models)
+    fetcher.fetch_card_details = timer.wrap("detail_fetch", fetcher.fetch_card_details)
+    fetcher.page_parser.parse = timer.wrap("parse", fetcher.page_parser.parse)
+    fetcher.model_store.get_subscription_index = timer.wrap("known_index", fetcher.model_store.get_subscription_index)
+    stream = fetcher.change_detector.stream
+
+    def timed_stream(*args, **kwargs):
+        # diff 阶段只计逐张卡片的比较和列表结束后的删除检测
+        diff = stream(*args, **kwargs)
+        diff.feed = timer.wrap("diff", diff.feed)
+        diff.finish = timer.wrap("diff", diff.finish)
+        return diff
+
+    fetcher.change_detector.stream = timed_stream
+    fetcher.model_store.upsert_models = timer.wrap("persist", fetcher.model_store.upsert_models)
+    fetcher.model_store.remove_missing = timer.wrap("persist", fetcher.model_store.remove_missing)
+    fetcher.stats_history.record = timer.wrap("persist", fetcher.stats_history.record)
+
+
+def server_stats(base_url, reset=False):
+    path = "/__reset" if reset else "/__stats"
+    with urllib.request.urlopen(base_url + path, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_scenario(servers, listing_type, parser, concurrency, runs, fetch_introduction,
+                 detail_source="page", max_readme_bytes=32768, subscription_workers=4):
+    """在独立进程中运行一个场景，返回每次运行的指标
+    servers 为 [(组织名, 替身站点地址)]，每个组织一个订阅源
+    """
+    from fetcher.fetcher import HuggingFaceModelFetcher
+
+    logging.getLogger("fetcher.fetcher").setLevel(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="llminfo-bench-")
+    os.chdir(workdir)
+    config = {
+        "subscriptions": [{"name": org, "url": f"{base_url}/{org}", "type": listing_type} for org, base_url in servers],
+        "fetcher": {
+            "max_concurrency": concurrency,
+            "requests_per_second": 1_000_000,
+            "burst": concurrency,
+            "parser": parser,
+            "listing": {"page_size": 1000, "max_pages": 1000},
+            "detail_source": detail_source,
+            "raw_detail": {"max_readme_bytes": max_readme_bytes},
+            "pipeline": {"subscription_workers": subscription_workers},
+        },
+        "http_cache": {"directory": os.path.join(workdir, "http_cache")},
+        "storage": {"database": os.path.join(workdir, "models.db")},
+    }
+
+    results = []
+    introductions = {}
+    for run in range(runs):
+        fetcher = HuggingFaceModelFetcher(config)
+        fetcher.logger.setLevel(logging.WARNING)
+        timer = StageTimer()
+        instrument(fetcher, timer)
+        for _, base_url in servers:
+            server_stats(base_url, reset=True)
+
+        start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        data = fetcher.fetch(fetch_introduction=fetch_introduction)
+        cpu = cpu_seconds() - cpu_start
+        wall = time.perf_counter() - start
+        fetcher.close()
+        if run == 0:
+            introductions = {
+                title: model.get("introduction")
+                for models in data["subscriptions"].values() for title, model in models.items()
+            }
+
+        counters = defaultdict(int)
+        for _, base_url in servers:
+            for key, value in server_stats(base_url).items():
+                counters[key] += value
+        # 按实际抓取详情的模型数折算（热运行中未变化的模型不抓取详情）
+        details = timer.calls["detail_fetch"]
+        results.append({
+            "run": "cold" if run == 0 else f"warm{run}",
+            "models_collected": sum(len(m) for m in data["subscriptions"].values()),
+            "wall_seconds": round(wall, 4),
+            "requests": counters["requests"],
+            "requests_per_second": round(counters["requests"] / wall, 2) if wall else None,
+            "server_errors": counters["errors"],
+            "not_modified": counters["not_modified"],
+            "bytes_transferred": counters["bytes"],
+            "cpu_seconds": round(cpu, 4),
+            "details_fetched": details,
+            "bytes_per_model": round(counters["bytes"] / details) if details else None,
+            "cpu_ms_per_model": round(cpu * 1000 / details, 3) if details else None,
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "stages": timer.report(),
+        })
+    return results, introductions
+
+
+def compare_introductions(by_source):
+    """比较各详情来源在冷启动运行中提取的 introduction
+    页面解析会去掉行内元素两侧的空格，比较时忽略空白差异
+    Returns:
+        dict: {"mismatches": 不一致的模型数, "examples": 前几个不一致的模型, "not_found": {来源: 未提取到的模型数}}
+    """
+    def normalize(text):
+        return "".join((text or "").split())
+
+    sources = sorted(by_source)
+    titles = set().union(*(by_source[source] for source in sources))
+    mismatched = sorted(
+        title for title in titles
+        if len({normalize(by_source[source].get(title)) for source in sources}) > 1
+    )
+    return {
+        "mismatches": len(mismatched),
+        "examples": [{source: by_source[source].get(title) for source in sources} | {"title": title}
+                     for title in mismatched[:3]],
+        "not_found": {
+            source: sum(1 for text in by_source[source].values() if text == NOT_FOUND)
+            for source in sources
+        },
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end fetch benchmark")
+    parser.add_argument("--models", type=int, nargs="+", default=[10, 1000], help="Org sizes to benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in latency per request (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--page-kb", type=int, default=50, help="Approximate model page size")
+    parser.add_argument("--readme-kb", type=int, default=8, help="Approximate raw README size")
+    parser.add_argument("--detail-source", nargs="+", default=["page"], choices=["page", "raw"],
+                        help="Detail sources to compare; each runs as its own scenario")
+    parser.add_argument("--max-readme-bytes", type=int, default=32768)
+    parser.add_argument("--listing-type", default="api", choices=["api", "html_pages"])
+    parser.add_argument("--parser", default="stream", choices=["html.parser", "lxml", "stream"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--orgs", type=int, default=1, help="Number of orgs (subscriptions), each with --models models")
+    parser.add_argument("--subscription-workers", type=int, default=4,
+                        help="Subscriptions listed in parallel (fetcher.pipeline.subscription_workers)")
+    parser.add_argument("--runs", type=int, default=2, help="Runs per scenario; the first is cold")
+    parser.add_argument("--fetch-introduction", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    scenarios = []
+    parity_failed = False
+    ctx = multiprocessing.get_context("spawn")
+    orgs = ["bench-org"] if args.orgs == 1 else [f"bench-org-{i:02d}" for i in range(args.orgs)]
+    for models in args.models:
+        introductions = {}
+        for detail_source in args.detail_source:
+            # 每个组织一个替身站点进程，避免站点本身成为瓶颈
+            processes, servers = [], []
+            for org in orgs:
+                ready = ctx.Queue()
+                server = ctx.Process(
+                    target=serve,
+                    args=(org, models, args.latency, args.error_rate, args.page_kb, "127.0.0.1", 0, ready),
+                    kwargs={"readme_kb": args.readme_kb},
+                    daemon=True,
+                )
+                server.start()
+                processes.append(server)
+                servers.append((org, f"http://127.0.0.1:{ready.get(timeout=30)}"))
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                    runs, introductions[detail_source] = executor.submit(
+                        run_scenario, servers, args.listing_type, args.parser,
+                        args.concurrency, args.runs, args.fetch_introduction,
+                        detail_source, args.max_readme_bytes, args.subscription_workers,
+                    ).result()
+            finally:
+                for server in processes:
+                    server.terminate()
+                    server.join()
+            for result in runs:
+                print(f"models={models} orgs={len(orgs)} detail={detail_source} {result['run']}: "
+                      f"{result['wall_seconds']}s, {result['requests_per_second']} req/s, "
+                      f"{result['bytes_per_model']} bytes/model, {result['cpu_ms_per_model']} CPU ms/model, "
+                      f"peak RSS {result['peak_rss_mb']} MB")
+            scenarios.append({"models": models, "orgs": len(orgs), "detail_source": detail_source, "runs": runs})
+
+        # 多个详情来源时检查提取的 introduction 是否一致，避免比较的是提取失败的模式
+        if args.fetch_introduction and len(introductions) > 1:
+            parity = compare_introductions(introductions)
+            print(f"models={models} introduction parity: {parity['mismatches']} mismatches, "
+                  f"not found {parity['not_found']}")
+            if parity["mismatches"]:
+                parity_failed = True
+                print(f"Introduction mismatch examples: {parity['examples']}")
+            scenarios.append({"models": models, "introduction_parity": parity})
+
+    report = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "settings": vars(args),
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results written to {args.output}")
+    if parity_failed:
+        sys.exit("Detail sources extracted different introductions")
+
+
+if __name__ == "__main__":
+    main()
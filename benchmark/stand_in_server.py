@@ -0,0 +1,304 @@
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+FILLER_PARAGRAPH = (
+    "<div class=\"filler\"><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, "
+    "sed do eiusmod tempor <b>incididunt</b> ut labore et dolore magna aliqua.</p>"
+    "<table><tr><td>metric</td><td>value</td></tr></table></div>"
+)
+FILLER_MARKDOWN = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor **incididunt** "
+    "ut labore et dolore magna aliqua.\n\n| metric | value |\n|---|---|\n| score | 1.0 |\n\n"
+)
+
+
+class StandInState:
+    """本地 Hugging Face 替身站点的配置与请求计数"""
+
+    def __init__(self, org="bench-org", models=10, latency=0.0, error_rate=0.0, page_kb=50, seed=0,
+                 fault_status=503, retry_after=1, readme_kb=8):
+        self.org = org
+        self.models = models
+        self.latency = latency
+        self.error_rate = error_rate
+        # 注入故障时的响应：HTTP 状态码（503/429 带 Retry-After），0 表示直接断开连接
+        self.fault_status = fault_status
+        self.retry_after = retry_after
+        self.page_kb = page_kb
+        self.readme_kb = readme_kb
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {"requests": 0, "errors": 0, "not_modified": 0, "bytes": 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def should_fail(self):
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def model_name(self, index):
+        return f"{self.org}/model-{index:05d}"
+
+    def model_index(self, name):
+        try:
+            index = int(name.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+        return index if 0 <= index < self.models else None
+
+    def likes(self, index):
+        return (index * 37) % 5000
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        state = self.state
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+
+        if parsed.path == "/__stats":
+            return self.send_body(200, json.dumps(state.counters), "application/json", count=False)
+        if parsed.path == "/__reset":
+            state.reset()
+            return self.send_body(200, "{}", "application/json", count=False)
+        if parsed.path == "/__faults":
+            # 运行时调整故障注入，如 /__faults?error_rate=1&status=429&retry_after=2
+            with state.lock:
+                if "error_rate" in query:
+                    state.error_rate = float(query["error_rate"][0])
+                if "status" in query:
+                    state.fault_status = int(query["status"][0])
+                if "retry_after" in query:
+                    state.retry_after = query["retry_after"][0]
+            return self.send_body(200, "{}", "application/json", count=False)
+
+        state.count("requests")
+        if state.latency:
+            time.sleep(state.latency)
+        if state.should_fail():
+            state.count("errors")
+            if not state.fault_status:
+                self.close_connection = True
+                return
+            headers = {}
+            if state.fault_status in (429, 503) and state.retry_after not in (None, ""):
+                headers["Retry-After"] = str(state.retry_after)
+            return self.send_body(state.fault_status, "Injected fault", "text/plain", headers=headers)
+
+        parts = parsed.path.strip("/").split("/")
+        if parsed.path == "/api/models":
+            return self.send_api_listing(query)
+        if parts[:2] == ["api", "models"] and len(parts) == 4 and parts[2] == state.org \
+                and state.model_index(parts[3]) is not None:
+            return self.send_model_metadata(state.model_index(parts[3]), query)
+        if parts == ["api", "organizations", state.org, "overview"]:
+            return self.send_body(200, json.dumps({"name": state.org, "numFollowers": 1234,
+                                                   "numModels": state.models}), "application/json")
+        if len(parts) == 5 and parts[0] == state.org and parts[2:] == ["raw", "main", "README.md"] \
+                and state.model_index(parts[1]) is not None:
+            return self.send_readme(state.model_index(parts[1]))
+        if parsed.path == "/models":
+            return self.send_html_listing(query)
+        if len(parts) == 1 and parts[0] == state.org:
+            return self.send_org_page()
+        if len(parts) == 2 and parts[0] == state.org and state.model_index(parts[1]) is not None:
+            return self.send_model_page(state.model_index(parts[1]))
+        return self.send_body(404, "Not Found", "text/plain")
+
+    def send_body(self, status, body, content_type, headers=None, count=True, ranged=False):
+        payload = body.encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        headers = dict(headers or {})
+        if ranged and status == 200 and self.headers.get("Range", "").startswith("bytes=0-"):
+            # 只支持从头开始的单个范围（bytes=0-N），足够模拟读取 README 前缀
+            end = self.headers["Range"][len("bytes=0-"):]
+            if end.isdigit() and int(end) + 1 < len(payload):
+                headers["Content-Range"] = f"bytes 0-{end}/{len(payload)}"
+                status, total = 206, payload
+                payload = total[:int(end) + 1]
+        if status in (200, 206) and count and self.headers.get("If-None-Match") == etag:
+            self.state.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            for name, value in headers.items():
+                if name != "Content-Range":
+                    self.send_header(name, value)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if status in (200, 206):
+            self.send_header("ETag", etag)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        if count:
+            self.state.count("bytes", len(payload))
+
+    def article(self, index):
+        name = self.state.model_name(index)
+        return (
+            f'<article class="group/repo"><a href="/{name}">'
+            f'<h4 class="text-md truncate font-mono">{name}</h4></a>'
+            f'<time datetime="2025-03-{index % 28 + 1:02d}T00:00:00"></time></article>'
+        )
+
+    def send_org_page(self):
+        articles = "".join(self.article(i) for i in range(min(self.state.models, 10)))
+        body = (
+            f"<html><body><h1>{self.state.org}</h1><div id=\"models\">"
+            f"<button class=\"mx-2 flex h-8 flex-none items-center rounded-lg px-2.5 font-medium text-gray-800\">"
+            f"Expand {self.state.models} models</button>{articles}</div></body></html>"
+        )
+        self.send_body(200, body, "text/html")
+
+    def send_api_listing(self, query):
+        limit = int(query.get("limit", ["100"])[0])
+        cursor = int(query.get("cursor", ["0"])[0])
+        end = min(cursor + limit, self.state.models)
+        items = [
+            {
+                "id": self.state.model_name(i),
+                "likes": self.state.likes(i),
+                "downloads": self.state.likes(i) * 10,
+                "lastModified": f"2025-03-{i % 28 + 1:02d}T00:00:00.000Z",
+                "tags": ["transformers", f"family-{i % 5}"],
+            }
+            for i in range(cursor, end)
+        ]
+        headers = {}
+        if end < self.state.models:
+            next_query = {key: values[0] for key, values in query.items()}
+            next_query["cursor"] = end
+            headers["Link"] = f'</api/models?{urlencode(next_query)}>; rel="next"'
+        self.send_body(200, json.dumps(items), "application/json", headers=headers)
+
+    def send_html_listing(self, query):
+        page = int(query.get("p", ["0"])[0])
+        per_page = 30
+        start = page * per_page
+        end = min(start + per_page, self.state.models)
+        articles = "".join(self.article(i) for i in range(start, end))
+        self.send_body(200, f"<html><body><div>{articles}</div></body></html>", "text/html")
+
+    def send_model_page(self, index):
+        name = self.state.model_name(index)
+        filler_count = max(1, self.state.page_kb * 1024 // len(FILLER_PARAGRAPH))
+        half = filler_count // 2
+        body = (
+            f"<html><head><title>{name}</title></head><body><header>"
+            f"<button title=\"See users who liked this repository\"><svg></svg>{self.state.likes(index)}</button>"
+            f"<button title=\"Show DeepSeek's followers\"><span>1.2k</span></button></header>"
+            + FILLER_PARAGRAPH * half
+            + "<div class=\"model-card-content\">"
+            "<h2 class=\"relative group flex items-center\"><span>1. Introduction</span></h2>"
+            f"<p>We introduce <strong>{name}</strong>, a synthetic benchmark model.</p>"
+            "<p>It supports a context length of 128K tokens.</p>"
+            "<h2 class=\"relative group flex items-center\"><span>2. Model Summary</span></h2>"
+            "<p>Summary text.</p></div>"
+            + FILLER_PARAGRAPH * (filler_count - half)
+            + "</body></html>"
+        )
+        self.send_body(200, body, "text/html")
+
+
+    def send_model_metadata(self, index, query):
+        name = self.state.model_name(index)
+        data = {
+            "id": name,
+            "_id": f"{index:024x}",
+            "likes": self.state.likes(index),
+            "downloads": self.state.likes(index) * 10,
+            "lastModified": f"2025-03-{index % 28 + 1:02d}T00:00:00.000Z",
+            "tags": ["transformers", f"family-{index % 5}"],
+            "siblings": [{"rfilename": f"model-{shard:05d}-of-00008.safetensors"} for shard in range(8)],
+        }
+        # expand[] 只返回指定字段（及 id），与 Hub 接口一致
+        expand = query.get("expand[]")
+        if expand:
+            data = {key: value for key, value in data.items() if key in expand or key in ("id", "_id")}
+        self.send_body(200, json.dumps(data), "application/json")
+
+    def send_readme(self, index):
+        name = self.state.model_name(index)
+        filler_count = max(1, self.state.readme_kb * 1024 // len(FILLER_MARKDOWN))
+        body = (
+            f"---\nlicense: mit\ntags:\n- transformers\n- family-{index % 5}\n---\n"
+            f"# {name}\n\n<p align=\"center\"><img src=\"logo.svg\" width=\"60%\"></p>\n\n"
+            "## 1. Introduction\n\n"
+            f"We introduce **{name}**, a synthetic benchmark model.\n\n"
+            "It supports a context length of 128K tokens.\n\n"
+            "## 2. Model Summary\n\nSummary text.\n\n"
+            + FILLER_MARKDOWN * filler_count
+        )
+        self.send_body(200, body, "text/markdown", ranged=True)
+
+
+class StandInServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # 客户端读够前缀（如 README 字节上限）后主动断开是正常情况
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(state, host="127.0.0.1", port=0):
+    """创建替身站点服务器，port 为 0 时自动分配端口"""
+    handler = type("BoundStandInHandler", (StandInHandler,), {"state": state})
+    server = StandInServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(org, models, latency, error_rate, page_kb, host, port, ready=None, fault_status=503, retry_after=1,
+          readme_kb=8):
+    """启动替身站点并阻塞运行；ready 为 multiprocessing 队列时写入实际端口"""
+    state = StandInState(org, models, latency, error_rate, page_kb, fault_status=fault_status,
+                         retry_after=retry_after, readme_kb=readme_kb)
+    server = make_server(state, host, port)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Hugging Face stand-in server")
+    parser.add_argument("--org", default="bench-org")
+    parser.add_argument("--models", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a fault")
+    parser.add_argument("--fault-status", type=int, default=503, help="Status code for injected faults, 0 drops the connection")
+    parser.add_argument("--retry-after", default="1", help="Retry-After header sent with injected 429/503")
+    parser.add_argument("--page-kb", type=int, default=50, help="Approximate size of each model page")
+    parser.add_argument("--readme-kb", type=int, default=8, help="Approximate size of each raw README")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    print(f"Serving {args.models} models for {args.org} on http://{args.host}:{args.port}")
+    serve(args.org, args.models, args.latency, args.error_rate, args.page_kb, args.host, args.port,
+          fault_status=args.fault_status, retry_after=args.retry_after, readme_kb=args.readme_kb)
+
+
+if __name__ == "__main__":
+    main()
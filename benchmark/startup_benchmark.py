@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(REPO_ROOT, "main.py")
+
+# 订阅管理命令不应加载的重量级模块
+FORBIDDEN_MODULES = ("selenium", "requests", "bs4", "lxml", "flask", "apscheduler", "sqlite3")
+
+# 只检查导入副作用的模块：导入时不应加载 selenium / bs4
+LAZY_MODULES = {
+    "fetcher.fetcher": ("selenium", "bs4"),
+    "fetcher.driver_pool": ("selenium",),
+    "fetcher.parser": ("bs4", "lxml"),
+    "metrics.metrics": ("http.server",),
+}
+
+COMMANDS = {
+    "list": ["--list-subscriptions"],
+    "add": ["--add-subscription", "--name", "bench-sub", "--url", "https://huggingface.co/bench-org"],
+    "remove": ["--remove-subscription", "--name", "bench-sub"],
+}
+
+
+def imported_modules(stderr):
+    """从 -X importtime 的输出中取出已导入的顶层模块名"""
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        name = line.rsplit("|", 1)[1].strip()
+        if name and name != "imported package":
+            modules.add(name)
+    return modules
+
+
+def offending(modules, forbidden):
+    return sorted(name for name in modules
+                  if any(name == f or name.startswith(f + ".") for f in forbidden))
+
+
+def time_command(args, workdir, runs):
+    """返回每次运行的耗时（毫秒）和最后一次运行导入的模块"""
+    timings = []
+    modules = set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", MAIN, *args],
+                                cwd=workdir, capture_output=True, text=True)
+        timings.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"main.py {' '.join(args)} failed: {result.stderr[-500:]}")
+        modules = imported_modules(result.stderr)
+    return timings, modules
+
+
+def python_baseline(runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def check_lazy_module(module, forbidden):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return [f"import failed: {result.stderr.strip().splitlines()[-1]}"]
+    return offending(imported_modules(result.stderr), forbidden)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark for the management CLI")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Maximum median wall time per command, excluding bare interpreter startup")
+    parser.add_argument("--output", default=None, help="Optional JSON report path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="llminfo-startup-")
+    os.makedirs(os.path.join(workdir, "config"))
+    shutil.copy(os.path.join(REPO_ROOT, "config", "config.json"), os.path.join(workdir, "config", "config.json"))
+
+    baseline = python_baseline(args.runs)
+    print(f"python startup baseline: {baseline:.1f} ms")
+    failures = []
+    report = {"python_baseline_ms": round(baseline, 2), "budget_ms": args.budget_ms, "commands": {}}
+    try:
+        for name, command in COMMANDS.items():
+            timings, modules = time_command(command, workdir, args.runs)
+            median = statistics.median(timings)
+            heavy = offending(modules, FORBIDDEN_MODULES)
+            report["commands"][name] = {
+                "median_ms": round(median, 2),
+                "min_ms": round(min(timings), 2),
+                "over_baseline_ms": round(median - baseline, 2),
+                "heavy_imports": heavy,
+            }
+            print(f"{name:>6}: median {median:.1f} ms (+{median - baseline:.1f} ms over baseline)"
+                  + (f", heavy imports: {', '.join(heavy)}" if heavy else ""))
+            if heavy:
+                failures.append(f"{name} imports {', '.join(heavy)}")
+            if median - baseline > args.budget_ms:
+                failures.append(f"{name} took {median - baseline:.1f} ms over baseline (budget {args.budget_ms} ms)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report["lazy_modules"] = {}
+    for module, forbidden in LAZY_MODULES.items():
+        loaded = check_lazy_module(module, forbidden)
+        report["lazy_modules"][module] = loaded
+        if loaded:
+            failures.append(f"import {module} loads {', '.join(loaded)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if failures:
+        print("FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
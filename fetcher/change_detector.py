@@ -0,0 +1,145 @@
+import hashlib
+
+# 参与列表卡片哈希的字段；统计数据单独比较，不触发详情重新抓取
+CARD_HASH_FIELDS = ("title", "link", "time")
+
+# 变化事件类型
+ADDED = "added"
+REMOVED = "removed"
+RENAMED = "renamed"
+UPDATED = "updated"
+STATS_CHANGED = "stats_changed"
+
+# StreamingDiff.feed 返回的卡片去向
+FETCH = "fetch"
+REFRESH = "refresh"
+
+
+def card_hash(card):
+    """列表卡片的内容哈希"""
+    payload = "\x1f".join(str(card.get(field) or "") for field in CARD_HASH_FIELDS)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SubscriptionDiff:
+    """一个订阅源本次列表与已知模型的比较结果
+    Attributes:
+        events: 变化事件列表，每项为包含 type、subscription、title 等键的字典
+        fetch: 需要抓取详情的卡片（新增、改名、卡片内容变化）
+        refresh: 详情无需重新抓取、但存储中的卡片字段或统计需要更新的卡片
+        unchanged: 完全未变化的模型数
+    """
+
+    def __init__(self, subscription):
+        self.subscription = subscription
+        self.events = []
+        self.fetch = []
+        self.refresh = []
+        self.unchanged = 0
+
+    def event(self, event_type, title, **fields):
+        event = {"type": event_type, "subscription": self.subscription, "title": title}
+        event.update(fields)
+        self.events.append(event)
+        return event
+
+    def count(self, *event_types):
+        return sum(1 for event in self.events if event["type"] in event_types)
+
+
+class StreamingDiff(SubscriptionDiff):
+    """逐张卡片进行的变化检测，供流水线在列表尚未获取完时就开始处理
+
+    feed 返回卡片的去向（FETCH / REFRESH / None），finish 在列表结束后补上删除事件。
+    未提供 listed_titles 时，改名以"旧标题在本次列表中尚未出现"为准判断。
+    keep_cards 为 False 时不在 fetch / refresh 中保留卡片，内存只与变化事件数量有关。
+    """
+
+    def __init__(self, subscription, known, listed_titles=None, keep_cards=True):
+        super().__init__(subscription)
+        self.keep_cards = keep_cards
+        self.known = known
+        self.known_by_id = {
+            info["model_id"]: title for title, info in known.items() if info.get("model_id")
+        }
+        self.listed_titles = listed_titles
+        self.seen = set()
+        self.renamed_from = set()
+
+    def feed(self, card):
+        """比较一张卡片（就地补上 card_hash），返回 FETCH、REFRESH 或 None（无变化）"""
+        title = card["title"]
+        self.seen.add(title)
+        info = self.known.get(title)
+        if info is not None and info.get("card_hash") and not card.get("time"):
+            # 浏览器回退等来源的卡片没有更新时间，无法判断卡片是否变化，沿用已存储的哈希，
+            # 避免列表来源切换时所有模型都被当作更新重新抓取
+            card["card_hash"] = info["card_hash"]
+        else:
+            card["card_hash"] = card_hash(card)
+        listed = self.listed_titles if self.listed_titles is not None else self.seen
+
+        if info is None:
+            old_title = self.known_by_id.get(card.get("model_id"))
+            if old_title and old_title not in listed:
+                self.renamed_from.add(old_title)
+                self.event(RENAMED, title, old_title=old_title)
+            else:
+                self.event(ADDED, title)
+            return self._route(self.fetch, card, FETCH)
+
+        if info.get("card_hash") and info["card_hash"] != card["card_hash"]:
+            self.event(UPDATED, title)
+            return self._route(self.fetch, card, FETCH)
+
+        old_stats = info.get("model_stats") or {}
+        stats_changes = {
+            key: {"old": old_stats.get(key), "new": value}
+            for key, value in (card.get("model_stats") or {}).items()
+            if old_stats.get(key) != value
+        }
+        if stats_changes:
+            self.event(STATS_CHANGED, title, changes=stats_changes)
+        if stats_changes or not info.get("card_hash"):
+            # 旧数据没有卡片哈希时只补写哈希，不重新抓取
+            return self._route(self.refresh, card, REFRESH)
+        self.unchanged += 1
+        return None
+
+    def _route(self, cards, card, route):
+        if self.keep_cards:
+            cards.append(card)
+        return route
+
+    def finish(self):
+        """列表结束后记录已下架的模型"""
+        for title in self.known:
+            if title not in self.seen and title not in self.renamed_from:
+                self.event(REMOVED, title)
+        return self
+
+
+class ChangeDetector:
+    """以 (subscription, title) 为键、O(n) 的变化检测
+
+    已知模型只需提供卡片哈希、模型 ID 和统计数据（见 ModelStore.get_subscription_index），
+    不必加载完整模型数据。卡片哈希相同的模型跳过详情抓取，哈希变化的模型单独重新抓取。
+    """
+
+    def stream(self, subscription, known):
+        """返回逐张卡片比较的 StreamingDiff，卡片的去向由 feed 的返回值给出"""
+        return StreamingDiff(subscription, known, keep_cards=False)
+
+    def diff(self, subscription, known, cards):
+        """
+        Args:
+            subscription: 订阅源名称
+            known: {title: {"card_hash", "model_id", "model_stats"}}
+            cards: 本次列表得到的卡片，会就地补上 card_hash
+        Returns:
+            SubscriptionDiff
+        """
+        result = StreamingDiff(subscription, known, {card["title"] for card in cards})
+        for card in cards:
+            result.feed(card)
+        return result.finish()
@@ -0,0 +1,163 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+
+from metrics import metrics
+
+try:
+    import psutil
+except ImportError:  # 缺少 psutil 时不做内存检查，创建浏览器池时给出警告
+    psutil = None
+
+
+class PooledDriver:
+    """池中的单个浏览器实例及其使用统计"""
+
+    def __init__(self, driver, wait_timeout):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver = driver
+        self.wait = WebDriverWait(driver, wait_timeout)
+        self.pages = 0
+
+    def rss_mb(self):
+        """chromedriver 及其子进程（Chrome）的常驻内存，单位 MB；无法获取时返回 None"""
+        if psutil is None:
+            return None
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                rss += child.memory_info().rss
+            return rss / (1024 * 1024)
+        except Exception:
+            return None
+
+    def is_alive(self):
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class WebDriverPool:
+    """惰性启动、可复用的 WebDriver 池
+
+    - 浏览器在第一次 acquire 时才启动，最多同时存在 size 个
+    - 归还时若已加载 max_pages 个页面或内存超过 max_rss_mb 则回收重建
+    - 借出前做健康检查，失效的浏览器会被替换
+    - 池不随单次 fetch 结束而关闭，可在多个订阅源和多次定时运行间共享
+    """
+
+    def __init__(self, logger, size=1, max_pages=50, max_rss_mb=1024, wait_timeout=10):
+        self.logger = logger
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.wait_timeout = wait_timeout
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        if max_rss_mb and psutil is None:
+            self.logger.warning(
+                f"psutil is not installed: max_rss_mb={max_rss_mb} is not enforced "
+                "and driver_rss_mb is not reported")
+        atexit.register(self.shutdown)
+
+    @metrics.timed("driver_start")
+    def create_driver(self):
+        # selenium 只在第一次需要浏览器时导入
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')  # 无头模式
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        self.logger.info("Starting headless Chrome")
+        return PooledDriver(webdriver.Chrome(options=options), self.wait_timeout)
+
+    def _take(self):
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self.lock:
+                can_create = self.created < self.size
+                if can_create:
+                    self.created += 1
+            if can_create:
+                try:
+                    return self.create_driver()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            # 池已满，等待其他订阅源归还（或有浏览器被回收后重新创建）
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _discard(self, pooled):
+        pooled.quit()
+        with self.lock:
+            self.created -= 1
+
+    @contextmanager
+    def acquire(self):
+        """借出一个健康的浏览器，使用完毕自动归还"""
+        if self.closed:
+            raise RuntimeError("WebDriver pool has been shut down")
+        pooled = self._take()
+        while not pooled.is_alive():
+            self.logger.warning("Discarding unresponsive browser")
+            self._discard(pooled)
+            pooled = self._take()
+
+        healthy = True
+        try:
+            yield pooled
+        except Exception:
+            healthy = pooled.is_alive()
+            raise
+        finally:
+            pooled.pages += 1
+            self.release(pooled, healthy)
+
+    def release(self, pooled, healthy=True):
+        if self.closed or not healthy:
+            self._discard(pooled)
+            return
+        if pooled.pages >= self.max_pages:
+            self.logger.info(f"Recycling browser after {pooled.pages} pages")
+            self._discard(pooled)
+            return
+        rss = pooled.rss_mb()
+        if rss is not None:
+            metrics.set_gauge("driver_rss_mb", round(rss, 1))
+        if rss is not None and rss > self.max_rss_mb:
+            self.logger.info(f"Recycling browser using {rss:.0f} MB")
+            self._discard(pooled)
+            return
+        self.idle.put(pooled)
+
+    def shutdown(self):
+        """关闭池中所有空闲浏览器"""
+        self.closed = True
+        while True:
+            try:
+                pooled = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
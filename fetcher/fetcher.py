@@ -1,17 +1,24 @@
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 import json
 import os
 import logging
 from time import sleep
-import time
 import traceback
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from fetcher.rate_limiter import HostRateLimiter
+from fetcher.retry import ResilientSession
+from metrics import metrics
+from fetcher.http_cache import HTTPCache
+from fetcher.listing import LISTING_TYPES, ModelListing
+from fetcher.driver_pool import WebDriverPool
+from fetcher.change_detector import ChangeDetector
+from fetcher.journal import RunJournal
+from fetcher.pipeline import FetchPipeline
+from fetcher.model_card import DETAIL_SOURCES, RawModelCard
+from fetcher.parser import NOT_FOUND, ModelPageParser, extract_introduction_from_soup
+from storage.model_store import ModelStore
+from storage.stats_history import StatsHistory
+from storage.search_index import SearchIndex, WatchRule
 
 class HuggingFaceModelFetcher:
     def __init__(self, config):
@@ -24,16 +31,91 @@ class HuggingFaceModelFetcher:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         self.session = requests.Session()
-        # 初始化 Selenium WebDriver
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')  # 无头模式
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        self.driver = webdriver.Chrome(options=options)
-        self.wait = WebDriverWait(self.driver, 10)
-        # 加载本地模型数据
-        self.existing_models = self.load_existing_models()
+        # 详情抓取的并发数与按主机限速配置
+        fetcher_settings = self.config.get("fetcher", {})
+        self.max_concurrency = max(1, int(fetcher_settings.get("max_concurrency", 4)))
+        self.rate_limiter = HostRateLimiter(
+            fetcher_settings.get("requests_per_second", 1.0),
+            fetcher_settings.get("burst", 2),
+        )
+        # 所有请求统一经过限速、请求级重试和按主机熔断
+        retry_settings = fetcher_settings.get("retry", {})
+        self.requester = ResilientSession.from_settings(self.session, self.rate_limiter, self.logger, retry_settings)
+        self.subscription_attempts = max(1, retry_settings.get("subscription_attempts", 2))
+        # 流式流水线各阶段之间的队列长度和写入批大小
+        pipeline_settings = fetcher_settings.get("pipeline", {})
+        self.pipeline_queue_size = max(1, pipeline_settings.get("queue_size", 100))
+        self.pipeline_batch_size = max(1, pipeline_settings.get("sink_batch_size", 50))
+        self.subscription_workers = max(1, pipeline_settings.get("subscription_workers", 4))
+        # 连接池按并发线程数（详情线程 + 列表线程）设置，所有请求复用 keep-alive 连接
+        pool_size = self.max_concurrency + self.subscription_workers
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # 磁盘 HTTP 条件请求缓存（ETag/Last-Modified）
+        cache_settings = self.config.get("http_cache", {})
+        self.http_cache = HTTPCache(
+            self.requester,
+            directory=cache_settings.get("directory", "data/http_cache"),
+            max_bytes=cache_settings.get("max_bytes", 200 * 1024 * 1024),
+            max_age_seconds=cache_settings.get("max_age_seconds", 7 * 24 * 3600),
+            enabled=cache_settings.get("enabled", True),
+        )
+        # 模型页面解析后端（html.parser / lxml / stream）
+        self.page_parser = ModelPageParser(fetcher_settings.get("parser", "html.parser"), self.logger)
+        # 是否抓取 Introduction（摘要生成、倒排索引和关注规则都依赖它）；fetch 未显式指定时使用
+        self.fetch_introduction = fetcher_settings.get("fetch_introduction", True)
+        # 模型详情来源：page 解析渲染后的模型页面，raw 读取仓库元数据和原始 README；
+        # 订阅源可用 detail_source 单独指定
+        self.detail_source = fetcher_settings.get("detail_source", "page")
+        if self.detail_source not in DETAIL_SOURCES:
+            raise ValueError(f"Unsupported detail source: {self.detail_source}")
+        raw_settings = fetcher_settings.get("raw_detail", {})
+        self.raw_model_card = RawModelCard(
+            self.http_cache,
+            self.logger,
+            headers=self.headers,
+            max_readme_bytes=raw_settings.get("max_readme_bytes", 32768),
+            revision=raw_settings.get("revision", "main"),
+        )
+        # 免浏览器的模型列表获取（订阅源 type 为 api / html_pages 时使用）
+        listing_settings = fetcher_settings.get("listing", {})
+        self.listing = ModelListing(
+            self.http_cache,
+            self.logger,
+            headers=self.headers,
+            page_size=listing_settings.get("page_size", 100),
+            max_pages=listing_settings.get("max_pages", 50),
+            page_parser=self.page_parser,
+        )
+        # Selenium WebDriver 池，浏览器在第一次使用时才启动，跨订阅源和多次运行复用
+        browser_settings = fetcher_settings.get("browser", {})
+        self.driver_pool = WebDriverPool(
+            self.logger,
+            size=browser_settings.get("pool_size", 1),
+            max_pages=browser_settings.get("max_pages_per_driver", 50),
+            max_rss_mb=browser_settings.get("max_rss_mb", 1024),
+            wait_timeout=browser_settings.get("wait_timeout", 10),
+        )
+        # 本地模型存储（SQLite），首次运行时导入旧版 data/models.json
+        storage_settings = self.config.get("storage", {})
+        journal_mode = storage_settings.get("journal_mode", "WAL")
+        self.model_store = ModelStore(storage_settings.get("database", "data/models.db"), journal_mode)
+        self.import_legacy_models()
+        # 变化检测，以及每个订阅源最近一次运行的变化事件
+        self.change_detector = ChangeDetector()
+        self.changes = {}
+        # model_stats 的时间序列历史，与模型存储共用同一个数据库
+        self.stats_history = StatsHistory(storage_settings.get("database", "data/models.db"), journal_mode)
+        # 标题、标签和 introduction 的倒排索引，写入模型时增量更新并检查关注规则
+        self.search_index = SearchIndex(storage_settings.get("database", "data/models.db"), journal_mode)
+        self.watch_rules = WatchRule.from_config(self.config.get("watch_rules", []))
+        # fetch 运行的预写日志，用于中断后恢复；只在 fetch 运行期间启用
+        self.journal = RunJournal(
+            storage_settings.get("journal", "data/fetch_journal.ndjson"),
+            fsync=storage_settings.get("journal_fsync", True),
+        )
+        self.run_journal = None
 
     def setup_logger(self):
         """设置日志记录"""
@@ -64,6 +146,7 @@ class HuggingFaceModelFetcher:
         self.logger.error(f"Subscription '{name}' not found in config.")
         raise ValueError(f"Subscription '{name}' not found in config.")
 
+    @metrics.timed("fetch_model_info")
     def fetch_model_info(self, model_url, fetch_introduction=False):
         """获取模型的所有信息（包括统计信息和详细信息）
         Args:
@@ -71,44 +154,57 @@ class HuggingFaceModelFetcher:
             fetch_introduction: 是否获取Introduction部分，默认为False
         """
         try:
-            response = self.session.get(model_url, timeout=10)
+            response = self.http_cache.get(model_url, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+            # 页面未变化时直接复用上次的解析结果
+            parsed_key = f"model_info:{fetch_introduction}"
+            if response.not_modified:
+                cached_info = self.http_cache.get_parsed(model_url, parsed_key)
+                if cached_info is not None:
+                    self.logger.info(f"Not modified, reusing parsed info for {model_url}")
+                    return dict(cached_info)
+            # 一次解析同时提取统计信息和（需要时的）Introduction 部分
+            stats, introduction = self.page_parser.parse(response.text, fetch_introduction)
+            for key, value in stats.items():
+                self.logger.info(f"Found {key} text: {value}")
             
-            model_info = {}
-            
-            # 获取统计信息
-            stats = {}
-            # 获取点赞数
-            likes_button = soup.find("button", {"title": "See users who liked this repository"})
-            if likes_button:
-                likes_text = likes_button.get_text(strip=True)
-                self.logger.info(f"Found likes text: {likes_text}")
-                stats["likes"] = likes_text
-            
-            # 获取关注者数
-            followers_button = soup.find("button", {"title": "Show DeepSeek's followers"})
-            if followers_button:
-                followers_text = followers_button.get_text(strip=True)
-                self.logger.info(f"Found followers text: {followers_text}")
-                stats["followers"] = followers_text
-            
-            model_info["model_stats"] = stats
-            
-            # 只在需要时获取 Introduction 部分
+            model_info = {"model_stats": stats}
             if fetch_introduction:
-                model_info["introduction"] = self.fetch_model_introduction(soup)
+                if introduction != NOT_FOUND:
+                    self.logger.info(f"Introduction content: {introduction}")
+                model_info["introduction"] = introduction
             else:
                 model_info["introduction"] = "Not fetched"
             
             # 添加日志输出以便调试
             self.logger.info(f"Fetched info for {model_url} (introduction: {'fetched' if fetch_introduction else 'skipped'})")
+            self.http_cache.store_parsed(model_url, parsed_key, model_info)
             
             return model_info
         except Exception as e:
+            metrics.inc("errors_total", stage="fetch_model_info")
             self.logger.error(f"Error fetching info for {model_url}: {e}")
-            return {"introduction": "Error fetching details", "model_stats": {}}
+            # fetch_error 只用于加入重新抓取队列，写入存储前会被移除
+            return {"introduction": "Error fetching details", "model_stats": {}, "fetch_error": str(e)}
 
+    @metrics.timed("fetch_model_raw")
+    def fetch_model_raw(self, model_url, fetch_introduction=False, card_stats=None):
+        """从仓库元数据和原始 README 获取模型信息，返回结构与 fetch_model_info 相同
+        Args:
+            model_url: 模型页面的URL
+            fetch_introduction: 是否获取Introduction部分，默认为False
+            card_stats: 列表卡片中已有的统计数据，已有 likes 时不再请求元数据
+        """
+        try:
+            model_info = self.raw_model_card.fetch(model_url, fetch_introduction, card_stats)
+            self.logger.info(f"Fetched raw info for {model_url} (introduction: {'fetched' if fetch_introduction else 'skipped'})")
+            return model_info
+        except Exception as e:
+            metrics.inc("errors_total", stage="fetch_model_raw")
+            self.logger.error(f"Error fetching raw info for {model_url}: {e}")
+            return {"introduction": "Error fetching details", "model_stats": {}, "fetch_error": str(e)}
+
+    @metrics.timed("fetch_model_introduction")
     def fetch_model_introduction(self, soup):
         """获取模型的Introduction部分
         Args:
@@ -117,64 +213,119 @@ class HuggingFaceModelFetcher:
             str: 模型的Introduction内容，如果未找到则返回"Not found..."
         """
         try:
-            intro_section = soup.find("h2", class_="relative group flex items-center")
-            
-            if intro_section and "Introduction" in intro_section.get_text():
-                intro_content = []
-                current = intro_section.find_next_sibling()
-                while current and not (current.name == "h2" and "Model Summary" in current.get_text()):
-                    if current.name == "p":
-                        text = current.get_text(strip=True)
-                        if text:  # 只添加非空文本
-                            intro_content.append(text)
-                    current = current.find_next_sibling()
-                
-                if intro_content:
-                    introduction = "\n".join(intro_content)
-                    self.logger.info(f"Introduction content: {introduction}")
-                    return introduction
-                else:
-                    self.logger.info("No introduction content found in paragraphs")
-                    return "Not found..."
-            else:
+            introduction = extract_introduction_from_soup(soup)
+            if introduction == NOT_FOUND:
                 self.logger.info("Introduction section not found")
-                return "Not found..."
+            else:
+                self.logger.info(f"Introduction content: {introduction}")
+            return introduction
         except Exception as e:
+            metrics.inc("errors_total", stage="fetch_model_introduction")
             self.logger.error(f"Error fetching introduction: {e}")
             return "Error fetching introduction"
 
-    def expand_models(self, models_div, subscription_url):
+    def fetch_card_details(self, card, subscription_name, fetch_introduction=False, detail_source=None):
+        """抓取单张列表卡片对应模型的详细信息，detail_source 为 None 时使用配置的默认来源"""
+        if (detail_source or self.detail_source) == "raw":
+            model_info = self.fetch_model_raw(card["link"], fetch_introduction, card.get("model_stats"))
+        else:
+            model_info = self.fetch_model_info(card["link"], fetch_introduction)
+        # 列表卡片中的字段（title、link、time、card_hash 等）覆盖到模型信息上，
+        # 统计数据以列表接口给出的精确数值优先
+        model_info.update({key: value for key, value in card.items() if key != "model_stats"})
+        if card.get("model_stats"):
+            model_info["model_stats"] = {**model_info.get("model_stats", {}), **card["model_stats"]}
+        model_info["subscription"] = subscription_name
+        return model_info
+
+    def iter_models(self, subscription):
+        """逐张产出订阅源的模型卡片
+        type 为 api 或 html_pages 时使用免浏览器模式逐页获取，失败或为空时回退到 Selenium；
+        回退时已产出的卡片会再次出现，由调用方去重
+        """
+        subscription_name = subscription.get("name")
+        subscription_url = subscription.get("url")
+        listing_type = subscription.get("type", "html")
+
+        if listing_type in LISTING_TYPES:
+            listed = 0
+            try:
+                for card in self.listing.iter_models(subscription_url, listing_type):
+                    listed += 1
+                    yield card
+                if listed:
+                    return
+                self.logger.warning(f"No models listed for {subscription_name} via {listing_type}, falling back to browser")
+            except Exception as e:
+                self.logger.error(f"Error listing {subscription_name} via {listing_type}, falling back to browser: {str(e)}")
+
+        yield from self.list_models_with_browser(subscription_name, subscription_url)
+
+    def list_models_with_browser(self, subscription_name, subscription_url):
+        """通过 Selenium 展开组织页面并提取模型卡片"""
+        # 浏览器相关依赖只在需要回退到 Selenium 时导入
+        from selenium.webdriver.common.by import By
+
+        cards = []
+        # WebElement 只在借出的浏览器上有效，需在归还前读取完毕
+        with self.driver_pool.acquire() as pooled:
+            for article in self.expand_models(subscription_name, subscription_url, pooled):
+                try:
+                    # 获取标题和链接
+                    title_element = article.find_element(By.CSS_SELECTOR, "h4.text-md.truncate.font-mono")
+                    title = title_element.text.strip()
+                    link = article.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
+                    cards.append({"title": title, "link": link})
+                except Exception as e:
+                    self.logger.error(f"Error processing model article in {subscription_name}: {str(e)}")
+                    continue
+        return cards
+
+    @metrics.timed("expand_models")
+    def expand_models(self, subscription_name, subscription_url, pooled):
         """
         Find expand button, click it to load more models, then process all model articles.
+        pooled is a PooledDriver borrowed from self.driver_pool.
         """
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+
+        # 组织页面只由浏览器加载一次，models div 的存在性检查和展开共用这次加载
+        with metrics.timer("selenium_page_load"):
+            pooled.driver.get(subscription_url)
         try:
-            # 使用 Selenium 打开页面
-            self.driver.get(subscription_url)
-            
-            # 等待页面加载完成，使用更精确的选择器
-            models_div = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div#models"))
-            )
-            
-            # 使用更精确的选择器查找展开按钮
-            expand_button = self.wait.until(
-                EC.element_to_be_clickable((
-                    By.CSS_SELECTOR, 
-                    "div#models button.mx-2.flex.h-8.flex-none.items-center.rounded-lg.px-2\\.5.font-medium.text-gray-800"
-                ))
-            )
+            with metrics.timer("selenium_wait"):
+                models_div = pooled.wait.until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "div#models"))
+                )
+        except TimeoutException:
+            raise ValueError(f"Could not find div with id='models' for {subscription_name}")
+
+        try:
+            with metrics.timer("selenium_wait"):
+                # 使用更精确的选择器查找展开按钮
+                expand_button = pooled.wait.until(
+                    EC.element_to_be_clickable((
+                        By.CSS_SELECTOR, 
+                        "div#models button.mx-2.flex.h-8.flex-none.items-center.rounded-lg.px-2\\.5.font-medium.text-gray-800"
+                    ))
+                )
             
             # 点击按钮前等待一下
-            sleep(2)
+            with metrics.timer("fixed_sleep"):
+                sleep(2)
             
             # 点击按钮
             expand_button.click()
             
             # 等待更长时间让新内容加载
-            sleep(5)
+            with metrics.timer("fixed_sleep"):
+                sleep(5)
             
             # 等待新内容加载，确保在 models_div 内
-            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div#models article.group\\/repo")))
+            with metrics.timer("selenium_wait"):
+                pooled.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div#models article.group\\/repo")))
             
             # 只在 models_div 内获取所有模型文章
             model_articles = models_div.find_elements(By.CSS_SELECTOR, "article.group\\/repo")
@@ -183,131 +334,139 @@ class HuggingFaceModelFetcher:
             return model_articles
                 
         except Exception as e:
+            metrics.inc("errors_total", stage="expand_models")
             self.logger.error(f"Error in expand_models: {str(e)}")
             self.logger.error(traceback.format_exc())
             return []
 
-    def load_existing_models(self):
-        """加载本地存储的模型数据"""
+    def import_legacy_models(self, json_path="data/models.json"):
+        """模型存储为空时，从旧版 JSON 文件导入已有模型数据"""
         try:
-            if os.path.exists("data/models.json"):
-                with open("data/models.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # 返回按订阅源组织的模型数据
-                    return data.get("subscriptions", {})
-            return {}
+            if self.model_store.is_empty() and os.path.exists(json_path):
+                count = self.model_store.import_json(json_path, self.config.get("subscriptions", []))
+                self.logger.info(f"Imported {count} models from {json_path}")
         except Exception as e:
-            self.logger.error(f"Error loading existing models: {str(e)}")
-            return {}
+            self.logger.error(f"Error importing existing models: {str(e)}")
 
-    def fetch(self, fetch_introduction=False):
+    @metrics.timed("fetch")
+    def fetch(self, fetch_introduction=None, subscriptions=None, resume=False, on_event=None, on_models=None):
         """获取所有订阅源的模型列表
         Args:
-            fetch_introduction: 是否获取Introduction部分，默认为False
+            fetch_introduction: 是否获取Introduction部分，默认为配置中的 fetcher.fetch_introduction
+            subscriptions: 要处理的订阅源列表，默认为配置中的全部订阅源
+            resume: 是否继续上一次被中断的运行，跳过运行日志中已完成的订阅源和模型
+            on_event: 变化事件（附带模型）写入存储后立即调用的回调
+            on_models: 每批模型写入存储后以 (订阅源名称, 模型列表) 调用的回调（如写入报告）
         """
-        max_retries = 3
-        retry_delay = 5  # seconds
+        if subscriptions is None:
+            subscriptions = self.config.get("subscriptions", [])
+        
+        all_models = {}
+        failed = False
+        
+        # 每个完成的模型和订阅源都写入运行日志，进程中途退出后可以恢复
+        if self.journal.start(resume=resume):
+            self.logger.info(
+                f"Resuming interrupted run {self.journal.run_id}: "
+                f"{len(self.journal.done_subscriptions)} subscriptions and "
+                f"{sum(len(models) for models in self.journal.done_models.values())} models already completed"
+            )
+        run_ts = self.journal.run_ts
+        self.run_journal = self.journal
         
         try:
-            all_models = {}
-            
-            # 遍历所有订阅源
-            for subscription in self.config.get("subscriptions", []):
-                subscription_name = subscription.get("name")
-                subscription_url = subscription.get("url")
-                
-                if not subscription_name or not subscription_url:
+            pending = []
+            for subscription in subscriptions:
+                name = subscription.get("name")
+                if not self.is_valid_subscription(subscription):
                     self.logger.error(f"Invalid subscription configuration: {subscription}")
-                    continue
-                
-                self.logger.info(f"Processing subscription: {subscription_name}")
-                
-                # 获取该订阅源的现有模型
-                existing_subscription_models = self.existing_models.get(subscription_name, {})
-                
-                try:
-                    for attempt in range(max_retries):
-                        try:
-                            response = requests.get(subscription_url, headers=self.headers)
-                            response.raise_for_status()
-                            soup = BeautifulSoup(response.text, 'html.parser')
-                            
-                            # 首先找到 id 为 "models" 的 div
-                            models_div = soup.find("div", id="models")
-                            if not models_div:
-                                self.logger.error(f"Could not find div with id='models' for {subscription_name}")
-                                continue
-                            
-                            # 处理所有模型
-                            model_articles = self.expand_models(models_div, subscription_url)
-                            subscription_models = []
-                            new_models = []
-                            
-                            for article in model_articles:
-                                try:
-                                    # 获取标题和链接
-                                    title_element = article.find_element(By.CSS_SELECTOR, "h4.text-md.truncate.font-mono")
-                                    title = title_element.text.strip()
-                                    link = article.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
-                                    
-                                    # 检查是否是新增模型
-                                    if title not in existing_subscription_models:
-                                        self.logger.info(f"Found new model in {subscription_name}: {title}")
-                                        # 获取模型所有信息
-                                        model_info = self.fetch_model_info(link, fetch_introduction)
-                                        model_info["title"] = title
-                                        model_info["link"] = link
-                                        model_info["subscription"] = subscription_name
-                                        
-                                        # 添加较长的延迟以避免请求过快
-                                        sleep(3)  # 增加到3秒
-                                        
-                                        new_models.append(model_info)
-                                    else:
-                                        # 使用本地存储的模型数据
-                                        subscription_models.append(existing_subscription_models[title])
-                                    
-                                except Exception as e:
-                                    self.logger.error(f"Error processing model article in {subscription_name}: {str(e)}")
-                                    continue
-                            
-                            # 合并新旧模型数据
-                            subscription_models.extend(new_models)
-                            
-                            # 更新该订阅源的模型数据
-                            all_models[subscription_name] = {
-                                model["title"]: model for model in subscription_models
-                            }
-                            
-                            # 打印新增模型数量
-                            if new_models:
-                                self.logger.info(f"Found {len(new_models)} new models in {subscription_name}")
-                            else:
-                                self.logger.info(f"No new models found in {subscription_name}")
-                            
-                            break  # 成功获取数据，跳出重试循环
-                            
-                        except Exception as e:
-                            self.logger.error(f"Error fetching data for {subscription_name} (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                            if attempt < max_retries - 1:
-                                sleep(retry_delay)
-                            else:
-                                self.logger.error(f"Max retries reached for {subscription_name}. Giving up.")
-                
-                except Exception as e:
-                    self.logger.error(f"Error processing subscription {subscription_name}: {str(e)}")
-                    continue
-            
-            # 更新本地存储的模型数据
-            with open("data/models.json", "w", encoding="utf-8") as f:
-                json.dump({"subscriptions": all_models}, f, indent=2, ensure_ascii=False)
+                    failed = True
+                elif self.journal.is_subscription_done(name):
+                    self.logger.info(f"Skipping {name}, already completed in this run")
+                    all_models[name] = self.model_store.get_subscription_models(name)
+                else:
+                    pending.append(subscription)
             
-            return {"subscriptions": all_models}
+            # 所有订阅源在同一条流水线中处理，多个订阅源的列表同时获取，详情线程由所有订阅源共用
+            results = self.run_pipeline(pending, fetch_introduction, run_ts, on_event, on_models)
+            for subscription in pending:
+                name = subscription["name"]
+                if results.get(name):
+                    all_models[name] = self.model_store.get_subscription_models(name)
+                else:
+                    failed = True
             
+            # 有订阅源失败时保留日志，下次可以用 resume 只重试失败的部分
+            if failed:
+                self.journal.close()
+            else:
+                self.journal.finish()
         finally:
-            # 在所有操作完成后关闭浏览器
-            try:
-                self.driver.quit()
-            except Exception as e:
-                self.logger.error(f"Error closing browser: {str(e)}")
-        
\ No newline at end of file
+            self.run_journal = None
+            self.journal.close()
+        
+        self.http_cache.save()
+        self.http_cache.log_stats(self.logger)
+        
+        return {"subscriptions": all_models}
+
+    def run_pipeline(self, subscriptions, fetch_introduction=None, run_ts=None, on_event=None, on_models=None):
+        """用流式流水线处理一组订阅源，返回 {name: 是否完整处理}"""
+        if not subscriptions:
+            return {}
+        if fetch_introduction is None:
+            fetch_introduction = self.fetch_introduction
+        pipeline = FetchPipeline(
+            self,
+            fetch_introduction=fetch_introduction,
+            run_ts=run_ts,
+            journal=self.run_journal,
+            on_event=on_event,
+            queue_size=self.pipeline_queue_size,
+            sink_batch_size=self.pipeline_batch_size,
+            list_workers=self.subscription_workers,
+            on_models=on_models,
+        )
+        return pipeline.run(subscriptions)
+
+    def is_valid_subscription(self, subscription):
+        """订阅源需要 name 和 url，detail_source（如有）必须是支持的来源"""
+        return bool(subscription.get("name") and subscription.get("url")
+                    and subscription.get("detail_source", self.detail_source) in DETAIL_SOURCES)
+
+    def merge_card(self, model, card):
+        """把最新的列表卡片字段合并到已存储的模型上，统计数据以卡片为准"""
+        model.update({key: value for key, value in card.items() if key != "model_stats"})
+        if card.get("model_stats"):
+            model["model_stats"] = {**model.get("model_stats", {}), **card["model_stats"]}
+        return model
+
+    @metrics.timed("fetch_subscription")
+    def fetch_subscription(self, subscription, fetch_introduction=None, run_ts=None, on_event=None,
+                           on_models=None):
+        """获取单个订阅源的模型列表并写入模型存储
+        Args:
+            subscription: 订阅源配置（name、url、type）
+            fetch_introduction: 是否获取Introduction部分，默认为配置中的 fetcher.fetch_introduction
+            run_ts: 本次运行的时间戳，用于统计历史样本
+            on_event: 变化事件（附带模型）写入存储后立即调用的回调
+            on_models: 每批模型写入存储后以 (订阅源名称, 模型列表) 调用的回调
+        Returns:
+            dict: {title: model}，重试全部失败或配置无效时返回 None
+        """
+        subscription_name = subscription.get("name")
+        if not self.is_valid_subscription(subscription):
+            self.logger.error(f"Invalid subscription configuration: {subscription}")
+            return None
+        
+        results = self.run_pipeline([subscription], fetch_introduction, run_ts, on_event, on_models)
+        if not results.get(subscription_name):
+            return None
+        return self.model_store.get_subscription_models(subscription_name)
+
+    def close(self):
+        """关闭浏览器池，进程退出前调用；定时任务在多次运行间应保持池存活"""
+        self.driver_pool.shutdown()
+        self.model_store.close()
+        self.stats_history.close()
+        self.search_index.close()
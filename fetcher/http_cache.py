@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，不加跨进程文件锁
+    fcntl = None
+
+from metrics import metrics
+
+
+class CachedResponse:
+    """HTTP 缓存层返回的响应对象，接口与 requests.Response 的常用部分保持一致"""
+
+    def __init__(self, url, status_code, content, headers=None, encoding=None, not_modified=False,
+                 truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = encoding or "utf-8"
+        # 为 True 表示服务器返回 304，内容来自本地缓存
+        self.not_modified = not_modified
+        # 为 True 表示只读取了响应体的前一部分（get_prefix）
+        self.truncated = truncated
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class HTTPCache:
+    """基于 ETag/Last-Modified 的磁盘 HTTP 条件请求缓存
+
+    缓存条目按最近访问顺序维护，超过 max_bytes 时按 LRU 淘汰，
+    超过 max_age_seconds 的条目不再用于条件请求。
+    """
+
+    INDEX_FILE = "index.json"
+    # 304 时需要还原给调用方的响应头（如分页用的 Link）
+    KEPT_HEADERS = ("Content-Type", "Link")
+
+    def __init__(self, session, directory="data/http_cache", max_bytes=200 * 1024 * 1024,
+                 max_age_seconds=7 * 24 * 3600, enabled=True):
+        self.session = session
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        # 同一进程内的 save 依次执行
+        self.save_lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "evictions": 0}
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self.load_index()
+
+    def load_index(self):
+        """加载缓存索引文件"""
+        self._merge_index(self._read_index())
+
+    def _read_index(self):
+        index_path = os.path.join(self.directory, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return {}
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _merge_index(self, entries):
+        """并入磁盘索引中的条目：本地没有或比本地更新（stored_at 更晚）且响应体文件仍存在的条目"""
+        with self.lock:
+            merged = False
+            for entry in entries.values():
+                current = self.entries.get(entry["url"])
+                if current is not None and current["stored_at"] >= entry.get("stored_at", 0):
+                    continue
+                if not os.path.exists(self._body_path(entry["url"])):
+                    continue
+                self._remove_entry_only(entry["url"])
+                self.entries[entry["url"]] = entry
+                self.total_bytes += entry.get("size", 0)
+                merged = True
+            if merged:
+                by_access = sorted(self.entries.items(), key=lambda item: item[1].get("accessed_at", 0))
+                self.entries = OrderedDict(by_access)
+                self._evict()
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的索引锁，共用缓存目录的进程依次读取、合并和写回索引"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, self.INDEX_FILE + ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @metrics.timed("http_cache_save")
+    def save(self):
+        """原子地写回缓存索引
+        共用缓存目录的其他进程（如工作队列模式下的多个 worker）可能已经写入了自己的条目，
+        在文件锁内先合并磁盘上的索引再写回，不会覆盖它们的条目。
+        """
+        if not self.enabled:
+            return
+        with self.save_lock, self._file_lock():
+            self._merge_index(self._read_index())
+            with self.lock:
+                payload = json.dumps(self.entries, ensure_ascii=False)
+            self._write_atomic(os.path.join(self.directory, self.INDEX_FILE), payload.encode("utf-8"))
+
+    def _write_atomic(self, path, content):
+        """先写同目录下的唯一临时文件，再原子替换，并发的读取方和写入方不会互相干扰"""
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _body_path(self, url):
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.body")
+
+    def _lookup(self, url):
+        """返回未过期的缓存条目，并更新其 LRU 位置"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            if time.time() - entry["stored_at"] > self.max_age_seconds:
+                self._remove(url)
+                return None
+            entry["accessed_at"] = time.time()
+            self.entries.move_to_end(url)
+            return entry
+
+    def _remove(self, url):
+        entry = self.entries.pop(url, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.get("size", 0)
+        try:
+            os.remove(self._body_path(url))
+        except OSError:
+            pass
+
+    def _store(self, url, response, content=None, prefix_limit=None):
+        """缓存响应体；prefix_limit 不为 None 时 content 只是响应体的前缀，只能用于相同或更小上限的 get_prefix"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+        content = response.content if content is None else content
+        size = len(content)
+        if size > self.max_bytes:
+            return
+        self._write_atomic(self._body_path(url), content)
+        now = time.time()
+        with self.lock:
+            self._remove_entry_only(url)
+            self.entries[url] = {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "encoding": response.encoding,
+                "headers": {
+                    name: response.headers[name]
+                    for name in self.KEPT_HEADERS if name in response.headers
+                },
+                "size": size,
+                "stored_at": now,
+                "accessed_at": now,
+                "parsed": {},
+            }
+            if prefix_limit is not None:
+                self.entries[url]["prefix_limit"] = prefix_limit
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            oldest_url = next(iter(self.entries))
+            self._remove(oldest_url)
+            self.stats["evictions"] += 1
+
+    def _remove_entry_only(self, url):
+        entry = self.entries.pop(url, None)
+        if entry is not None:
+            self.total_bytes -= entry.get("size", 0)
+
+    def _send(self, url, **kwargs):
+        with metrics.timer("http_request"):
+            response = self.session.get(url, **kwargs)
+        metrics.inc("http_requests_total", status=response.status_code)
+        metrics.inc("http_response_bytes_total", len(response.content))
+        return response
+
+    def get(self, url, **kwargs):
+        """发起（条件）GET 请求
+        Returns:
+            CachedResponse: 304 时 not_modified 为 True，内容取自本地缓存
+        """
+        if not self.enabled:
+            response = self._send(url, **kwargs)
+            return CachedResponse(url, response.status_code, response.content,
+                                  response.headers, response.encoding)
+
+        entry = self._lookup(url)
+        if entry and "prefix_limit" in entry:
+            # 只缓存了前缀的条目不能当作完整响应使用
+            entry = None
+        request_headers = kwargs.pop("headers", None)
+        headers = self._conditional_headers(entry, request_headers)
+
+        response = self._send(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            cached = self._cached_response(url, entry)
+            if cached is None:
+                # 缓存文件丢失，去掉条件头重新请求
+                return self.get(url, headers=request_headers, **kwargs)
+            return cached
+
+        with self.lock:
+            self.stats["misses"] += 1
+        if response.status_code == 200:
+            self._store(url, response)
+        return CachedResponse(url, response.status_code, response.content,
+                              response.headers, response.encoding)
+
+    def get_prefix(self, url, max_bytes=None, until=None, chunk_size=16384, **kwargs):
+        """流式读取响应体的前 max_bytes 字节，条件请求和缓存与 get 相同
+        带 Range 头请求前缀，服务器忽略 Range 时读够 max_bytes 即断开；
+        until 对每块成功响应的内容调用，返回 True 时提前停止读取。
+        Returns:
+            CachedResponse: truncated 为 True 表示没有读完整个响应体
+        """
+        entry = self._lookup(url) if self.enabled else None
+        if entry and entry.get("prefix_limit") is not None and max_bytes is not None \
+                and entry["prefix_limit"] < max_bytes:
+            # 缓存的前缀比这次允许读取的短
+            entry = None
+        request_headers = kwargs.pop("headers", None)
+        headers = self._conditional_headers(entry, request_headers)
+        if max_bytes is not None:
+            headers["Range"] = f"bytes=0-{max_bytes - 1}"
+
+        with metrics.timer("http_request"):
+            response = self.session.get(url, headers=headers, stream=True, **kwargs)
+            try:
+                chunks, size, stopped = [], 0, False
+                if response.status_code in (200, 206):
+                    for chunk in response.iter_content(chunk_size):
+                        capped = max_bytes is not None and size + len(chunk) >= max_bytes
+                        if capped:
+                            chunk = chunk[:max_bytes - size]
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        # 达到上限的最后一块也要交给 until，否则其中的内容不会被解析
+                        done = until is not None and until(chunk)
+                        if capped or done:
+                            stopped = True
+                            break
+                else:
+                    chunks.append(response.content)
+                    size = len(chunks[0])
+            finally:
+                response.close()
+        content = b"".join(chunks)
+        metrics.inc("http_requests_total", status=response.status_code)
+        metrics.inc("http_response_bytes_total", size)
+
+        if response.status_code == 304 and entry:
+            cached = self._cached_response(url, entry)
+            if cached is None:
+                return self.get_prefix(url, max_bytes, until, chunk_size, headers=request_headers, **kwargs)
+            cached.truncated = "prefix_limit" in entry
+            return cached
+
+        # 206 时由 Content-Range 的总长度判断是否还有未读部分
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        truncated = stopped or (response.status_code == 206 and total.isdigit() and int(total) > size)
+        if self.enabled:
+            with self.lock:
+                self.stats["misses"] += 1
+            if response.status_code in (200, 206):
+                self._store(url, response, content, prefix_limit=max_bytes if truncated else None)
+        status = 200 if response.status_code == 206 else response.status_code
+        return CachedResponse(url, status, content, response.headers, response.encoding, truncated=truncated)
+
+    def _conditional_headers(self, entry, request_headers):
+        headers = dict(request_headers or {})
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _cached_response(self, url, entry):
+        """304 时用缓存的响应体构造响应，缓存文件丢失时移除条目并返回 None"""
+        try:
+            with open(self._body_path(url), "rb") as f:
+                content = f.read()
+        except OSError:
+            with self.lock:
+                self._remove(url)
+            return None
+        with self.lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += len(content)
+        return CachedResponse(url, 200, content, dict(entry.get("headers", {})),
+                              entry.get("encoding"), not_modified=True)
+
+    def get_parsed(self, url, key):
+        """获取之前为该 URL 缓存的解析结果，用于 304 时跳过解析"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            return entry.get("parsed", {}).get(key)
+
+    def store_parsed(self, url, key, value):
+        """为已缓存的 URL 记录解析结果（需可 JSON 序列化）"""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                entry.setdefault("parsed", {})[key] = value
+
+    def log_stats(self, logger):
+        """在日志中输出本次运行的缓存命中统计"""
+        if not self.enabled:
+            return
+        logger.info(
+            f"HTTP cache: {self.stats['hits']} hits, {self.stats['misses']} misses, "
+            f"{self.stats['bytes_saved']} bytes saved, {self.stats['evictions']} evictions, "
+            f"{len(self.entries)} entries ({self.total_bytes} bytes)"
+        )
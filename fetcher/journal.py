@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+RUN_STARTED = "run_started"
+MODEL_DONE = "model_done"
+SUBSCRIPTION_DONE = "subscription_done"
+RUN_DONE = "run_done"
+
+
+class RunJournal:
+    """抓取运行的预写日志（NDJSON，逐条追加并 fsync）
+
+    记录每个已完成的模型详情和订阅源；进程中途退出后，以 resume 方式启动的下一次运行
+    会沿用同一个 run_id，跳过已完成的订阅源，并直接使用日志中已抓取的模型详情。
+    运行正常结束后日志被删除。最后一行写到一半时会被忽略。
+    """
+
+    def __init__(self, path="data/fetch_journal.ndjson", fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.file = None
+        self.run_id = None
+        self.run_ts = None
+        self.done_subscriptions = set()
+        self.done_models = {}
+
+    def load(self):
+        """读取未完成运行的记录
+        Returns:
+            bool: 是否存在可恢复的运行
+        """
+        self.run_id = None
+        self.done_subscriptions = set()
+        self.done_models = {}
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时写到一半的最后一行
+                    continue
+                kind = record.get("type")
+                if kind == RUN_STARTED:
+                    self.run_id = record["run_id"]
+                    self.run_ts = record.get("run_ts")
+                    self.done_subscriptions = set()
+                    self.done_models = {}
+                elif record.get("run_id") != self.run_id:
+                    continue
+                elif kind == MODEL_DONE:
+                    self.done_models.setdefault(record["subscription"], {})[record["title"]] = record["model"]
+                elif kind == SUBSCRIPTION_DONE:
+                    self.done_subscriptions.add(record["subscription"])
+                    self.done_models.pop(record["subscription"], None)
+                elif kind == RUN_DONE:
+                    self.run_id = None
+        return self.run_id is not None
+
+    def start(self, resume=False, run_ts=None):
+        """开始一次运行；resume 为 True 且存在未完成的运行时继续该运行
+        Returns:
+            bool: 是否为恢复的运行
+        """
+        resumed = resume and self.load()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resumed:
+            self.file = open(self.path, "a+", encoding="utf-8")
+            # 补上被截断的最后一行的换行，避免新记录与之连在一起
+            if self.file.tell() > 0:
+                self.file.seek(self.file.tell() - 1)
+                if self.file.read(1) != "\n":
+                    self.file.write("\n")
+            return True
+        self.done_subscriptions = set()
+        self.done_models = {}
+        self.run_id = uuid.uuid4().hex
+        self.run_ts = run_ts if run_ts is not None else int(time.time())
+        self.file = open(self.path, "w", encoding="utf-8")
+        self._append({"type": RUN_STARTED, "run_ts": self.run_ts, "started_at": time.time()})
+        return False
+
+    def _append(self, *records):
+        """追加若干条记录，一次写入并 fsync"""
+        lines = []
+        for record in records:
+            record["run_id"] = self.run_id
+            lines.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        with self.lock:
+            self.file.write("".join(lines))
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+
+    def is_subscription_done(self, subscription):
+        return subscription in self.done_subscriptions
+
+    def completed_models(self, subscription):
+        """返回某订阅源在本次运行中已完成的模型详情 {title: model}"""
+        return self.done_models.get(subscription, {})
+
+    def models_done(self, subscription, models):
+        """记录一批已写入存储的模型，整批只 fsync 一次"""
+        if not models:
+            return
+        with self.lock:
+            done = self.done_models.setdefault(subscription, {})
+            for model in models:
+                done[model["title"]] = model
+        self._append(*({"type": MODEL_DONE, "subscription": subscription, "title": model["title"], "model": model}
+                       for model in models))
+
+    def subscription_done(self, subscription):
+        self.done_subscriptions.add(subscription)
+        self.done_models.pop(subscription, None)
+        self._append({"type": SUBSCRIPTION_DONE, "subscription": subscription})
+
+    def finish(self):
+        """运行正常结束，删除日志"""
+        self._append({"type": RUN_DONE})
+        self.close()
+        os.remove(self.path)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,113 @@
+import json
+from urllib.parse import urlencode, urljoin, urlparse
+
+from requests.utils import parse_header_links
+
+from fetcher.parser import ModelPageParser
+
+# 订阅源 type 字段对应的免浏览器列表模式
+LISTING_TYPES = ("api", "html_pages")
+
+
+def split_org_url(subscription_url):
+    """将订阅 URL 拆分为站点根地址和组织名
+    例如 https://huggingface.co/deepseek-ai -> ("https://huggingface.co", "deepseek-ai")
+    """
+    parsed = urlparse(subscription_url)
+    base_url = f"{parsed.scheme}://{parsed.netloc}"
+    org = parsed.path.strip("/").split("/")[0]
+    return base_url, org
+
+
+class ModelListing:
+    """不依赖浏览器的组织模型列表获取器
+
+    - api: 通过 /api/models?author=<org> JSON 接口获取，按 Link 头分页
+    - html_pages: 通过 /models?author=<org>&p=<n> 分页 HTML 获取
+    """
+
+    def __init__(self, http_cache, logger, headers=None, page_size=100, max_pages=50, page_parser=None):
+        self.http_cache = http_cache
+        self.logger = logger
+        self.headers = headers or {}
+        # html_pages 模式的页面解析后端，与模型页面相同
+        self.page_parser = page_parser or ModelPageParser()
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+    def iter_models(self, subscription_url, listing_type):
+        """逐页获取并逐张产出模型卡片（title、link 以及可用的 time），下一页在上一页的卡片被消费后才请求"""
+        if listing_type == "api":
+            return self.iter_models_from_api(subscription_url)
+        if listing_type == "html_pages":
+            return self.iter_models_from_html(subscription_url)
+        raise ValueError(f"Unsupported listing type: {listing_type}")
+
+    def iter_models_from_api(self, subscription_url):
+        base_url, org = split_org_url(subscription_url)
+        query = urlencode({"author": org, "limit": self.page_size, "sort": "lastModified", "direction": -1})
+        url = f"{base_url}/api/models?{query}"
+        seen = set()
+
+        for _ in range(self.max_pages):
+            response = self.http_cache.get(url, headers=self.headers, timeout=10)
+            response.raise_for_status()
+            for item in json.loads(response.text):
+                model_id = item.get("id") or item.get("modelId")
+                if not model_id or model_id in seen:
+                    continue
+                seen.add(model_id)
+                card = {"title": model_id, "link": f"{base_url}/{model_id}"}
+                if item.get("_id"):
+                    # 仓库的内部 ID 在改名后保持不变，用于识别改名
+                    card["model_id"] = item["_id"]
+                modified = item.get("lastModified") or item.get("createdAt")
+                if modified:
+                    card["time"] = modified
+                if item.get("tags"):
+                    card["tags"] = item["tags"]
+                stats = {key: item[key] for key in ("likes", "downloads") if item.get(key) is not None}
+                if stats:
+                    card["model_stats"] = stats
+                yield card
+
+            url = self._next_link(response, base_url)
+            if not url:
+                break
+
+        self.logger.info(f"Listed {len(seen)} models for {org} via API")
+
+    def _next_link(self, response, base_url):
+        link_header = response.headers.get("Link")
+        if not link_header:
+            return None
+        for link in parse_header_links(link_header):
+            if link.get("rel") == "next":
+                return urljoin(base_url, link["url"])
+        return None
+
+    def iter_models_from_html(self, subscription_url):
+        base_url, org = split_org_url(subscription_url)
+        seen = set()
+
+        for page in range(self.max_pages):
+            url = f"{base_url}/models?{urlencode({'author': org, 'p': page})}"
+            response = self.http_cache.get(url, headers=self.headers, timeout=10)
+            response.raise_for_status()
+
+            page_cards = 0
+            for parsed in self.page_parser.parse_model_cards(response.text):
+                title = parsed["title"]
+                if title in seen:
+                    continue
+                seen.add(title)
+                card = {"title": title, "link": urljoin(base_url, parsed["href"])}
+                if parsed["time"]:
+                    card["time"] = parsed["time"]
+                page_cards += 1
+                yield card
+
+            if not page_cards:
+                break
+
+        self.logger.info(f"Listed {len(seen)} models for {org} via paginated HTML")
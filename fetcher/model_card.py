@@ -0,0 +1,220 @@
+import codecs
+import json
+import re
+import threading
+import time
+from urllib.parse import quote, urlencode, urlparse
+
+import requests
+
+from fetcher.parser import INTRO_END_TEXT, INTRO_HEADING_TEXT, NOT_FOUND
+
+# 模型详情来源：page 为渲染后的模型页面，raw 为仓库元数据 JSON 和原始 README
+DETAIL_SOURCES = ("page", "raw")
+
+# 组织关注者数在各模型间共享，缓存一段时间，不必为每个模型都请求
+FOLLOWERS_TTL_SECONDS = 300
+
+_FENCE = re.compile(r"^\s{0,3}(```|~~~)")
+_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+# 不会渲染为段落的块：列表、表格、引用、HTML 块、分隔线
+_NON_PARAGRAPH = re.compile(r"^\s{0,3}([-*+]\s|\d+[.)]\s|\||>|<|([-*_]\s*){3,}$)")
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_INLINE_HTML = re.compile(r"<[^>]+>")
+_EMPHASIS = re.compile(r"(\*\*|__|`)")
+
+
+def markdown_text(line):
+    """把一行 Markdown 转为纯文本：去掉图片、链接地址、内联 HTML 和强调标记"""
+    line = _IMAGE.sub("", line)
+    line = _LINK.sub(r"\1", line)
+    line = _INLINE_HTML.sub("", line)
+    return _EMPHASIS.sub("", line).strip()
+
+
+class ReadmeIntroductionParser:
+    """增量解析原始 README，提取 Introduction 段落
+
+    规则与页面解析一致：第一个二级标题包含 Introduction 时，收集其后的段落，
+    直到包含 Model Summary 的二级标题；列表、表格、代码块等不计入。
+    按块喂入字节，Introduction 结束后 feed 返回 True，调用方可以停止读取。
+    """
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.buffer = ""
+        self.line_number = 0
+        self.front_matter = False
+        self.fence = None
+        # seek: 寻找第一个二级标题; collect: 收集段落; done: 结束
+        self.state = "seek"
+        self.paragraph = []
+        self.paragraphs = []
+
+    def feed(self, data):
+        """喂入一块 README 内容，返回是否已经得到完整的 Introduction"""
+        if self.state == "done":
+            return True
+        self.buffer += self.decoder.decode(data) if isinstance(data, bytes) else data
+        *lines, self.buffer = self.buffer.split("\n")
+        for line in lines:
+            self._line(line.rstrip("\r"))
+            if self.state == "done":
+                return True
+        return False
+
+    def finish(self):
+        """输入结束（读完或达到字节上限），返回 Introduction 文本，未找到时返回 NOT_FOUND"""
+        if self.state != "done":
+            # 解码器中剩下的只可能是在字节上限处被截断的多字节字符，直接丢弃
+            if self.buffer:
+                self._line(self.buffer)
+            self.buffer = ""
+            self._end_paragraph()
+        return "\n".join(self.paragraphs) if self.paragraphs else NOT_FOUND
+
+    def _line(self, line):
+        self.line_number += 1
+        # 开头的 YAML front matter
+        if self.line_number == 1 and line.strip() == "---":
+            self.front_matter = True
+            return
+        if self.front_matter:
+            if line.strip() in ("---", "..."):
+                self.front_matter = False
+            return
+
+        fence = _FENCE.match(line)
+        if self.fence:
+            if fence and fence.group(1) == self.fence:
+                self.fence = None
+            return
+        if fence:
+            self._end_paragraph()
+            self.fence = fence.group(1)
+            return
+
+        heading = _HEADING.match(line)
+        if heading:
+            self._heading(len(heading.group(1)), markdown_text(heading.group(2)))
+        elif not line.strip() or _NON_PARAGRAPH.match(line) or (line.startswith(("    ", "\t")) and not self.paragraph):
+            self._end_paragraph()
+        elif self.state == "collect":
+            self.paragraph.append(markdown_text(line))
+
+    def _heading(self, level, text):
+        self._end_paragraph()
+        if level != 2:
+            return
+        if self.state == "seek":
+            self.state = "collect" if INTRO_HEADING_TEXT in text else "done"
+        elif self.state == "collect" and INTRO_END_TEXT in text:
+            self.state = "done"
+
+    def _end_paragraph(self):
+        text = " ".join(part for part in self.paragraph if part)
+        if text:
+            self.paragraphs.append(text)
+        self.paragraph = []
+
+
+def parse_repo_metadata(text):
+    """从 /api/models/<id> 的 JSON 中提取统计数据"""
+    data = json.loads(text)
+    return {key: data[key] for key in ("likes", "downloads") if data.get(key) is not None}
+
+
+class RawModelCard:
+    """从仓库元数据 JSON 和原始 README 获取模型详情，不下载渲染后的模型页面
+
+    - 统计数据：列表卡片已带 likes 时直接使用，否则请求 /api/models/<id>（只展开需要的字段）
+    - 关注者数：组织的 /api/organizations/<org>/overview，按组织缓存 FOLLOWERS_TTL_SECONDS 秒
+    - Introduction：流式读取 /<id>/raw/<revision>/README.md，最多 max_readme_bytes 字节，
+      Introduction 结束后立即停止读取
+    """
+
+    def __init__(self, http_cache, logger, headers=None, max_readme_bytes=32768, revision="main"):
+        self.http_cache = http_cache
+        self.logger = logger
+        self.headers = headers or {}
+        self.max_readme_bytes = max_readme_bytes
+        self.revision = revision
+        self.followers = {}
+        self.lock = threading.Lock()
+
+    def fetch(self, model_url, fetch_introduction=False, card_stats=None):
+        """返回与 fetch_model_info 相同结构的模型信息"""
+        base_url, model_id = self.split_model_url(model_url)
+        stats = {}
+        if "likes" not in (card_stats or {}):
+            stats.update(self.fetch_stats(base_url, model_id))
+        followers = self.fetch_followers(base_url, model_id.split("/")[0])
+        if followers is not None:
+            stats["followers"] = followers
+        introduction = self.fetch_introduction(base_url, model_id) if fetch_introduction else "Not fetched"
+        return {"model_stats": stats, "introduction": introduction}
+
+    @staticmethod
+    def split_model_url(model_url):
+        """https://huggingface.co/org/name -> ("https://huggingface.co", "org/name")"""
+        parsed = urlparse(model_url)
+        return f"{parsed.scheme}://{parsed.netloc}", "/".join(parsed.path.strip("/").split("/")[:2])
+
+    def fetch_stats(self, base_url, model_id):
+        query = urlencode([("expand[]", "likes"), ("expand[]", "downloads")])
+        url = f"{base_url}/api/models/{quote(model_id)}?{query}"
+        response = self.http_cache.get(url, headers=self.headers, timeout=10)
+        response.raise_for_status()
+        if response.not_modified:
+            cached = self.http_cache.get_parsed(url, "stats")
+            if cached is not None:
+                return cached
+        stats = parse_repo_metadata(response.text)
+        self.http_cache.store_parsed(url, "stats", stats)
+        return stats
+
+    def fetch_followers(self, base_url, org):
+        """组织关注者数，获取失败时返回 None（不影响其余详情）；并发的详情线程只会请求一次"""
+        key = (base_url, org)
+        with self.lock:
+            cached = self.followers.get(key)
+            if cached is not None and time.monotonic() - cached[1] < FOLLOWERS_TTL_SECONDS:
+                return cached[0]
+            followers = None
+            try:
+                for kind in ("organizations", "users"):
+                    response = self.http_cache.get(f"{base_url}/api/{kind}/{quote(org)}/overview",
+                                                   headers=self.headers, timeout=10)
+                    if response.status_code == 404:
+                        continue
+                    response.raise_for_status()
+                    followers = json.loads(response.text).get("numFollowers")
+                    break
+            except (requests.RequestException, ValueError) as e:
+                self.logger.warning(f"Error fetching follower count for {org}: {e}")
+            self.followers[key] = (followers, time.monotonic())
+            return followers
+
+    def fetch_introduction(self, base_url, model_id):
+        url = f"{base_url}/{model_id}/raw/{self.revision}/README.md"
+        parser = ReadmeIntroductionParser()
+        response = self.http_cache.get_prefix(url, self.max_readme_bytes, until=parser.feed,
+                                              headers=self.headers, timeout=10)
+        if response.status_code == 404:
+            return NOT_FOUND
+        response.raise_for_status()
+        if response.not_modified:
+            cached = self.http_cache.get_parsed(url, "introduction")
+            if cached is not None:
+                return cached
+            parser = ReadmeIntroductionParser()
+            parser.feed(response.content)
+        closed = parser.state == "done"
+        introduction = parser.finish()
+        if response.truncated and not closed:
+            # Introduction 在字节上限内没有结束，结果可能不完整，不缓存，下次仍重新解析
+            self.logger.info(f"README for {model_id} truncated at {len(response.content)} bytes")
+        else:
+            self.http_cache.store_parsed(url, "introduction", introduction)
+        return introduction
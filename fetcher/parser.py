@@ -0,0 +1,302 @@
+from html.parser import HTMLParser
+from importlib.util import find_spec
+
+from metrics import metrics
+
+# lxml 为可选依赖；只检查是否安装，真正使用时才导入
+HAS_LXML = find_spec("lxml") is not None
+
+# 模型页面中需要提取的元素
+STAT_BUTTON_TITLES = {
+    "See users who liked this repository": "likes",
+    "Show DeepSeek's followers": "followers",
+}
+INTRO_HEADING_CLASS = "relative group flex items-center"
+INTRO_HEADING_TEXT = "Introduction"
+INTRO_END_TEXT = "Model Summary"
+NOT_FOUND = "Not found..."
+
+PARSER_BACKENDS = ("html.parser", "lxml", "stream")
+
+# 没有结束标签的 HTML 元素
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+def extract_stats_from_soup(soup):
+    """从 BeautifulSoup 对象中提取点赞数、关注者数"""
+    stats = {}
+    for title, key in STAT_BUTTON_TITLES.items():
+        button = soup.find("button", {"title": title})
+        if button:
+            stats[key] = button.get_text(strip=True)
+    return stats
+
+
+def extract_introduction_from_soup(soup):
+    """从 BeautifulSoup 对象中提取 Introduction 段落，未找到时返回 NOT_FOUND"""
+    intro_section = soup.find("h2", class_=INTRO_HEADING_CLASS)
+    if not (intro_section and INTRO_HEADING_TEXT in intro_section.get_text()):
+        return NOT_FOUND
+
+    intro_content = []
+    current = intro_section.find_next_sibling()
+    while current and not (current.name == "h2" and INTRO_END_TEXT in current.get_text()):
+        if current.name == "p":
+            text = current.get_text(strip=True)
+            if text:  # 只添加非空文本
+                intro_content.append(text)
+        current = current.find_next_sibling()
+    return "\n".join(intro_content) if intro_content else NOT_FOUND
+
+
+def extract_model_cards_from_soup(soup):
+    """从分页模型列表中提取卡片：每个 article 中第一个 h4 的文本、第一个链接和第一个 time 的 datetime
+    Returns:
+        list: [{"title", "href", "time"}]，缺少标题或链接的 article 被跳过，time 可能为 None
+    """
+    cards = []
+    for article in soup.find_all("article"):
+        title_element = article.find("h4")
+        link_element = article.find("a", href=True)
+        if not title_element or not link_element:
+            continue
+        time_element = article.find("time")
+        cards.append({
+            "title": title_element.get_text(strip=True),
+            "href": link_element["href"],
+            "time": time_element.get("datetime") if time_element else None,
+        })
+    return cards
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _Capture:
+    """记录某个元素内的文本"""
+
+    def __init__(self, kind, depth, key=None):
+        self.kind = kind
+        self.depth = depth
+        self.key = key
+        self.chunks = []
+
+
+class ModelPageStreamParser(HTMLParser):
+    """单遍、不建树的模型页面解析器
+
+    只跟踪标签栈深度，在同一次扫描中提取统计按钮文本和 Introduction 段落，
+    所有目标都找到后立即停止解析，不再处理页面其余部分。
+    结果与 extract_stats_from_soup / extract_introduction_from_soup 保持一致。
+    """
+
+    def __init__(self, fetch_introduction=True):
+        super().__init__(convert_charrefs=True)
+        self.fetch_introduction = fetch_introduction
+        self.depth = 0
+        self.stack = []
+        self.captures = []
+        self.stats = {}
+        # seek: 寻找 Introduction 标题; collect: 收集同级段落; done: 结束
+        self.intro_state = "seek" if fetch_introduction else "done"
+        self.intro_found = False
+        self.sibling_depth = None
+        self.intro_content = []
+
+    def parse(self, html):
+        try:
+            self.feed(html)
+            self.close()
+        except _StopParsing:
+            pass
+        introduction = None
+        if self.fetch_introduction:
+            introduction = "\n".join(self.intro_content) if self.intro_content else NOT_FOUND
+        return self.stats, introduction
+
+    def _finished(self):
+        return len(self.stats) == len(STAT_BUTTON_TITLES) and self.intro_state == "done" and not self.captures
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        parent_depth = len(self.stack)
+        self.stack.append(tag)
+
+        if tag == "button":
+            title = dict(attrs).get("title")
+            key = STAT_BUTTON_TITLES.get(title)
+            if key and key not in self.stats and not any(c.key == key for c in self.captures):
+                self.captures.append(_Capture("stat", len(self.stack), key))
+
+        if self.intro_state == "seek":
+            if tag == "h2" and dict(attrs).get("class") == INTRO_HEADING_CLASS:
+                self.sibling_depth = parent_depth
+                self.captures.append(_Capture("intro_heading", len(self.stack)))
+        elif self.intro_state == "collect" and parent_depth == self.sibling_depth:
+            if tag == "h2":
+                self.captures.append(_Capture("end_heading", len(self.stack)))
+            elif tag == "p":
+                self.captures.append(_Capture("paragraph", len(self.stack)))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS or tag not in self.stack:
+            return
+        # 与 html.parser 树构建器一致：弹出到最近的同名标签
+        while self.stack:
+            popped = self.stack.pop()
+            self._close_captures()
+            if popped == tag:
+                break
+
+        if self.intro_state == "collect" and len(self.stack) < self.sibling_depth:
+            # Introduction 所在的父元素已结束
+            self.intro_state = "done"
+        if self._finished():
+            raise _StopParsing()
+
+    def _close_captures(self):
+        depth = len(self.stack)
+        while self.captures and self.captures[-1].depth > depth:
+            self._complete(self.captures.pop())
+
+    def _complete(self, capture):
+        if capture.kind == "stat":
+            self.stats[capture.key] = "".join(chunk.strip() for chunk in capture.chunks)
+        elif capture.kind == "intro_heading":
+            if INTRO_HEADING_TEXT in "".join(capture.chunks):
+                self.intro_state = "collect"
+            else:
+                self.intro_state = "done"
+        elif capture.kind == "end_heading":
+            if INTRO_END_TEXT in "".join(capture.chunks):
+                self.intro_state = "done"
+        elif capture.kind == "paragraph":
+            text = "".join(chunk.strip() for chunk in capture.chunks)
+            if text:
+                self.intro_content.append(text)
+
+    def handle_data(self, data):
+        for capture in self.captures:
+            capture.chunks.append(data)
+
+
+class ModelListStreamParser(HTMLParser):
+    """单遍、不建树的模型列表解析器，结果与 extract_model_cards_from_soup 一致"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.article_depth = None
+        self.card = None
+        self.title_capture = None
+        self.cards = []
+
+    def parse(self, html):
+        self.feed(html)
+        self.close()
+        return self.cards
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        attrs = dict(attrs)
+        if tag == "article" and self.article_depth is None:
+            self.article_depth = len(self.stack)
+            self.card = {}
+        elif self.card is not None:
+            if tag == "h4" and "title" not in self.card:
+                self.card["title"] = None
+                self.title_capture = _Capture("title", len(self.stack))
+            elif tag == "a" and "href" not in self.card and "href" in attrs:
+                # 与 BeautifulSoup 一致：没有值的 href 视为空字符串
+                self.card["href"] = attrs["href"] or ""
+            elif tag == "time" and "time" not in self.card:
+                self.card["time"] = attrs.get("datetime")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS or tag not in self.stack:
+            return
+        while self.stack:
+            popped = self.stack.pop()
+            if self.title_capture is not None and len(self.stack) < self.title_capture.depth:
+                self.card["title"] = "".join(chunk.strip() for chunk in self.title_capture.chunks)
+                self.title_capture = None
+            if self.article_depth is not None and len(self.stack) < self.article_depth:
+                self._end_article()
+            if popped == tag:
+                break
+
+    def close(self):
+        super().close()
+        if self.title_capture is not None:
+            self.card["title"] = "".join(chunk.strip() for chunk in self.title_capture.chunks)
+            self.title_capture = None
+        if self.article_depth is not None:
+            self._end_article()
+
+    def _end_article(self):
+        if "title" in self.card and "href" in self.card:
+            self.cards.append({"title": self.card["title"], "href": self.card["href"], "time": self.card.get("time")})
+        self.article_depth = None
+        self.card = None
+
+    def handle_data(self, data):
+        if self.title_capture is not None:
+            self.title_capture.chunks.append(data)
+
+
+class ModelPageParser:
+    """模型页面和分页模型列表的解析器，后端可通过配置选择
+    - html.parser: BeautifulSoup + 纯 Python 解析器（原有实现）
+    - lxml: BeautifulSoup + lxml（需安装 lxml，缺失时回退到 html.parser）
+    - stream: 单遍流式解析，找到目标后提前结束
+    """
+
+    def __init__(self, backend="html.parser", logger=None):
+        if backend not in PARSER_BACKENDS:
+            raise ValueError(f"Unsupported parser backend: {backend}")
+        if backend == "lxml" and not HAS_LXML:
+            if logger:
+                logger.warning("lxml is not installed, falling back to html.parser")
+            backend = "html.parser"
+        self.backend = backend
+
+    @metrics.timed("parse")
+    def parse(self, html, fetch_introduction=False):
+        """一次解析提取 model_stats 和（可选的）introduction
+        Returns:
+            tuple: (stats, introduction)，未获取 introduction 时为 None
+        """
+        if self.backend == "stream":
+            return ModelPageStreamParser(fetch_introduction).parse(html)
+        from bs4 import BeautifulSoup  # 只有 BeautifulSoup 后端需要，延迟导入
+
+        soup = BeautifulSoup(html, self.backend)
+        stats = extract_stats_from_soup(soup)
+        introduction = extract_introduction_from_soup(soup) if fetch_introduction else None
+        return stats, introduction
+
+    @metrics.timed("parse")
+    def parse_model_cards(self, html):
+        """用同一后端解析分页模型列表，返回 extract_model_cards_from_soup 格式的卡片"""
+        if self.backend == "stream":
+            return ModelListStreamParser().parse(html)
+        from bs4 import BeautifulSoup
+
+        return extract_model_cards_from_soup(BeautifulSoup(html, self.backend))
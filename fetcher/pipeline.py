@@ -0,0 +1,396 @@
+import queue
+import threading
+import time
+
+from fetcher.change_detector import ADDED, FETCH, REFRESH, REMOVED, RENAMED, STATS_CHANGED, UPDATED
+from metrics import metrics
+from storage.search_index import WATCH_MATCHED
+
+# 队列中的消息类型
+_START = "start"
+_CARD = "card"
+_REFRESH = "refresh"
+_MODEL = "model"
+_END = "end"
+_STOP = "stop"
+
+
+class PipelineAborted(Exception):
+    """某个阶段意外出错，其余阶段停止等待"""
+
+
+class SubscriptionRun:
+    """一个订阅源在流水线中的处理状态，由比较阶段创建，写入阶段收尾"""
+
+    def __init__(self, subscription, known, diff, pending_refetch, completed):
+        self.subscription = subscription
+        self.name = subscription["name"]
+        self.known = known
+        self.diff = diff
+        self.pending_refetch = pending_refetch
+        # 恢复运行时运行日志中已完成的模型详情
+        self.completed = completed
+        self.started = time.monotonic()
+        self.listed = set()
+        self.refresh = []
+        # 送往写入阶段的模型数（含沿用日志的），列表结束后才确定
+        self.expected = 0
+        self.received = 0
+        # 本次实际抓取详情的模型数（不含沿用日志的）
+        self.fetched = 0
+        self.ended = False
+        self.failed = False
+        self.errors = {}
+        # 写入阶段产生的关注规则命中事件，与 diff.events 分开保存（后者由比较阶段追加）
+        self.watch_events = []
+
+
+class _Item:
+    """在比较、详情、写入阶段之间传递的单个模型"""
+
+    __slots__ = ("run", "card", "event", "discovered", "model", "reused")
+
+    def __init__(self, run, card, event, model=None, reused=False):
+        self.run = run
+        self.card = card
+        self.event = event
+        self.discovered = time.monotonic()
+        self.model = model
+        self.reused = reused
+
+
+class FetchPipeline:
+    """由有界队列连接的流式抓取流水线
+
+    列表 -> 比较 -> 详情 -> 写入，各阶段在各自的线程中运行：
+    - 列表阶段由 list_workers 个线程各自处理一个订阅源，多个订阅源的列表同时获取；
+      逐页产出卡片，整体失败时按 subscription_attempts 重试，已产出的卡片不重复发送
+    - 比较阶段过滤掉无变化的模型，只把新增、改名、卡片变化和待重新抓取的模型交给详情阶段
+    - 详情阶段由 max_concurrency 个线程并发抓取
+    - 写入阶段是唯一的写入者：小批量写入模型存储、统计历史、倒排索引和运行日志，
+      写入后以这批模型调用 on_models，并对带模型的变化事件和关注规则命中调用 on_event
+    队列满时上游阻塞，内存占用与订阅源的模型数量无关；新模型在被列出后几秒内即可写入和通知，
+    不必等待其他订阅源完成。
+    """
+
+    def __init__(self, fetcher, fetch_introduction=False, run_ts=None, journal=None, on_event=None,
+                 queue_size=100, sink_batch_size=50, list_workers=4, on_models=None):
+        self.fetcher = fetcher
+        self.logger = fetcher.logger
+        self.store = fetcher.model_store
+        self.fetch_introduction = fetch_introduction
+        self.run_ts = run_ts if run_ts is not None else int(time.time())
+        self.journal = journal
+        self.on_event = on_event
+        self.on_models = on_models
+        self.sink_batch_size = max(1, sink_batch_size)
+        self.workers = fetcher.max_concurrency
+        self.list_workers = max(1, list_workers)
+        self.cards = queue.Queue(maxsize=queue_size)
+        self.details = queue.Queue(maxsize=queue_size)
+        self.sink = queue.Queue(maxsize=queue_size)
+        self.aborted = threading.Event()
+        self.error = None
+        self.results = {}
+
+    def run(self, subscriptions):
+        """处理一组订阅源，阻塞到全部完成
+        Returns:
+            dict: {name: bool}，订阅源是否完整处理（列表获取成功）
+        """
+        stages = [threading.Thread(target=self._stage, args=(self._list, subscriptions), name="pipeline-list"),
+                  threading.Thread(target=self._stage, args=(self._compare,), name="pipeline-compare")]
+        stages += [threading.Thread(target=self._stage, args=(self._detail,), name=f"pipeline-detail-{i}")
+                   for i in range(self.workers)]
+        writer = threading.Thread(target=self._stage, args=(self._write,), name="pipeline-write")
+        for thread in stages + [writer]:
+            thread.start()
+        for thread in stages:
+            thread.join()
+        try:
+            self._put(self.sink, (_STOP,))
+        except PipelineAborted:
+            pass
+        writer.join()
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+    def _stage(self, target, *args):
+        try:
+            target(*args)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            self.logger.error(f"Fetch pipeline stage {threading.current_thread().name} failed: {e}")
+            self.error = e
+            self.aborted.set()
+
+    def _put(self, q, item):
+        while not self.aborted.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise PipelineAborted()
+
+    def _get(self, q):
+        while not self.aborted.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        raise PipelineAborted()
+
+    def _list(self, subscriptions):
+        pending = queue.Queue()
+        for subscription in subscriptions:
+            pending.put(subscription)
+        listers = [threading.Thread(target=self._stage, args=(self._list_worker, pending), name=f"pipeline-list-{i}")
+                   for i in range(min(self.list_workers, len(subscriptions)))]
+        for thread in listers:
+            thread.start()
+        for thread in listers:
+            thread.join()
+        self._put(self.cards, (_STOP,))
+
+    def _list_worker(self, pending):
+        """逐个领取订阅源并获取列表；同一订阅源的 _START、卡片和 _END 由同一线程按顺序发送"""
+        attempts = self.fetcher.subscription_attempts
+        while not self.aborted.is_set():
+            try:
+                subscription = pending.get_nowait()
+            except queue.Empty:
+                return
+            name = subscription["name"]
+            self._put(self.cards, (_START, subscription))
+            seen = set()
+            error = None
+            for attempt in range(attempts):
+                try:
+                    for card in self.fetcher.iter_models(subscription):
+                        if card["title"] in seen:
+                            continue
+                        seen.add(card["title"])
+                        self._put(self.cards, (_CARD, name, card))
+                    error = None
+                    break
+                except PipelineAborted:
+                    raise
+                except Exception as e:
+                    error = e
+                    metrics.inc("errors_total", stage="list_models")
+                    self.logger.error(f"Error listing {name} (attempt {attempt + 1}/{attempts}): {str(e)}")
+                    if attempt < attempts - 1:
+                        metrics.inc("retries_total", stage="list_models")
+                        with metrics.timer("fixed_sleep"):
+                            time.sleep(self.fetcher.requester.backoff(attempt + 1))
+            if error is not None:
+                self.logger.error(f"Max retries reached for {name}. Giving up.")
+            self._put(self.cards, (_END, name, error))
+
+    def _compare(self):
+        runs = {}
+        while True:
+            message = self._get(self.cards)
+            kind = message[0]
+            if kind == _STOP:
+                # 每个详情线程各收到一个 _STOP
+                for _ in range(self.workers):
+                    self._put(self.details, (_STOP,))
+                return
+            if kind == _START:
+                subscription = message[1]
+                name = subscription["name"]
+                self.logger.info(f"Processing subscription: {name}")
+                known = self.store.get_subscription_index(name)
+                completed = self.journal.completed_models(name) if self.journal is not None else {}
+                run = SubscriptionRun(subscription, known, self.fetcher.change_detector.stream(name, known),
+                                      self.store.pending_refetch(name), completed)
+                runs[name] = run
+            elif kind == _CARD:
+                self._compare_card(runs[message[1]], message[2])
+            elif kind == _END:
+                run = runs.pop(message[1])
+                if run.refresh:
+                    self._put(self.sink, (_REFRESH, run, run.refresh))
+                    run.refresh = []
+                run.failed = message[2] is not None
+                if not run.failed:
+                    run.diff.finish()
+                self._put(self.sink, (_END, run))
+
+    def _compare_card(self, run, card):
+        title = card["title"]
+        run.listed.add(title)
+        events = len(run.diff.events)
+        route = run.diff.feed(card)
+        event = run.diff.events[-1] if len(run.diff.events) > events else None
+        # 上次详情抓取失败的模型即使卡片未变也重新抓取；
+        # 开启 fetch_introduction 之前抓取的模型补抓一次 Introduction
+        forced = None
+        if title in run.pending_refetch:
+            forced = "refetch"
+        elif self.fetch_introduction and (run.known.get(title) or {}).get("introduction_pending"):
+            forced = "introduction_backfill"
+        if forced:
+            route = FETCH
+            if event is None or event["type"] == STATS_CHANGED:
+                # 强制重新抓取的详情也报告为更新，摘要等下游步骤才会处理补抓到的内容
+                event = run.diff.event(UPDATED, title, reason=forced)
+        if route == FETCH:
+            run.expected += 1
+            done = run.completed.get(title)
+            if done is not None and done.get("card_hash") == card["card_hash"]:
+                self._put(self.sink, (_MODEL, _Item(run, card, event, model=done, reused=True)))
+            else:
+                self._put(self.details, (_CARD, _Item(run, card, event)))
+        elif route == REFRESH:
+            run.refresh.append(card)
+            if len(run.refresh) >= self.sink_batch_size:
+                self._put(self.sink, (_REFRESH, run, run.refresh))
+                run.refresh = []
+
+    def _detail(self):
+        while True:
+            message = self._get(self.details)
+            if message[0] == _STOP:
+                return
+            item = message[1]
+            item.model = self.fetcher.fetch_card_details(item.card, item.run.name, self.fetch_introduction,
+                                                         item.run.subscription.get("detail_source"))
+            self._put(self.sink, (_MODEL, item))
+
+    def _write(self):
+        while True:
+            batch = [self._get(self.sink)]
+            while len(batch) < self.sink_batch_size:
+                try:
+                    batch.append(self.sink.get_nowait())
+                except queue.Empty:
+                    break
+            for name, q in (("cards", self.cards), ("details", self.details), ("sink", self.sink)):
+                metrics.set_gauge("pipeline_queue_depth", q.qsize(), queue=name)
+
+            items = []
+            for message in batch:
+                kind = message[0]
+                if kind == _MODEL:
+                    items.append(message[1])
+                    continue
+                self._persist(items)
+                items = []
+                if kind == _STOP:
+                    return
+                if kind == _REFRESH:
+                    self._refresh(message[1], message[2])
+                elif kind == _END:
+                    message[1].ended = True
+                    self._maybe_finish(message[1])
+            self._persist(items)
+
+    def _refresh(self, run, cards):
+        """沿用本地存储的详情，只合并最新的卡片字段和统计"""
+        stored = self.store.get_models(run.name, [card["title"] for card in cards])
+        models = [self.fetcher.merge_card(stored[card["title"]], card) for card in cards if card["title"] in stored]
+        self.store.upsert_models(run.name, models)
+        self.fetcher.stats_history.record(run.name, {model["title"]: model.get("model_stats") for model in models},
+                                          ts=self.run_ts)
+        self._emit_models(run, models)
+        self._index(run, models)
+
+    def _index(self, run, models):
+        """更新倒排索引（文本未变的模型直接跳过），并报告首次命中的关注规则"""
+        for rule, model in self.fetcher.search_index.index_models(run.name, models, self.fetcher.watch_rules):
+            self.logger.info(f"Watch rule '{rule.name}' matched {model['title']} in {run.name}")
+            event = {"type": WATCH_MATCHED, "subscription": run.name, "title": model["title"],
+                     "rule": rule.name, "query": rule.query, "model": model}
+            run.watch_events.append(event)
+            self._notify(event)
+
+    def _persist(self, items):
+        if not items:
+            return
+        by_run = {}
+        for item in items:
+            by_run.setdefault(item.run, []).append(item)
+        for run, run_items in by_run.items():
+            models = []
+            for item in run_items:
+                model = item.model
+                title = model["title"]
+                if "fetch_error" in model:
+                    run.errors[title] = model.pop("fetch_error")
+                    # 已知模型保留原有详情，不用错误占位覆盖
+                    if title in run.known:
+                        stored = self.store.get_model(run.name, title)
+                        if stored is not None:
+                            item.model = model = self.fetcher.merge_card(stored, item.card)
+                models.append(model)
+            self.store.upsert_models(run.name, models)
+            self.fetcher.stats_history.record(run.name, {model["title"]: model.get("model_stats") for model in models},
+                                              ts=self.run_ts)
+            self._emit_models(run, models)
+            if self.journal is not None:
+                # 模型已提交到存储，运行日志每批追加一次
+                self.journal.models_done(run.name, [item.model for item in run_items
+                                                    if not item.reused and item.model["title"] not in run.errors])
+            for item in run_items:
+                metrics.observe("discovery_to_persist", time.monotonic() - item.discovered)
+                if item.event is not None:
+                    item.event["model"] = item.model
+                    self._notify(item.event)
+            self._index(run, models)
+            run.received += len(run_items)
+            run.fetched += sum(1 for item in run_items if not item.reused)
+            self._maybe_finish(run)
+
+    def _emit_models(self, run, models):
+        if self.on_models is None or not models:
+            return
+        try:
+            self.on_models(run.name, models)
+        except Exception as e:
+            self.logger.error(f"Error handling {len(models)} persisted models in {run.name}: {str(e)}")
+
+    def _notify(self, event):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(event)
+        except Exception as e:
+            self.logger.error(f"Error handling {event['type']} event for {event['title']}: {str(e)}")
+
+    def _maybe_finish(self, run):
+        """列表已结束且所有送出的模型都已写入时收尾：删除下架模型、更新重新抓取队列"""
+        if not run.ended or run.received < run.expected:
+            return
+        name, diff = run.name, run.diff
+        if run.errors:
+            self.store.queue_refetch(name, run.errors)
+            self.logger.warning(f"Queued {len(run.errors)} models in {name} for re-fetch")
+        if run.failed:
+            # 列表不完整：只清除本次成功抓取的待重新抓取模型，不删除任何模型
+            cleared = [title for title in run.pending_refetch if title in run.listed and title not in run.errors]
+        else:
+            cleared = [title for title in run.pending_refetch if title not in run.errors or title not in run.listed]
+            self.store.remove_missing(name, run.listed)
+            self.fetcher.search_index.remove_missing(name, run.listed)
+        self.store.clear_refetch(name, cleared)
+        self.fetcher.changes[name] = diff.events + run.watch_events
+        self.results[name] = not run.failed
+        if self.journal is not None and not run.failed:
+            self.journal.subscription_done(name)
+
+        self.logger.info(
+            f"{name}: {diff.count(ADDED)} added, {diff.count(REMOVED)} removed, "
+            f"{diff.count(RENAMED)} renamed, {diff.count(UPDATED)} updated, "
+            f"{diff.count(STATS_CHANGED)} stats changed, {diff.unchanged} unchanged"
+        )
+        elapsed = time.monotonic() - run.started
+        if run.fetched:
+            rate = run.fetched / elapsed if elapsed > 0 else float("inf")
+            self.logger.info(f"Fetched details for {run.fetched} models in {name}: "
+                             f"{elapsed:.2f}s total, {rate:.2f} requests/sec")
+        self.logger.info(f"Subscription {name} processed in {elapsed:.2f}s")
@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from metrics import metrics
+
+# 可重试的 HTTP 状态码；429/503 会参考 Retry-After
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.RequestException):
+    """主机熔断期间直接拒绝请求"""
+
+
+def parse_retry_after(value):
+    """解析 Retry-After（秒数或 HTTP 日期），返回需要等待的秒数，无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """单个主机的熔断器
+    - closed: 正常放行，连续失败达到 failure_threshold 次后打开
+    - open: 在 reset_timeout 秒（或 Retry-After 指定的时间）内直接拒绝请求
+    - half_open: 超时后只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_until = 0.0
+        self.probing = False
+        self.probe_thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_until == 0.0:
+                return "closed"
+            return "half_open" if time.monotonic() >= self.opened_until else "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_until == 0.0:
+                return True
+            if time.monotonic() < self.opened_until or self.probing:
+                return False
+            self.probing = True
+            self.probe_thread = threading.get_ident()
+            return True
+
+    def release_probe(self):
+        """探测请求既未记录成功也未记录失败（如抛出意外异常）时释放探测名额"""
+        with self.lock:
+            if self.probing and self.probe_thread == threading.get_ident():
+                self.probing = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_until = 0.0
+            self.probing = False
+
+    def record_failure(self, open_for=None):
+        """记录一次失败；open_for 指定时（如 Retry-After）立即打开对应时长
+        Returns:
+            bool: 熔断器是否因此打开
+        """
+        with self.lock:
+            self.failures += 1
+            if open_for:
+                duration = open_for
+            elif self.probing or self.failures >= self.failure_threshold:
+                duration = self.reset_timeout
+            else:
+                return False
+            self.opened_until = time.monotonic() + duration
+            self.probing = False
+            return True
+
+
+class ResilientSession:
+    """带限速、请求级重试和按主机熔断的 GET 请求，接口与 requests.Session.get 一致
+
+    网络错误和 RETRY_STATUSES 按指数退避（带抖动）重试；429/503 的 Retry-After
+    不超过 max_retry_after 时按其等待，超过时不再重试并让该主机熔断相应时长。
+    """
+
+    def __init__(self, session, rate_limiter=None, logger=None, max_retries=3, backoff_base=1.0,
+                 backoff_max=30.0, max_retry_after=120.0, failure_threshold=5, reset_timeout=60):
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.logger = logger
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, session, rate_limiter, logger, settings):
+        return cls(
+            session,
+            rate_limiter,
+            logger,
+            max_retries=settings.get("max_retries", 3),
+            backoff_base=settings.get("backoff_base_seconds", 1.0),
+            backoff_max=settings.get("backoff_max_seconds", 30.0),
+            max_retry_after=settings.get("max_retry_after_seconds", 120.0),
+            failure_threshold=settings.get("circuit_failure_threshold", 5),
+            reset_timeout=settings.get("circuit_reset_seconds", 60),
+        )
+
+    def breaker_for(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[host]
+
+    def backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def get(self, url, **kwargs):
+        breaker = self.breaker_for(url)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                metrics.inc("circuit_rejections_total")
+                raise CircuitOpenError(f"Circuit open for {urlparse(url).netloc}, skipping {url}")
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+
+                retry_after = None
+                try:
+                    response = self.session.get(url, **kwargs)
+                except requests.RequestException as e:
+                    error, response = e, None
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        breaker.record_success()
+                        return response
+                    error = requests.HTTPError(f"{response.status_code} Error for url: {url}", response=response)
+                    if response.status_code in (429, 503):
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+                # Retry-After 过长时不在这里等待，由熔断器挡住后续请求
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    breaker.record_failure(open_for=retry_after)
+                    self._log(f"{url} asked to retry after {retry_after:.0f}s, opening circuit")
+                    return self._give_up(response, error)
+
+                if breaker.record_failure():
+                    self._log(f"Circuit opened for {urlparse(url).netloc} after repeated failures")
+                if attempt >= self.max_retries:
+                    return self._give_up(response, error)
+            finally:
+                # 意外异常时探测名额不能一直被占用，否则该主机永远处于熔断状态
+                breaker.release_probe()
+
+            # 等待前释放失败响应占用的连接，让它回到连接池
+            if response is not None:
+                response.close()
+            delay = max(self.backoff(attempt), retry_after or 0)
+            metrics.inc("retries_total", stage="http_request")
+            self._log(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}): {error}")
+            time.sleep(delay)
+            attempt += 1
+
+    def _give_up(self, response, error):
+        # 返回最后一次的 HTTP 响应，交给调用方 raise_for_status；网络错误直接抛出
+        if response is not None:
+            return response
+        raise error
+
+    def _log(self, message):
+        if self.logger:
+            self.logger.warning(message)
+
+    def close(self):
+        self.session.close()
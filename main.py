@@ -1,14 +1,10 @@
 import argparse
 import json
 import os
-from datetime import datetime
-from fetcher.fetcher import HuggingFaceModelFetcher
+from contextlib import nullcontext
 
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+# 抓取相关模块（selenium、requests、bs4 等）在用到时才导入，
+# 订阅管理命令无需加载它们即可快速启动
 
 def load_config():
     config_path = "config/config.json"
@@ -17,10 +13,72 @@ def load_config():
     with open(config_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def save_models(data):
-    os.makedirs("data", exist_ok=True)
-    with open("data/models.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4, cls=DateTimeEncoder)
+def export_models(args, config):
+    from storage.model_store import ModelStore
+
+    storage_settings = config.get("storage", {})
+    store = ModelStore(storage_settings.get("database", "data/models.db"), storage_settings.get("journal_mode", "WAL"))
+    try:
+        store.export_json(args.output)
+    finally:
+        store.close()
+    print(f"Models exported to {args.output}")
+
+def open_search_index(config):
+    from storage.search_index import SearchIndex
+
+    storage_settings = config.get("storage", {})
+    return SearchIndex(storage_settings.get("database", "data/models.db"), storage_settings.get("journal_mode", "WAL"))
+
+def search_models(args, config):
+    import time
+
+    index = open_search_index(config)
+    try:
+        start = time.perf_counter()
+        result = index.search(args.search, subscription=args.name, limit=args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        index.close()
+    for model in result["results"]:
+        print(f"{model['subscription']}: {model['title']}")
+    print(f"{result['total']} models matched in {elapsed:.1f} ms")
+
+def reindex_models(args, config):
+    """为已存储的模型回填倒排索引（只处理文本变化的模型，不触发关注规则）"""
+    from storage.model_store import ModelStore
+
+    storage_settings = config.get("storage", {})
+    store = ModelStore(storage_settings.get("database", "data/models.db"), storage_settings.get("journal_mode", "WAL"))
+    index = open_search_index(config)
+    try:
+        for subscription, models in store.load_all()["subscriptions"].items():
+            index.index_models(subscription, list(models.values()))
+            index.remove_missing(subscription, models)
+            print(f"Indexed {len(models)} models in {subscription}")
+    finally:
+        index.close()
+        store.close()
+
+def compact_reports(args, config):
+    from reporter.reporter import JSONReporter
+
+    reporter = JSONReporter(config.get("reporter", {}).get("output_dir", "reports"))
+    index = reporter.compact(include_today=args.include_today)
+    if index is None:
+        print("No report segments to compact.")
+        return
+    count = sum(len(titles) for titles in index["records"].values())
+    print(f"Compacted reports into {index['file']} ({count} models)")
+
+def open_report_stream(config):
+    """配置了 reporter 时打开 NDJSON 报告流：模型写入存储时即追加记录，运行结束后发布为一个分段"""
+    if not config.get("reporter", {}).get("enabled"):
+        return nullcontext()
+    from reporter.reporter import JSONReporter
+
+    reporter = JSONReporter(config.get("reporter", {}).get("output_dir", "reports"))
+    return reporter.open_stream()
 
 def add_subscription(args, config):
     for sub in config["subscriptions"]:
@@ -49,6 +107,14 @@ def main():
     parser.add_argument("--list-subscriptions", action="store_true", help="List all subscriptions")
     parser.add_argument("--name", type=str, help="Subscription name")
     parser.add_argument("--url", type=str, help="Subscription URL")
+    parser.add_argument("--export-json", action="store_true", help="Export stored models as JSON")
+    parser.add_argument("--output", type=str, default="data/models.json", help="Output path for --export-json")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted fetch run from its journal")
+    parser.add_argument("--compact-reports", action="store_true", help="Roll NDJSON report segments into an indexed snapshot")
+    parser.add_argument("--include-today", action="store_true", help="Also compact today's segments with --compact-reports")
+    parser.add_argument("--search", type=str, help="Keyword query over titles, tags and introductions (use --name to restrict to a subscription)")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum results for --search")
+    parser.add_argument("--reindex", action="store_true", help="Backfill the keyword index from stored models")
     args = parser.parse_args()
 
     config = load_config()
@@ -71,13 +137,52 @@ def main():
         list_subscriptions(config)
         return
 
-    fetcher = HuggingFaceModelFetcher()
-    data = fetcher.fetch()
-    save_models(data)
+    if args.export_json:
+        export_models(args, config)
+        return
+
+    if args.compact_reports:
+        compact_reports(args, config)
+        return
+
+    if args.search:
+        search_models(args, config)
+        return
+
+    if args.reindex:
+        reindex_models(args, config)
+        return
+
+    from fetcher.fetcher import HuggingFaceModelFetcher
+    from metrics import metrics
+
+    metrics.configure(config.get("metrics", {}))
+    fetcher = HuggingFaceModelFetcher(config)
+    try:
+        with open_report_stream(config) as stream:
+            data = fetcher.fetch(resume=args.resume, on_models=stream.write_models if stream else None)
+            if stream:
+                # 补写恢复运行时跳过的订阅源中尚未发布的模型（已写入的按内容哈希跳过），
+                # 并为完整处理的订阅源中已下架的模型写入墓碑记录
+                for name, models in data["subscriptions"].items():
+                    stream.write_subscription(name, models)
+        if stream:
+            print(f"Report records written: {stream.written}")
+        # 配置了 storage.export_json 时，每次运行后原子地发布完整的 JSON 结果
+        export_path = config.get("storage", {}).get("export_json")
+        if export_path:
+            fetcher.model_store.export_json(export_path)
+    finally:
+        fetcher.close()
+    metrics_file = metrics.dump()
+    if metrics_file:
+        print(f"Metrics written to {metrics_file}")
+    models = [model for subscription_models in data['subscriptions'].values()
+              for model in subscription_models.values()]
     print("Fetched models have been saved successfully.")
-    print(f"Total models: {len(data['models'])}")
+    print(f"Total models: {len(models)}")
     print("\nModel stats for each model:")
-    for model in data['models']:
+    for model in models:
         print(f"\n{model['title']}:")
         print(f"  Likes: {model['model_stats'].get('likes', 'N/A')}")
         print(f"  Followers: {model['model_stats'].get('followers', 'N/A')}")
@@ -0,0 +1,233 @@
+import functools
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+PREFIX = "llminfo_"
+# 阶段耗时直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.registry.inc("errors_total", stage=self.stage)
+        return False
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class MetricsRegistry:
+    """进程内的计时、计数器和仪表盘指标，以 Prometheus 文本格式导出
+
+    未启用时 timer 返回共享的空上下文管理器，timed 装饰的函数直接调用原函数，
+    inc / set_gauge 立即返回，开销只有一次属性判断。
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        # 多个调度线程可能同时导出指标，导出过程串行进行
+        self.dump_lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.dump_file = None
+        self.server = None
+
+    def configure(self, settings):
+        """按 config.json 的 metrics 部分启用指标，配置了 port 时启动 /metrics 服务"""
+        if not settings.get("enabled"):
+            return self
+        self.enabled = True
+        self.buckets = tuple(settings.get("buckets", self.buckets))
+        self.dump_file = settings.get("dump_file")
+        if settings.get("port") and self.server is None:
+            self.serve(settings.get("host", "127.0.0.1"), settings["port"])
+        return self
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def timer(self, stage):
+        """记录一个阶段耗时的上下文管理器，异常时同时计入 errors_total"""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, stage)
+
+    def timed(self, stage):
+        """记录函数耗时的装饰器"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        key = ("stage_seconds", (("stage", stage),))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def render(self):
+        """返回 Prometheus 文本格式的全部指标"""
+        lines = []
+        with self.lock:
+            declared = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                full_name = PREFIX + name
+                if full_name not in declared:
+                    declared.add(full_name)
+                    lines.append(f"# TYPE {full_name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    bucket_labels = labels + (("le", repr(float(bound))),)
+                    lines.append(f"{full_name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+            for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+                for (name, labels), value in sorted(values.items()):
+                    full_name = PREFIX + name
+                    if full_name not in declared:
+                        declared.add(full_name)
+                        lines.append(f"# TYPE {full_name} {kind}")
+                    lines.append(f"{full_name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path=None):
+        """把当前指标写入文件（先写临时文件再原子替换），未配置路径时不做任何事"""
+        path = path or self.dump_file
+        if not self.enabled or not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.dump_lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                            dir=directory or ".")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(self.render())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return path
+
+    def serve(self, host="127.0.0.1", port=9108):
+        """在后台线程中启动只提供 /metrics 的 HTTP 服务"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+        return self.server
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# 进程级默认注册表
+REGISTRY = MetricsRegistry()
+configure = REGISTRY.configure
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set_gauge
+render = REGISTRY.render
+dump = REGISTRY.dump
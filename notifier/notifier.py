@@ -1,25 +1,223 @@
+import logging
+import queue
+import random
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 
+import requests
+
+
+class SMTPConnectionPool:
+    """复用已登录的 SMTP 连接，取出时用 NOOP 检查连接是否仍然可用"""
+
+    def __init__(self, host, port=25, username=None, password=None, starttls=False, size=2, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=max(1, size))
+
+    def connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def acquire(self):
+        while True:
+            try:
+                server = self.idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self.discard(server)
+
+    def release(self, server):
+        try:
+            self.idle.put_nowait(server)
+        except queue.Full:
+            self.discard(server)
+
+    def discard(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def close(self):
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class EmailChannel:
+    def __init__(self, settings):
+        smtp = settings.get("smtp", {})
+        self.sender = smtp.get("sender", "your-email@example.com")
+        self.recipient = settings["email"]
+        self.pool = SMTPConnectionPool(
+            smtp.get("host", "smtp.example.com"),
+            smtp.get("port", 25),
+            smtp.get("username", self.sender),
+            smtp.get("password", "password"),
+            starttls=smtp.get("starttls", False),
+            size=smtp.get("pool_size", 2),
+        )
+
+    def send(self, subject, body):
+        msg = MIMEText(body)
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        msg['To'] = self.recipient
+
+        server = self.pool.acquire()
+        try:
+            server.sendmail(self.sender, self.recipient, msg.as_string())
+        except Exception:
+            self.pool.discard(server)
+            raise
+        self.pool.release(server)
+
+    def close(self):
+        self.pool.close()
+
+
+class WebhookChannel:
+    """Slack 兼容的 webhook 通知，使用 keep-alive 会话发送 {"text": ...}"""
+
+    def __init__(self, settings):
+        self.url = settings.get("webhook_url") or settings.get("slack_webhook_url")
+        if not self.url:
+            raise ValueError("webhook_url is required for slack/webhook notifications")
+        self.session = requests.Session()
+        self.timeout = settings.get("timeout", 10)
+
+    def send(self, subject, body):
+        response = self.session.post(self.url, json={"text": f"*{subject}*\n{body}"}, timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
 class Notifier:
+    """通知发送器
+
+    send_notification 只把消息放入队列，由后台线程发送：在 digest_window 秒内到达的
+    消息合并为一条摘要，发送失败时按指数退避（带抖动）重试，最多 max_retries 次。
+    """
+
     def __init__(self, notification_settings):
         self.notification_settings = notification_settings
+        self.logger = logging.getLogger(__name__)
+        self.digest_window = notification_settings.get("digest_window_seconds", 60)
+        self.max_retries = notification_settings.get("max_retries", 5)
+        self.backoff_base = notification_settings.get("backoff_base_seconds", 2)
+        self.backoff_max = notification_settings.get("backoff_max_seconds", 300)
+        self.channel = self.create_channel()
+        self.queue = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def create_channel(self):
+        method = self.notification_settings["method"]
+        if method == "email":
+            return EmailChannel(self.notification_settings)
+        if method in ("slack", "webhook"):
+            return WebhookChannel(self.notification_settings)
+        raise ValueError(f"Unsupported notification method: {method}")
 
     def send_email(self, subject, body):
-        sender_email = "your-email@example.com"
-        receiver_email = self.notification_settings["email"]
-        msg = MIMEText(body)
-        msg['Subject'] = subject
-        msg['From'] = sender_email
-        msg['To'] = receiver_email
-        
-        with smtplib.SMTP('smtp.example.com') as server:
-            server.login(sender_email, "password")
-            server.sendmail(sender_email, receiver_email, msg.as_string())
+        """立即通过（复用的）SMTP 连接发送一封邮件"""
+        self.channel.send(subject, body)
 
     def send_notification(self, subject, body):
-        if self.notification_settings["method"] == "email":
-            self.send_email(subject, body)
-        elif self.notification_settings["method"] == "slack":
-            # Slack通知实现
-            pass
+        """将通知放入队列，由后台线程合并发送"""
+        self.start()
+        self.queue.put((subject, body))
+
+    def start(self):
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.stopped.clear()
+                self.worker = threading.Thread(target=self.run, name="notifier", daemon=True)
+                self.worker.start()
+
+    def run(self):
+        while not (self.stopped.is_set() and self.queue.empty()):
+            try:
+                first = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            batch = [first]
+            # 收集摘要窗口内到达的其他消息；停止时不再等待
+            deadline = time.monotonic() + self.digest_window
+            while not self.stopped.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=min(remaining, 0.5)))
+                except queue.Empty:
+                    continue
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.deliver(*self.build_digest(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def build_digest(self, batch):
+        if len(batch) == 1:
+            return batch[0]
+        subject = f"LLMInfoSentinel: {len(batch)} notifications"
+        body = "\n\n".join(f"== {subject} ==\n{body}" for subject, body in batch)
+        return subject, body
+
+    def deliver(self, subject, body):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.channel.send(subject, body)
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.logger.error(f"Giving up on notification '{subject}' after {attempt + 1} attempts: {e}")
+                    return False
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)
+                self.logger.warning(f"Notification '{subject}' failed ({e}), retrying in {delay:.1f}s")
+                # 关闭过程中不再等待，直接重试
+                self.stopped.wait(delay)
+
+    def flush(self):
+        """阻塞直到队列中的通知全部处理完"""
+        self.queue.join()
+
+    def close(self):
+        """发送剩余通知并关闭连接"""
+        self.stopped.set()
+        if self.worker is not None:
+            self.worker.join()
+        self.channel.close()
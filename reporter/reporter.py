@@ -1,14 +1,363 @@
 import json
 import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，不加跨进程文件锁
+    fcntl = None
+
+from metrics import metrics
+from storage.model_store import model_hash
+
+SEGMENT_PREFIX = "models-"
+SEGMENT_SUFFIX = ".ndjson"
+INDEX_FILE = "snapshot.index.json"
+HASHES_FILE = "hashes.json"
+LOCK_FILE = "reports.lock"
+
+
+def _temp_file(path):
+    """在目标文件所在目录创建唯一的临时文件，返回 (fd, 临时路径)"""
+    return tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                            dir=os.path.dirname(path) or ".")
+
+
+def _atomic_write_json(path, data, indent=None):
+    """先写唯一的临时文件再原子替换，并发的写入方不会删除或覆盖彼此的临时文件"""
+    fd, tmp_path = _temp_file(path)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class NDJSONStream:
+    """一次运行的 NDJSON 写入流
+
+    记录在模型产生时逐条写入运行专属的临时文件，只有内容哈希与上次发布时不同的模型才会写入；
+    commit 时把该文件 fsync 后原子重命名为本次运行的分段，中途崩溃不会留下写了一半的分段。
+    """
+
+    def __init__(self, reporter):
+        self.reporter = reporter
+        self.part_path = os.path.join(reporter.ndjson_dir, f".part-{uuid.uuid4().hex}")
+        self.file = open(self.part_path, "w", encoding="utf-8")
+        self.pending = {}
+        self.written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def _append(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self.file.write("\n")
+        self.written += 1
+
+    def write(self, subscription, model):
+        """写入一个模型，内容未变化时跳过
+        Returns:
+            bool: 是否写入
+        """
+        digest = model_hash(model)
+        key = (subscription, model["title"])
+        if self.pending.get(key, self.reporter.published_hash(*key)) == digest:
+            return False
+        self.pending[key] = digest
+        self._append({
+            "subscription": subscription,
+            "title": model["title"],
+            "reported_at": time.time(),
+            "model": model,
+        })
+        return True
+
+    def remove(self, subscription, title):
+        """为已删除的模型写入墓碑记录"""
+        key = (subscription, title)
+        if self.pending.get(key, self.reporter.published_hash(*key)) is None:
+            return False
+        self.pending[key] = None
+        self._append({
+            "subscription": subscription,
+            "title": title,
+            "reported_at": time.time(),
+            "removed": True,
+        })
+        return True
+
+    def write_models(self, subscription, models):
+        """写入一批模型（如流水线每批写入存储的模型），返回写入的记录数"""
+        before = self.written
+        for model in models:
+            self.write(subscription, model)
+        return self.written - before
+
+    def remove_missing(self, subscription, titles):
+        """为已发布但不在 titles 中的模型写入墓碑记录，返回写入的记录数"""
+        titles = set(titles)
+        before = self.written
+        for title in self.reporter.published_titles(subscription):
+            if title not in titles:
+                self.remove(subscription, title)
+        for (name, title), digest in list(self.pending.items()):
+            if name == subscription and digest is not None and title not in titles:
+                self.remove(subscription, title)
+        return self.written - before
+
+    def write_subscription(self, subscription, models):
+        """写入一个订阅源的全部模型，并为不再出现的模型写入墓碑记录
+        Args:
+            models: {title: model}
+        Returns:
+            int: 写入的记录数
+        """
+        return self.write_models(subscription, models.values()) + self.remove_missing(subscription, models)
+
+    def commit(self):
+        """将本次写入的记录原子地发布为一个新分段"""
+        if self.file.closed:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        try:
+            if self.written:
+                self.reporter.publish(self.part_path, self.pending)
+        finally:
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+
+    def abort(self):
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
 
 class JSONReporter:
     def __init__(self, output_dir="reports"):
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)  # 确保目录存在
+        self.ndjson_dir = os.path.join(self.output_dir, "ndjson")
+        self.lock = threading.Lock()
+        self.hashes = None
+        self.snapshot_index = None
 
     def save_json_report(self, data, filename="huggingface_articles.json"):
-        """将数据存储到 JSON 文件"""
+        """将数据存储到 JSON 文件，先写临时文件再原子替换"""
         file_path = os.path.join(self.output_dir, filename)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        _atomic_write_json(file_path, data, indent=4)
         print(f"Report saved: {file_path}")
+
+    # ---- 流式 NDJSON 报告 ----
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的报告锁，共用报告目录的 worker 依次发布分段、合并哈希表和合并快照"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.ndjson_dir, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_hashes(self):
+        path = os.path.join(self.ndjson_dir, HASHES_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_hashes(self):
+        if self.hashes is None:
+            self.hashes = self._read_hashes()
+        return self.hashes
+
+    def published_hash(self, subscription, title):
+        with self.lock:
+            return self._load_hashes().get(subscription, {}).get(title)
+
+    def published_titles(self, subscription):
+        with self.lock:
+            return list(self._load_hashes().get(subscription, {}))
+
+    def segment_path(self, now=None):
+        """一次运行的分段路径：models-<日期>-<时间（微秒）>-<随机后缀>.ndjson，同一天内按文件名排序即为发布顺序"""
+        now = now or datetime.now()
+        name = f"{SEGMENT_PREFIX}{now.strftime('%Y-%m-%d-%H%M%S%f')}-{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}"
+        return os.path.join(self.ndjson_dir, name)
+
+    def open_stream(self):
+        """开始一次流式写入，返回 NDJSONStream（可用作上下文管理器）"""
+        os.makedirs(self.ndjson_dir, exist_ok=True)
+        with self.lock:
+            # 其他进程可能已发布新的记录，每次运行开始时重新读取哈希表
+            self.hashes = None
+        return NDJSONStream(self)
+
+    @metrics.timed("report_publish")
+    def publish(self, part_path, pending):
+        """把一次运行写好的临时文件原子重命名为新分段，耗时与当天已发布的记录数无关
+        哈希表在文件锁内重新读取后合并本次运行的变化再写回，不会覆盖其他 worker 发布的记录
+        """
+        segment = self.segment_path()
+        with self.lock, self._file_lock():
+            os.replace(part_path, segment)
+            hashes = self.hashes = self._read_hashes()
+            for (subscription, title), digest in pending.items():
+                if digest is None:
+                    hashes.get(subscription, {}).pop(title, None)
+                else:
+                    hashes.setdefault(subscription, {})[title] = digest
+            _atomic_write_json(os.path.join(self.ndjson_dir, HASHES_FILE), hashes)
+        return segment
+
+    def list_segments(self):
+        """按发布顺序返回 [(date, path)]，包括旧版按天追加的 models-<日期>.ndjson"""
+        if not os.path.isdir(self.ndjson_dir):
+            return []
+        segments = []
+        for name in os.listdir(self.ndjson_dir):
+            if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+                continue
+            stem = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            try:
+                day = datetime.strptime(stem[:10], "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            segments.append((day, stem, os.path.join(self.ndjson_dir, name)))
+        return [(day, path) for day, _, path in sorted(segments)]
+
+    def _load_snapshot_index(self):
+        path = os.path.join(self.ndjson_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def compact(self, include_today=False):
+        """把报告分段合并进带索引的快照
+
+        只记录每个模型最新一条记录在文件中的位置，再按位置复制原始字节，
+        不需要把全部模型加载进内存。合并完成后删除已并入的分段。
+        Returns:
+            dict: 新快照的索引，没有可合并的分段时返回 None
+        """
+        today = date.today()
+        segments = [path for day, path in self.list_segments() if include_today or day < today]
+        if not segments:
+            return None
+
+        with self.lock, self._file_lock():
+            # 在锁内重新列出分段，另一个进程可能刚合并并删除了其中一部分
+            segments = [path for day, path in self.list_segments() if include_today or day < today]
+            if not segments:
+                return None
+            index = self._load_snapshot_index()
+            latest = {}
+            if index:
+                base = os.path.join(self.ndjson_dir, index["file"])
+                for subscription, titles in index["records"].items():
+                    for title, (offset, length) in titles.items():
+                        latest[(subscription, title)] = (base, offset, length)
+
+            for path in segments:
+                with open(path, "rb") as f:
+                    offset = 0
+                    for line in f:
+                        length = len(line)
+                        if line.strip():
+                            record = json.loads(line)
+                            key = (record["subscription"], record["title"])
+                            if record.get("removed"):
+                                latest.pop(key, None)
+                            else:
+                                latest[key] = (path, offset, length)
+                        offset += length
+
+            snapshot_name = f"snapshot-{datetime.now().strftime('%Y%m%d%H%M%S%f')}{SEGMENT_SUFFIX}"
+            snapshot_path = os.path.join(self.ndjson_dir, snapshot_name)
+            records = {}
+            handles = {}
+            fd, tmp_path = _temp_file(snapshot_path)
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    position = 0
+                    for key in sorted(latest):
+                        path, offset, length = latest[key]
+                        source = handles.get(path)
+                        if source is None:
+                            source = handles[path] = open(path, "rb")
+                        source.seek(offset)
+                        line = source.read(length)
+                        if not line.endswith(b"\n"):
+                            line += b"\n"
+                        out.write(line)
+                        records.setdefault(key[0], {})[key[1]] = [position, len(line)]
+                        position += len(line)
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp_path, snapshot_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                for handle in handles.values():
+                    handle.close()
+
+            # 索引最后替换，读取方始终看到一致的快照
+            new_index = {"file": snapshot_name, "created_at": time.time(), "records": records}
+            _atomic_write_json(os.path.join(self.ndjson_dir, INDEX_FILE), new_index)
+            self.snapshot_index = new_index
+
+            if index and index["file"] != snapshot_name:
+                old_snapshot = os.path.join(self.ndjson_dir, index["file"])
+                if os.path.exists(old_snapshot):
+                    os.remove(old_snapshot)
+            for path in segments:
+                os.remove(path)
+        return new_index
+
+    def read_model(self, subscription, title):
+        """通过快照索引读取单个模型，不存在时返回 None
+        缓存的索引指向的快照已被（其他进程的）合并删除时，重新加载索引后再读取
+        """
+        for reload in (self.snapshot_index is None, True):
+            if reload:
+                self.snapshot_index = self._load_snapshot_index()
+            if not self.snapshot_index:
+                return None
+            position = self.snapshot_index["records"].get(subscription, {}).get(title)
+            if position is None:
+                return None
+            offset, length = position
+            try:
+                with open(os.path.join(self.ndjson_dir, self.snapshot_index["file"]), "rb") as f:
+                    f.seek(offset)
+                    return json.loads(f.read(length))["model"]
+            except FileNotFoundError:
+                if reload:
+                    raise
+        return None
@@ -0,0 +1,95 @@
+import json
+import os
+import random
+import threading
+import time
+
+
+class PollingPlanner:
+    """按订阅源自适应调整轮询间隔
+
+    每个订阅源保存下一次到期时间和当前间隔：检测到变化时间隔乘以 speedup
+    （更频繁），没有变化时乘以 slowdown（更稀疏），并限制在 [min, max] 之间，
+    再加上 ±jitter 比例的随机抖动，避免所有订阅源同时到期。
+    状态保存在 JSON 文件中，重启后沿用。
+    """
+
+    def __init__(self, state_file="data/scheduler_state.json", min_interval=1800, max_interval=86400,
+                 initial_interval=21600, jitter=0.1, speedup=0.5, slowdown=1.5):
+        self.state_file = state_file
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = min(max(initial_interval, min_interval), max_interval)
+        self.jitter = jitter
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.lock = threading.Lock()
+        self.state = self.load_state()
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_file + ".tmp"
+        with self.lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.state_file)
+
+    def next_due(self, name):
+        """返回订阅源的下一次到期时间（时间戳），新订阅源立即到期"""
+        with self.lock:
+            return self.state.get(name, {}).get("next_due", time.time())
+
+    def interval(self, name):
+        with self.lock:
+            return self.state.get(name, {}).get("interval", self.initial_interval)
+
+    def _with_jitter(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def advance(self, interval, changes, failed=False):
+        """根据一次检查结果计算新的间隔，不修改状态
+        Returns:
+            tuple: (新的间隔, 距下一次检查的秒数（已加抖动）)
+        """
+        if interval is None:
+            interval = self.initial_interval
+        if failed:
+            return interval, self._with_jitter(self.min_interval)
+        factor = self.speedup if changes else self.slowdown
+        interval = min(max(interval * factor, self.min_interval), self.max_interval)
+        return interval, self._with_jitter(interval)
+
+    def record(self, name, changes, failed=False):
+        """记录一次检查结果并计算下一次到期时间
+        Args:
+            name: 订阅源名称
+            changes: 本次检测到的变化数量（新增、删除等）
+            failed: 本次检查是否失败，失败时间隔不变，按最小间隔重试
+        Returns:
+            float: 下一次到期时间（时间戳）
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.state.setdefault(name, {"interval": self.initial_interval})
+            interval, delay = self.advance(entry.get("interval", self.initial_interval), changes, failed)
+            entry.update({
+                "interval": interval,
+                "next_due": now + delay,
+                "last_checked": now,
+                "last_changes": changes,
+                "last_failed": failed,
+            })
+            next_due = entry["next_due"]
+        self.save_state()
+        return next_due
@@ -1,19 +1,71 @@
-import schedule
 import time
 import json
 import os
+import argparse
+import multiprocessing
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 from fetcher.fetcher import HuggingFaceModelFetcher
+from fetcher.change_detector import ADDED, REMOVED, RENAMED, UPDATED
+from storage.search_index import WATCH_MATCHED
+from scheduler.polling import PollingPlanner
+from scheduler.work_queue import WorkQueue
+from analyzer.analyzer import Analyzer
+from notifier.notifier import Notifier
+from reporter.reporter import JSONReporter
+from metrics import metrics
+
+def worker_metrics_settings(settings, worker_index):
+    """同一主机上的多个 worker 进程各自使用 port + index 和带序号的 dump_file"""
+    if not worker_index:
+        return settings
+    settings = dict(settings)
+    if settings.get("port"):
+        settings["port"] += worker_index
+    if settings.get("dump_file"):
+        root, ext = os.path.splitext(settings["dump_file"])
+        settings["dump_file"] = f"{root}.{worker_index}{ext}"
+    return settings
+
 
 class ModelScheduler:
-    def __init__(self, config_path="config/config.json"):
+    def __init__(self, config_path="config/config.json", worker_index=None):
         self.logger = self.setup_logger()
         self.config_path = config_path
-        self.models_file = "data/models.json"
         self.fetcher = HuggingFaceModelFetcher(config_path)
-        
+        # 可选的指标采集与 /metrics 服务
+        metrics.configure(worker_metrics_settings(self.fetcher.config.get("metrics", {}), worker_index))
+        self.settings = self.fetcher.config.get("scheduler", {})
+        self.planner = PollingPlanner(
+            state_file=self.settings.get("state_file", "data/scheduler_state.json"),
+            min_interval=self.settings.get("min_interval_minutes", 30) * 60,
+            max_interval=self.settings.get("max_interval_minutes", 1440) * 60,
+            initial_interval=self.settings.get("initial_interval_minutes", 360) * 60,
+            jitter=self.settings.get("jitter", 0.1),
+            speedup=self.settings.get("speedup_factor", 0.5),
+            slowdown=self.settings.get("slowdown_factor", 1.5),
+        )
+        self.scheduler = None
+        # 可选的摘要生成，只处理新增或变化的模型
+        self.analyzer = None
+        if self.fetcher.config.get("analyzer", {}).get("enabled"):
+            self.analyzer = Analyzer.from_config(self.fetcher.config)
+        # 可选的通知发送，消息进入后台队列并按摘要窗口合并
+        self.notifier = None
+        notification_settings = self.fetcher.config.get("notifications", {})
+        if notification_settings.get("enabled"):
+            self.notifier = Notifier(notification_settings)
+        # 可选的 NDJSON 报告，每次检查只追加变化的模型
+        self.reporter = None
+        reporter_settings = self.fetcher.config.get("reporter", {})
+        if reporter_settings.get("enabled"):
+            self.reporter = JSONReporter(reporter_settings.get("output_dir", "reports"))
+
     def setup_logger(self):
         """设置日志记录"""
         logger = logging.getLogger(__name__)
@@ -25,28 +77,15 @@ class ModelScheduler:
         return logger
 
     def load_existing_models(self) -> Dict[str, dict]:
-        """加载现有的模型数据"""
-        if os.path.exists(self.models_file):
-            with open(self.models_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"models": []}
-
-    def save_models(self, models_data: dict):
-        """保存模型数据到文件"""
-        os.makedirs(os.path.dirname(self.models_file), exist_ok=True)
-        with open(self.models_file, 'w', encoding='utf-8') as f:
-            json.dump(models_data, f, indent=2, ensure_ascii=False, default=str)
-
-    def compare_models(self, existing_models: List[dict], new_models: List[dict]) -> List[dict]:
-        """比较现有模型和新模型，返回新增的模型"""
-        existing_titles = {model['title'] for model in existing_models}
-        new_models_list = []
-        
-        for model in new_models:
-            if model['title'] not in existing_titles:
-                new_models_list.append(model)
-        
-        return new_models_list
+        """从模型存储中加载现有的模型数据"""
+        return self.fetcher.model_store.load_all()
+
+    def summarize_changes(self, events: List[dict]) -> Dict[str, List[dict]]:
+        """按事件类型归类 fetcher 产生的变化事件"""
+        grouped = {}
+        for event in events:
+            grouped.setdefault(event["type"], []).append(event)
+        return grouped
 
     def notify_new_models(self, new_models: List[dict]):
         """通知新增的模型"""
@@ -55,52 +94,304 @@ class ModelScheduler:
             for model in new_models:
                 self.logger.info(f"\nTitle: {model['title']}")
                 self.logger.info(f"Link: {model['link']}")
-                self.logger.info(f"Time: {model['time']}")
+                self.logger.info(f"Time: {model.get('time', 'N/A')}")
                 if model.get('model_stats'):
                     self.logger.info(f"Likes: {model['model_stats'].get('likes', 'N/A')}")
                     self.logger.info(f"Followers: {model['model_stats'].get('followers', 'N/A')}")
             self.logger.info("\n=====================\n")
+            if self.notifier:
+                for model in new_models:
+                    self.notifier.send_notification(
+                        f"New model: {model['title']}",
+                        f"Link: {model['link']}\nTime: {model.get('time', 'N/A')}",
+                    )
         else:
             self.logger.info("No new models found.")
 
-    def check_new_models(self):
-        """检查新模型的主函数"""
-        self.logger.info("Starting model check...")
-        
-        # 加载现有模型数据
-        existing_data = self.load_existing_models()
-        existing_models = existing_data.get("models", [])
-        
-        # 获取新模型数据
-        new_data = self.fetcher.fetch()
-        new_models = new_data.get("models", [])
-        
-        # 比较并找出新模型
-        new_models_list = self.compare_models(existing_models, new_models)
+    def notify_watch_match(self, event: dict):
+        """通知命中关注规则的新增或变化模型"""
+        model = event["model"]
+        if self.notifier:
+            self.notifier.send_notification(
+                f"Watch rule '{event['rule']}' matched: {model['title']}",
+                f"Query: {event['query']}\nSubscription: {event['subscription']}\nLink: {model.get('link', 'N/A')}",
+            )
+
+    @metrics.timed("check_subscription")
+    def check_subscription(self, subscription: dict) -> Optional[int]:
+        """检查单个订阅源，返回检测到的变化数量（新增、删除、改名、更新），失败时返回 None"""
+        name = subscription.get("name")
+        self.logger.info(f"Checking subscription: {name}")
         
-        # 通知新模型
-        self.notify_new_models(new_models_list)
+        # 获取新模型数据，fetcher 以流水线方式完成变化检测并增量写入模型存储；
+        # 新模型在写入后立即通知，不等待整个订阅源处理完
+        def on_event(event):
+            if event["type"] == ADDED:
+                self.notify_new_models([event["model"]])
+            elif event["type"] == WATCH_MATCHED:
+                self.notify_watch_match(event)
         
-        # 保存新的模型数据
-        self.save_models(new_data)
+        # 报告记录在每批模型写入存储时追加，检查结束后作为一个分段发布，出错时丢弃
+        with self.reporter.open_stream() if self.reporter else nullcontext() as stream:
+            models = self.fetcher.fetch_subscription(
+                subscription, on_event=on_event, on_models=stream.write_models if stream else None
+            )
+            self.fetcher.http_cache.save()
+            if models is None:
+                return None
+            
+            changes = self.summarize_changes(self.fetcher.changes.get(name, []))
+            if not changes.get(ADDED):
+                self.notify_new_models([])
+            for event in changes.get(RENAMED, []):
+                self.logger.info(f"Model renamed in {name}: {event['old_title']} -> {event['title']}")
+            for event in changes.get(REMOVED, []):
+                self.logger.info(f"Model removed from {name}: {event['title']}")
+            
+            if self.analyzer:
+                summarized = self.summarize_models(name, self.fetcher.changes.get(name, []))
+                if stream:
+                    stream.write_models(name, summarized)
+            
+            if stream:
+                # 列表完整时才为下架的模型写入墓碑记录
+                stream.remove_missing(name, models)
+        if stream:
+            self.logger.info(f"Report records written for {name}: {stream.written}")
         
+        return sum(len(changes.get(kind, [])) for kind in (ADDED, REMOVED, RENAMED, UPDATED))
+
+    def summarize_models(self, name: str, events: List[dict]) -> List[dict]:
+        """为新增或变化模型的 introduction 生成摘要并写回模型存储，返回写回的模型"""
+        try:
+            summaries = self.analyzer.analyze_changes(events)
+        except Exception as e:
+            self.logger.error(f"Error summarizing models in {name}: {str(e)}")
+            return []
+        if not summaries:
+            return []
+        models = self.fetcher.model_store.get_models(name, summaries)
+        for title, model in models.items():
+            model["summary"] = summaries[title]
+        self.fetcher.model_store.upsert_models(name, list(models.values()))
+        self.logger.info(f"Summarized {len(models)} models in {name}")
+        return list(models.values())
+
+    @metrics.timed("check_new_models")
+    def check_new_models(self):
+        """依次检查所有订阅源"""
+        self.logger.info("Starting model check...")
+        for subscription in self.fetcher.config.get("subscriptions", []):
+            self.check_subscription(subscription)
+        self.fetcher.http_cache.log_stats(self.logger)
+        metrics.dump()
         self.logger.info("Model check completed.")
 
+    def poll_subscription(self, subscription: dict):
+        """调度任务：检查订阅源，根据变化调整轮询间隔并安排下一次检查"""
+        name = subscription.get("name")
+        changes = None
+        try:
+            changes = self.check_subscription(subscription)
+        except Exception as e:
+            self.logger.error(f"Error checking subscription {name}: {str(e)}")
+        finally:
+            next_due = self.planner.record(name, changes or 0, failed=changes is None)
+            self.logger.info(
+                f"Next check for {name} at {datetime.fromtimestamp(next_due).isoformat(timespec='seconds')} "
+                f"(interval {self.planner.interval(name) / 60:.1f} min)"
+            )
+            self.schedule_subscription(subscription, next_due)
+            metrics.dump()
+
+    def schedule_subscription(self, subscription: dict, run_at: float):
+        if self.scheduler is None:
+            return
+        self.scheduler.add_job(
+            self.poll_subscription,
+            "date",
+            run_date=datetime.fromtimestamp(max(run_at, time.time())),
+            args=[subscription],
+            id=subscription["name"],
+            replace_existing=True,
+        )
+
     def run(self):
-        """运行调度器"""
+        """运行调度器：每个订阅源独立到期，最多 max_concurrent 个同时检查"""
         self.logger.info("Starting scheduler...")
         
-        # 设置每天执行一次
-        schedule.every().day.at("00:00").do(self.check_new_models)
+        self.scheduler = BlockingScheduler(
+            executors={"default": ThreadPoolExecutor(self.settings.get("max_concurrent", 4))},
+            job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": None},
+        )
+        for subscription in self.fetcher.config.get("subscriptions", []):
+            if not self.fetcher.is_valid_subscription(subscription):
+                self.logger.error(f"Invalid subscription configuration: {subscription}")
+                continue
+            self.schedule_subscription(subscription, self.planner.next_due(subscription["name"]))
         
-        # 立即执行一次检查
-        self.check_new_models()
-        
-        # 持续运行
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        try:
+            self.scheduler.start()
+        finally:
+            self.close()
+
+    def close(self):
+        self.fetcher.close()
+        if self.analyzer:
+            self.analyzer.close()
+        if self.notifier:
+            self.notifier.close()
+
+    def open_work_queue(self):
+        queue_settings = self.settings.get("work_queue", {})
+        return WorkQueue(
+            queue_settings.get("path", "data/work_queue.db"),
+            lease_seconds=queue_settings.get("lease_seconds", 300),
+        )
+
+    def run_worker(self, max_jobs=None, exit_when_idle=False):
+        """工作队列模式：从共享的租约队列中领取订阅源检查任务
+        可在多个进程或共享同一卷的多台主机上同时运行，轮询间隔的自适应调整与 run 相同
+        Args:
+            max_jobs: 处理这么多个任务后退出，默认不限
+            exit_when_idle: 没有到期任务时退出而不是等待
+        """
+        queue_settings = self.settings.get("work_queue", {})
+        poll_seconds = queue_settings.get("poll_seconds", 5)
+        queue = self.open_work_queue()
+        subscriptions = []
+        for subscription in self.fetcher.config.get("subscriptions", []):
+            if not self.fetcher.is_valid_subscription(subscription):
+                self.logger.error(f"Invalid subscription configuration: {subscription}")
+                continue
+            subscriptions.append(subscription)
+        added, removed = queue.sync(subscriptions)
+        self.logger.info(f"Worker {queue.owner} started ({added} jobs added, {removed} removed)")
+
+        jobs = 0
+        try:
+            while max_jobs is None or jobs < max_jobs:
+                lease = queue.claim()
+                if lease is None:
+                    if exit_when_idle:
+                        break
+                    next_claimable = queue.next_claimable()
+                    wait = poll_seconds if next_claimable is None else next_claimable - time.time()
+                    time.sleep(min(max(wait, 0.1), poll_seconds))
+                    continue
+                self.process_lease(queue, lease)
+                jobs += 1
+        finally:
+            queue.close()
+            self.close()
+        self.logger.info(f"Worker {queue.owner} finished after {jobs} jobs")
+
+    def process_lease(self, queue, lease):
+        """检查租到的订阅源，期间后台续约；结束后按变化数量安排下一次检查"""
+        name = lease.name
+        if lease.reclaimed_from:
+            self.logger.warning(f"Reclaimed expired lease on {name} from {lease.reclaimed_from}")
+        heartbeat_seconds = self.settings.get("work_queue", {}).get("heartbeat_seconds", queue.lease_seconds / 3)
+        stopped = threading.Event()
+
+        def heartbeat():
+            while not stopped.wait(heartbeat_seconds):
+                if not queue.heartbeat(lease):
+                    self.logger.warning(f"Lost lease on {name}, another worker has taken it over")
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name=f"heartbeat-{name}", daemon=True)
+        heartbeat_thread.start()
+        changes, error = None, None
+        try:
+            changes = self.check_subscription(lease.subscription)
+        except Exception as e:
+            error = str(e)
+            self.logger.error(f"Error checking subscription {name}: {error}")
+        except BaseException:
+            # 进程被中断时交还任务，其他 worker 可以立即接手
+            queue.release(lease)
+            raise
+        finally:
+            stopped.set()
+            heartbeat_thread.join()
+
+        interval, delay = self.planner.advance(lease.interval, changes or 0, failed=changes is None)
+        next_due = time.time() + delay
+        if changes is None:
+            kept = queue.fail(lease, next_due, error or "check failed")
+        else:
+            kept = queue.complete(lease, next_due, interval, changes)
+        if not kept:
+            self.logger.warning(f"Lease on {name} expired during the check; result not recorded")
+        self.logger.info(
+            f"Next check for {name} at {datetime.fromtimestamp(next_due).isoformat(timespec='seconds')} "
+            f"(interval {interval / 60:.1f} min)"
+        )
+        metrics.dump()
+
+
+def run_worker_process(config_path, worker_index, max_jobs, exit_when_idle):
+    ModelScheduler(config_path, worker_index=worker_index).run_worker(max_jobs, exit_when_idle)
+
+
+def run_workers(config_path, count, max_jobs=None, exit_when_idle=False):
+    """在本机启动 count 个 worker 进程并等待它们退出"""
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=run_worker_process, args=(config_path, index, max_jobs, exit_when_idle),
+                    name=f"worker-{index}")
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def print_queue_status(config_path):
+    with open(config_path, "r", encoding="utf-8") as f:
+        queue_settings = json.load(f).get("scheduler", {}).get("work_queue", {})
+    queue = WorkQueue(queue_settings.get("path", "data/work_queue.db"))
+    try:
+        now = time.time()
+        for job in queue.status():
+            if job["lease_owner"] and job["lease_expires"] >= now:
+                state = f"leased by {job['lease_owner']} ({job['lease_expires'] - now:.0f}s left)"
+            elif job["lease_owner"]:
+                state = f"lease expired ({job['lease_owner']})"
+            else:
+                state = f"due in {max(job['due_at'] - now, 0) / 60:.1f} min"
+            print(f"{job['name']}: {state}, claims {job['claims']}, failures {job['failures']}"
+                  + (f", last error: {job['last_error']}" if job["last_error"] else ""))
+    finally:
+        queue.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduled subscription checks")
+    parser.add_argument("--config", default="config/config.json", help="Config file path")
+    parser.add_argument("--worker", action="store_true", help="Claim subscription checks from the shared work queue")
+    parser.add_argument("--workers", type=int, default=0, help="Start N local worker processes")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Exit each worker after N jobs")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Exit workers when no job is due")
+    parser.add_argument("--queue-status", action="store_true", help="Show work queue leases and due times")
+    args = parser.parse_args()
+
+    if args.queue_status:
+        print_queue_status(args.config)
+    elif args.workers:
+        run_workers(args.config, args.workers, args.max_jobs, args.exit_when_idle)
+    elif args.worker:
+        ModelScheduler(args.config).run_worker(args.max_jobs, args.exit_when_idle)
+    else:
+        ModelScheduler(args.config).run()
 
 if __name__ == "__main__":
-    scheduler = ModelScheduler()
-    scheduler.run()
+    main()
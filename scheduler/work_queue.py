@@ -0,0 +1,201 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from metrics import metrics
+
+
+class Lease:
+    """claim 领到的一次租约，续约、完成和失败时以 token 校验仍由自己持有"""
+
+    def __init__(self, name, subscription, token, expires_at, interval, reclaimed_from=None):
+        self.name = name
+        self.subscription = subscription
+        self.token = token
+        self.expires_at = expires_at
+        self.interval = interval
+        # 租约过期后被本进程接手时，原持有者的标识
+        self.reclaimed_from = reclaimed_from
+
+
+class WorkQueue:
+    """基于 SQLite 文件的订阅源租约队列，供多个 worker 进程（可在共享卷上的多台主机）共用
+
+    每个订阅源是一行任务。到期（due_at <= now）且未被租出、或租约已过期的任务可以被领取；
+    领取在 BEGIN IMMEDIATE 事务中完成，同一任务同一时刻只会被一个 worker 领到。
+    worker 需在 lease_seconds 内续约，崩溃或失联的 worker 的任务在租约过期后自动被其他 worker 重新领取；
+    完成和失败按 token 校验，租约已被他人接手时结果被丢弃。
+
+    使用回滚日志（journal_mode=DELETE）而不是 WAL：WAL 依赖共享内存，不能跨主机使用。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            name TEXT PRIMARY KEY,
+            subscription TEXT NOT NULL,
+            due_at REAL NOT NULL,
+            interval REAL,
+            lease_owner TEXT,
+            lease_token TEXT,
+            lease_expires REAL,
+            claims INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            last_owner TEXT,
+            last_finished REAL,
+            last_changes INTEGER,
+            last_error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (due_at)",
+    )
+
+    def __init__(self, path="data/work_queue.db", lease_seconds=300, owner=None, busy_timeout=30):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # isolation_level=None：事务由 _transaction 显式控制
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        with self._transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def sync(self, subscriptions):
+        """让任务与配置中的订阅源一致：新增的立即到期，已有的更新配置，已删除的移除
+        Returns:
+            tuple: (新增数, 删除数)
+        """
+        now = time.time()
+        configured = {subscription["name"]: subscription for subscription in subscriptions}
+        with self._transaction() as conn:
+            existing = {row[0] for row in conn.execute("SELECT name FROM jobs")}
+            for name, subscription in configured.items():
+                payload = json.dumps(subscription, ensure_ascii=False)
+                if name in existing:
+                    conn.execute("UPDATE jobs SET subscription = ? WHERE name = ?", (payload, name))
+                else:
+                    conn.execute("INSERT INTO jobs (name, subscription, due_at) VALUES (?, ?, ?)",
+                                 (name, payload, now))
+            removed = [name for name in existing if name not in configured]
+            conn.executemany("DELETE FROM jobs WHERE name = ?", [(name,) for name in removed])
+        return len(configured.keys() - existing), len(removed)
+
+    def claim(self):
+        """领取一个到期的任务（包括租约已过期的），没有时返回 None"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._transaction() as conn:
+            row = conn.execute(
+                """
+                SELECT name, subscription, interval, lease_owner FROM jobs
+                WHERE due_at <= ? AND (lease_token IS NULL OR lease_expires < ?)
+                ORDER BY due_at LIMIT 1
+                """,
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            name, subscription, interval, previous_owner = row
+            expires_at = now + self.lease_seconds
+            conn.execute(
+                """
+                UPDATE jobs SET lease_owner = ?, lease_token = ?, lease_expires = ?, claims = claims + 1
+                WHERE name = ?
+                """,
+                (self.owner, token, expires_at, name),
+            )
+        if previous_owner is not None:
+            metrics.inc("leases_reclaimed_total")
+        return Lease(name, json.loads(subscription), token, expires_at, interval, previous_owner)
+
+    def heartbeat(self, lease):
+        """续约，返回 False 表示租约已过期并被其他 worker 接手"""
+        expires_at = time.time() + self.lease_seconds
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE name = ? AND lease_token = ?",
+                (expires_at, lease.name, lease.token),
+            ).rowcount
+        if updated:
+            lease.expires_at = expires_at
+        return updated == 1
+
+    def complete(self, lease, next_due, interval, changes):
+        """完成任务并安排下一次检查，返回 False 表示租约已丢失、结果被丢弃"""
+        with self._transaction() as conn:
+            return conn.execute(
+                """
+                UPDATE jobs SET due_at = ?, interval = ?, lease_owner = NULL, lease_token = NULL,
+                    lease_expires = NULL, failures = 0, last_owner = ?, last_finished = ?,
+                    last_changes = ?, last_error = NULL
+                WHERE name = ? AND lease_token = ?
+                """,
+                (next_due, interval, self.owner, time.time(), changes, lease.name, lease.token),
+            ).rowcount == 1
+
+    def fail(self, lease, next_due, error):
+        """记录一次失败并安排重试，返回 False 表示租约已丢失"""
+        with self._transaction() as conn:
+            return conn.execute(
+                """
+                UPDATE jobs SET due_at = ?, lease_owner = NULL, lease_token = NULL, lease_expires = NULL,
+                    failures = failures + 1, last_owner = ?, last_finished = ?, last_error = ?
+                WHERE name = ? AND lease_token = ?
+                """,
+                (next_due, self.owner, time.time(), error, lease.name, lease.token),
+            ).rowcount == 1
+
+    def release(self, lease):
+        """放弃租约（如进程退出时），任务保持到期状态，可立即被其他 worker 领取"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_owner = NULL, lease_token = NULL, lease_expires = NULL "
+                "WHERE name = ? AND lease_token = ?",
+                (lease.name, lease.token),
+            )
+
+    def next_claimable(self):
+        """返回最早可能有任务可领取的时间戳，队列为空时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MIN(CASE WHEN lease_token IS NULL THEN due_at ELSE MAX(due_at, lease_expires) END) FROM jobs"
+            ).fetchone()
+        return row[0]
+
+    def status(self):
+        """返回全部任务的状态，按到期时间排序"""
+        with self.lock:
+            cursor = self.conn.execute(
+                """
+                SELECT name, due_at, interval, lease_owner, lease_expires, claims, failures,
+                       last_owner, last_finished, last_changes, last_error
+                FROM jobs ORDER BY due_at
+                """
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
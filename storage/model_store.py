@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from metrics import metrics
+
+
+def model_hash(model):
+    """模型数据的内容哈希，用于判断是否需要写入"""
+    payload = json.dumps(model, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def legacy_subscription(model, subscriptions):
+    """旧版模型所属的订阅源名称：链接以订阅源 URL 开头，或标题中的组织名与订阅源 URL 的最后一段相同"""
+    link = model.get("link") or ""
+    org = (model.get("title") or "").split("/")[0].lower()
+    for subscription in subscriptions:
+        url = subscription.get("url", "").rstrip("/")
+        if link.startswith(url + "/") or (org and org == url.rsplit("/", 1)[-1].lower()):
+            return subscription["name"]
+    return None
+
+
+def legacy_model(model):
+    """旧版模型把 introduction 等详情放在 details 中，展开为当前的扁平结构"""
+    flat = {key: value for key, value in model.items() if key != "details"}
+    flat.update(model.get("details") or {})
+    return flat
+
+
+class ModelStore:
+    """基于 SQLite（WAL 模式）的增量模型存储
+
+    以 (subscription, title) 为主键，只写入内容发生变化的模型，
+    "某个模型是否已知" 之类的查询直接走索引，无需把全部数据加载进内存。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS models (
+            subscription TEXT NOT NULL,
+            title TEXT NOT NULL,
+            data TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (subscription, title)
+        ) WITHOUT ROWID
+    """
+
+    REFETCH_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS refetch_queue (
+            subscription TEXT NOT NULL,
+            title TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            last_error TEXT,
+            queued_at REAL NOT NULL,
+            PRIMARY KEY (subscription, title)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, db_path="data/models.db", journal_mode="WAL"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # 多台主机通过共享卷使用同一数据库时需改用 DELETE 模式（WAL 依赖共享内存）
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(self.SCHEMA)
+        self.conn.execute(self.REFETCH_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def data_version(self):
+        """SQLite 的 data_version，其他连接（或进程）提交写入后会变化"""
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_content_hashes(self):
+        """返回全部模型的内容哈希，不解析模型数据
+        Returns:
+            dict: {(subscription, title): content_hash}
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT subscription, title, content_hash FROM models").fetchall()
+        return {(subscription, title): content_hash for subscription, title, content_hash in rows}
+
+    def is_empty(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM models LIMIT 1").fetchone() is None
+
+    def has_model(self, subscription, title):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM models WHERE subscription = ? AND title = ?", (subscription, title)
+            ).fetchone()
+        return row is not None
+
+    def get_model(self, subscription, title):
+        """返回单个模型数据，不存在时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM models WHERE subscription = ? AND title = ?", (subscription, title)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_subscription_models(self, subscription):
+        """返回某订阅源下的全部模型，格式为 {title: model}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT title, data FROM models WHERE subscription = ? ORDER BY title", (subscription,)
+            ).fetchall()
+        return {title: json.loads(data) for title, data in rows}
+
+    def get_models(self, subscription, titles):
+        """批量获取某订阅源下指定标题的模型，返回 {title: model}"""
+        titles = list(titles)
+        models = {}
+        with self.lock:
+            # 分批查询，避免超过 SQLite 参数个数上限
+            for start in range(0, len(titles), 500):
+                batch = titles[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT title, data FROM models WHERE subscription = ? AND title IN ({placeholders})",
+                    (subscription, *batch),
+                ).fetchall()
+                models.update((title, json.loads(data)) for title, data in rows)
+        return models
+
+    def get_subscription_index(self, subscription):
+        """返回某订阅源下用于变化检测的轻量信息，不解析完整模型数据
+        Returns:
+            dict: {title: {"card_hash", "model_id", "model_stats", "introduction_pending"}}，
+            introduction_pending 表示抓取时没有获取 Introduction
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                """
+                SELECT title,
+                       json_extract(data, '$.card_hash'),
+                       json_extract(data, '$.model_id'),
+                       json_extract(data, '$.model_stats'),
+                       json_extract(data, '$.introduction') = 'Not fetched'
+                FROM models WHERE subscription = ?
+                """,
+                (subscription,),
+            ).fetchall()
+        return {
+            title: {
+                "card_hash": card_hash,
+                "model_id": model_id,
+                "model_stats": json.loads(stats) if stats else {},
+                "introduction_pending": bool(pending),
+            }
+            for title, card_hash, model_id, stats, pending in rows
+        }
+
+    def load_all(self):
+        """返回与旧版 data/models.json 相同结构的全部数据"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT subscription, title, data FROM models ORDER BY subscription, title"
+            ).fetchall()
+        subscriptions = {}
+        for subscription, title, data in rows:
+            subscriptions.setdefault(subscription, {})[title] = json.loads(data)
+        return {"subscriptions": subscriptions}
+
+    @metrics.timed("store_upsert")
+    def upsert_models(self, subscription, models):
+        """写入一个订阅源的模型，内容未变化的行不会被改写
+        Returns:
+            int: 实际插入或更新的行数
+        """
+        now = time.time()
+        rows = []
+        for model in models:
+            rows.append((
+                subscription,
+                model["title"],
+                json.dumps(model, ensure_ascii=False, default=str),
+                model_hash(model),
+                now,
+            ))
+        with self.lock:
+            before = self.conn.total_changes
+            with self.conn:
+                self.conn.executemany(
+                    """
+                    INSERT INTO models (subscription, title, data, content_hash, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (subscription, title) DO UPDATE SET
+                        data = excluded.data,
+                        content_hash = excluded.content_hash,
+                        updated_at = excluded.updated_at
+                    WHERE models.content_hash != excluded.content_hash
+                    """,
+                    rows,
+                )
+            return self.conn.total_changes - before
+
+    @metrics.timed("store_remove")
+    def remove_missing(self, subscription, titles):
+        """删除某订阅源中不在 titles 里的模型
+        Returns:
+            int: 删除的行数
+        """
+        titles = set(titles)
+        with self.lock:
+            known = [row[0] for row in self.conn.execute(
+                "SELECT title FROM models WHERE subscription = ?", (subscription,)
+            )]
+            missing = [(subscription, title) for title in known if title not in titles]
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM models WHERE subscription = ? AND title = ?", missing
+                )
+        return len(missing)
+
+    def queue_refetch(self, subscription, errors):
+        """把详情抓取失败的模型加入重新抓取队列，已在队列中的累加尝试次数
+        Args:
+            errors: {title: error message}
+        """
+        now = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    """
+                    INSERT INTO refetch_queue (subscription, title, attempts, last_error, queued_at)
+                    VALUES (?, ?, 1, ?, ?)
+                    ON CONFLICT (subscription, title) DO UPDATE SET
+                        attempts = attempts + 1,
+                        last_error = excluded.last_error
+                    """,
+                    [(subscription, title, error, now) for title, error in errors.items()],
+                )
+
+    def pending_refetch(self, subscription):
+        """返回某订阅源等待重新抓取的模型 {title: attempts}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT title, attempts FROM refetch_queue WHERE subscription = ?", (subscription,)
+            ).fetchall()
+        return dict(rows)
+
+    def clear_refetch(self, subscription, titles):
+        """从重新抓取队列中移除已成功（或已下架）的模型"""
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM refetch_queue WHERE subscription = ? AND title = ?",
+                    [(subscription, title) for title in titles],
+                )
+
+    def import_json(self, json_path, subscriptions=None):
+        """从旧版 data/models.json 导入数据
+        支持两种格式：{"subscriptions": {订阅名称: {标题: 模型}}}，以及更早的 {"models": [模型]}。
+        后者不区分订阅源，按模型链接前缀（或标题中的组织名）归入 subscriptions 中的订阅源。
+        Args:
+            subscriptions: 配置中的订阅源列表，导入 {"models": [...]} 格式时需要
+        Returns:
+            int: 导入的模型数
+        Raises:
+            ValueError: 文件格式无法识别，或旧版模型一个也无法归入订阅源
+        """
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "subscriptions" in data:
+            grouped = {name: list(models.values()) for name, models in data["subscriptions"].items()}
+        elif "models" in data:
+            grouped = {}
+            for model in data["models"]:
+                name = legacy_subscription(model, subscriptions or [])
+                if name is not None:
+                    grouped.setdefault(name, []).append(legacy_model(model))
+            if data["models"] and not grouped:
+                raise ValueError(f"None of the {len(data['models'])} models in {json_path} "
+                                 f"match a configured subscription URL")
+        else:
+            raise ValueError(f"Unrecognized layout in {json_path}: expected 'subscriptions' or 'models'")
+        count = 0
+        for name, models in grouped.items():
+            count += self.upsert_models(name, models)
+        return count
+
+    @metrics.timed("export_json")
+    def export_json(self, json_path):
+        """导出为旧版 data/models.json 格式，先写同目录下的临时文件并 fsync，再原子替换，
+        读取方不会看到写了一半的文件"""
+        directory = os.path.dirname(json_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(json_path) + ".", suffix=".tmp",
+                                        dir=directory or ".")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.load_all(), f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, json_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
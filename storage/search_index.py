@@ -0,0 +1,346 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import metrics
+
+# 变化事件类型：新增或变化的模型命中关注规则
+WATCH_MATCHED = "watch_matched"
+
+# 小写字母数字串为一个词，中日韩文字逐字为词；查询与建索引使用同一套切分
+_TOKEN_PATTERN = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]")
+_CLAUSE_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+# 不同字段（以及各个标签）之间的位置间隔，短语不会跨字段匹配
+FIELD_GAP = 16
+# fetcher 写入的占位内容，不建索引
+PLACEHOLDER_INTRODUCTIONS = {"Not found...", "Not fetched", "Error fetching details", "Error fetching introduction"}
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def parse_query(query):
+    """把查询解析为子句列表，每个子句是一个词元组
+    空格分隔的词之间为"与"；引号中的内容为短语，要求词连续出现。不加引号的 1.5B、Qwen2.5-7B
+    等会被切成多个词，也按短语处理。
+    "context length 1M" -> [("context", "length", "1m")]；MoE 128k -> [("moe",), ("128k",)]
+    """
+    clauses = []
+    for phrase, word in _CLAUSE_PATTERN.findall(query):
+        tokens = tuple(tokenize(phrase or word))
+        if tokens:
+            clauses.append(tokens)
+    return clauses
+
+
+def model_positions(model):
+    """返回模型标题、标签和 introduction 的 {词: [位置]}"""
+    fields = [model.get("title") or ""]
+    fields.extend(model.get("tags") or [])
+    introduction = model.get("introduction")
+    if isinstance(introduction, str) and introduction not in PLACEHOLDER_INTRODUCTIONS:
+        fields.append(introduction)
+
+    positions = {}
+    offset = 0
+    for field in fields:
+        tokens = tokenize(field)
+        for index, token in enumerate(tokens):
+            positions.setdefault(token, []).append(offset + index)
+        offset += len(tokens) + FIELD_GAP
+    return positions
+
+
+def clause_matches(clause, positions):
+    """positions 为 {词: 位置列表或集合}，判断短语子句是否出现"""
+    first = positions.get(clause[0])
+    if not first:
+        return False
+    if len(clause) == 1:
+        return True
+    rest = []
+    for token in clause[1:]:
+        token_positions = positions.get(token)
+        if not token_positions:
+            return False
+        rest.append(token_positions if isinstance(token_positions, set) else set(token_positions))
+    return any(all(start + offset in token_positions for offset, token_positions in enumerate(rest, 1))
+               for start in first)
+
+
+class WatchRule:
+    """关注规则：模型的标题、标签或 introduction 同时包含 query 的全部子句时命中
+    Attributes:
+        subscriptions: 只对这些订阅源生效，为空时对全部订阅源生效
+    """
+
+    def __init__(self, name, query, subscriptions=None):
+        self.name = name
+        self.query = query
+        self.clauses = parse_query(query)
+        if not self.clauses:
+            raise ValueError(f"Watch rule '{name}' has an empty query")
+        self.subscriptions = set(subscriptions) if subscriptions else None
+
+    @classmethod
+    def from_config(cls, rules):
+        return [cls(rule.get("name") or rule["query"], rule["query"], rule.get("subscriptions")) for rule in rules]
+
+    def matches(self, subscription, positions):
+        """只检查这一个模型的词位置，耗时与语料规模无关"""
+        if self.subscriptions is not None and subscription not in self.subscriptions:
+            return False
+        return all(clause_matches(clause, positions) for clause in self.clauses)
+
+
+class SearchIndex:
+    """模型标题、标签和 introduction 的倒排索引，与模型存储共用同一个 SQLite 数据库
+
+    每个模型记录文本哈希，文本未变化的模型不会重建索引；删除或变化时按保存的词列表
+    精确删除旧的倒排项。查询按文档频率从低到高依次求交，后续的词只在候选集合内查找。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS search_docs (
+            doc_id INTEGER PRIMARY KEY,
+            subscription TEXT NOT NULL,
+            title TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            terms TEXT NOT NULL,
+            UNIQUE (subscription, title)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS search_postings (
+            term TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            positions TEXT NOT NULL,
+            PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS search_terms (
+            term TEXT PRIMARY KEY,
+            df INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS watch_matches (
+            rule TEXT NOT NULL,
+            subscription TEXT NOT NULL,
+            title TEXT NOT NULL,
+            matched_at REAL NOT NULL,
+            PRIMARY KEY (rule, subscription, title)
+        ) WITHOUT ROWID
+        """,
+    )
+
+    def __init__(self, db_path="data/models.db", journal_mode="WAL"):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+        # (data_version, 摘要)，数据库未被修改时不重新计算
+        self.cached_fingerprint = (None, None)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @metrics.timed("search_index")
+    def index_models(self, subscription, models, rules=None):
+        """为新增或文本变化的模型更新索引，并用 rules 检查这些模型
+        Args:
+            rules: WatchRule 列表；为 None 时只建索引（如回填已有数据）
+        Returns:
+            list: 首次命中的 (rule, model)，同一规则对同一模型只报告一次
+        """
+        matches = []
+        now = time.time()
+        with self.lock:
+            # 本连接的写入不会改变 data_version
+            self.cached_fingerprint = (None, None)
+            with self.conn:
+                for model in models:
+                    title = model["title"]
+                    positions = model_positions(model)
+                    text_hash = hashlib.sha1(json.dumps(positions, sort_keys=True).encode("utf-8")).hexdigest()
+                    row = self.conn.execute(
+                        "SELECT doc_id, text_hash, terms FROM search_docs WHERE subscription = ? AND title = ?",
+                        (subscription, title),
+                    ).fetchone()
+                    if row is not None and row[1] == text_hash:
+                        continue
+                    if row is not None:
+                        self._delete_postings(row[0], json.loads(row[2]))
+                        self.conn.execute(
+                            "UPDATE search_docs SET text_hash = ?, terms = ? WHERE doc_id = ?",
+                            (text_hash, json.dumps(sorted(positions)), row[0]),
+                        )
+                        doc_id = row[0]
+                    else:
+                        doc_id = self.conn.execute(
+                            "INSERT INTO search_docs (subscription, title, text_hash, terms) VALUES (?, ?, ?, ?)",
+                            (subscription, title, text_hash, json.dumps(sorted(positions))),
+                        ).lastrowid
+                    self.conn.executemany(
+                        "INSERT INTO search_postings (term, doc_id, positions) VALUES (?, ?, ?)",
+                        [(term, doc_id, ",".join(map(str, term_positions)))
+                         for term, term_positions in positions.items()],
+                    )
+                    self.conn.executemany(
+                        "INSERT INTO search_terms (term, df) VALUES (?, 1) "
+                        "ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                        [(term,) for term in positions],
+                    )
+
+                    for rule in rules or ():
+                        if rule.matches(subscription, positions):
+                            inserted = self.conn.execute(
+                                "INSERT OR IGNORE INTO watch_matches (rule, subscription, title, matched_at) "
+                                "VALUES (?, ?, ?, ?)",
+                                (rule.name, subscription, title, now),
+                            ).rowcount
+                            if inserted:
+                                matches.append((rule, model))
+        return matches
+
+    def _delete_postings(self, doc_id, terms):
+        self.conn.executemany("DELETE FROM search_postings WHERE term = ? AND doc_id = ?",
+                              [(term, doc_id) for term in terms])
+        self.conn.executemany("UPDATE search_terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms])
+        self.conn.executemany("DELETE FROM search_terms WHERE term = ? AND df <= 0", [(term,) for term in terms])
+
+    def remove_missing(self, subscription, titles):
+        """删除某订阅源中不在 titles 里的模型的索引
+        Returns:
+            int: 删除的模型数
+        """
+        titles = set(titles)
+        with self.lock:
+            self.cached_fingerprint = (None, None)
+            with self.conn:
+                rows = self.conn.execute(
+                    "SELECT doc_id, title, terms FROM search_docs WHERE subscription = ?", (subscription,)
+                ).fetchall()
+                missing = [(doc_id, terms) for doc_id, title, terms in rows if title not in titles]
+                for doc_id, terms in missing:
+                    self._delete_postings(doc_id, json.loads(terms))
+                self.conn.executemany("DELETE FROM search_docs WHERE doc_id = ?", [(doc_id,) for doc_id, _ in missing])
+        return len(missing)
+
+    def fingerprint(self):
+        """索引内容的摘要（各模型的文本哈希），只取决于数据内容，进程重启后不变"""
+        with self.lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if self.cached_fingerprint[0] == data_version:
+                return self.cached_fingerprint[1]
+            digest = hashlib.sha1()
+            for doc_id, subscription, title, text_hash in self.conn.execute(
+                "SELECT doc_id, subscription, title, text_hash FROM search_docs ORDER BY doc_id"
+            ):
+                digest.update(f"{doc_id}\x1f{subscription}\x1f{title}\x1f{text_hash}\n".encode("utf-8"))
+            self.cached_fingerprint = (data_version, digest.hexdigest())
+            return self.cached_fingerprint[1]
+
+    @metrics.timed("search_query")
+    def search(self, query, subscription=None, limit=50):
+        """全库关键词查询
+        Returns:
+            dict: {"total": 命中数, "results": [{"subscription", "title"}]}，最近建立索引的模型在前
+        """
+        clauses = parse_query(query)
+        terms = sorted({term for clause in clauses for term in clause})
+        if not terms:
+            return {"total": 0, "results": []}
+        # 只有短语中的词需要读取位置
+        phrase_terms = {term for clause in clauses if len(clause) > 1 for term in clause}
+
+        with self.lock:
+            placeholders = ",".join("?" * len(terms))
+            df = dict(self.conn.execute(
+                f"SELECT term, df FROM search_terms WHERE term IN ({placeholders})", terms
+            ).fetchall())
+            if len(df) < len(terms):
+                return {"total": 0, "results": []}
+
+            candidates = None
+            if subscription is not None:
+                candidates = {row[0] for row in self.conn.execute(
+                    "SELECT doc_id FROM search_docs WHERE subscription = ?", (subscription,)
+                )}
+            # 从最少见的词开始求交；候选集合远小于倒排表时只查询候选文档的倒排项
+            postings = {}
+            for term in sorted(terms, key=df.get):
+                column = "doc_id, positions" if term in phrase_terms else "doc_id, NULL"
+                if candidates is not None and len(candidates) * 4 < df[term]:
+                    rows = []
+                    doc_ids = list(candidates)
+                    for start in range(0, len(doc_ids), 500):
+                        batch = doc_ids[start:start + 500]
+                        rows += self.conn.execute(
+                            f"SELECT {column} FROM search_postings WHERE term = ? "
+                            f"AND doc_id IN ({','.join('?' * len(batch))})",
+                            (term, *batch),
+                        ).fetchall()
+                else:
+                    rows = self.conn.execute(
+                        f"SELECT {column} FROM search_postings WHERE term = ?", (term,)
+                    ).fetchall()
+                if term in phrase_terms:
+                    postings[term] = dict(rows)
+                    matched = postings[term].keys()
+                else:
+                    matched = {row[0] for row in rows}
+                candidates = set(matched) if candidates is None else candidates & matched
+                if not candidates:
+                    return {"total": 0, "results": []}
+
+            phrases = [clause for clause in clauses if len(clause) > 1]
+            if phrases:
+                candidates = [
+                    doc_id for doc_id in candidates
+                    if all(clause_matches(clause, {
+                        term: set(map(int, postings[term][doc_id].split(","))) for term in clause
+                    }) for clause in phrases)
+                ]
+
+            # 只为返回的这一页读取订阅源和标题
+            page = sorted(candidates, reverse=True)
+            if limit:
+                page = page[:limit]
+            names = {}
+            for start in range(0, len(page), 500):
+                batch = page[start:start + 500]
+                names.update((row[0], row[1:]) for row in self.conn.execute(
+                    f"SELECT doc_id, subscription, title FROM search_docs WHERE doc_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ))
+
+        return {
+            "total": len(candidates),
+            "results": [{"subscription": names[doc_id][0], "title": names[doc_id][1]} for doc_id in page],
+        }
+
+    def watch_matches(self, rule=None):
+        """返回已记录的规则命中，按时间倒序"""
+        query = "SELECT rule, subscription, title, matched_at FROM watch_matches"
+        params = ()
+        if rule is not None:
+            query += " WHERE rule = ?"
+            params = (rule,)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY matched_at DESC", params).fetchall()
+        return [dict(zip(("rule", "subscription", "title", "matched_at"), row)) for row in rows]
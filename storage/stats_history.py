@@ -0,0 +1,180 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import metrics
+
+# 记录的统计指标，与 model_stats 中的键一致
+METRICS = ("likes", "downloads", "followers")
+
+_COUNT_PATTERN = re.compile(r"^([0-9]*\.?[0-9]+)\s*([kKmMbB]?)$")
+_MULTIPLIERS = {"": 1, "k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+
+
+def parse_count(value):
+    """将 "1.2k"、"876"、876.0、"1,234" 等形式的计数解析为整数，无法解析时返回 None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().replace(",", "")
+    match = _COUNT_PATTERN.match(text)
+    if not match:
+        return None
+    number, suffix = match.groups()
+    return int(round(float(number) * _MULTIPLIERS[suffix.lower()]))
+
+
+class StatsHistory:
+    """model_stats 的追加式时间序列存储
+
+    每次运行每个模型记录一条样本，计数在写入时解析为整数。
+    样本表以 (model_id, ts) 为主键，按时间窗口计算增量和速率只需两次索引查找。
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS stats_models (
+            model_id INTEGER PRIMARY KEY,
+            subscription TEXT NOT NULL,
+            title TEXT NOT NULL,
+            UNIQUE (subscription, title)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stats_samples (
+            model_id INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            likes INTEGER,
+            downloads INTEGER,
+            followers INTEGER,
+            PRIMARY KEY (model_id, ts)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_stats_samples_ts ON stats_samples (ts)",
+    )
+
+    def __init__(self, db_path="data/models.db", journal_mode="WAL"):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+        self.model_ids = {}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _model_id(self, subscription, title):
+        key = (subscription, title)
+        model_id = self.model_ids.get(key)
+        if model_id is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO stats_models (subscription, title) VALUES (?, ?)", key
+            )
+            model_id = self.conn.execute(
+                "SELECT model_id FROM stats_models WHERE subscription = ? AND title = ?", key
+            ).fetchone()[0]
+            self.model_ids[key] = model_id
+        return model_id
+
+    @metrics.timed("stats_record")
+    def record(self, subscription, samples, ts=None):
+        """记录一个订阅源本次运行的统计样本
+        Args:
+            subscription: 订阅源名称
+            samples: {title: model_stats} 字典
+            ts: 样本时间戳（秒），默认为当前时间
+        Returns:
+            int: 写入的样本数
+        """
+        ts = int(ts if ts is not None else time.time())
+        with self.lock:
+            with self.conn:
+                rows = []
+                for title, stats in samples.items():
+                    values = [parse_count((stats or {}).get(metric)) for metric in METRICS]
+                    if all(value is None for value in values):
+                        continue
+                    rows.append((self._model_id(subscription, title), ts, *values))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO stats_samples (model_id, ts, likes, downloads, followers) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def history(self, subscription, title, since=None, until=None):
+        """返回单个模型在时间窗口内的样本列表，按时间升序"""
+        since = int(since) if since is not None else 0
+        until = int(until) if until is not None else int(time.time())
+        with self.lock:
+            rows = self.conn.execute(
+                """
+                SELECT s.ts, s.likes, s.downloads, s.followers
+                FROM stats_samples s JOIN stats_models m ON m.model_id = s.model_id
+                WHERE m.subscription = ? AND m.title = ? AND s.ts BETWEEN ? AND ?
+                ORDER BY s.ts
+                """,
+                (subscription, title, since, until),
+            ).fetchall()
+        return [dict(zip(("ts",) + METRICS, row)) for row in rows]
+
+    def growth(self, metric="likes", since=None, until=None, subscription=None, limit=None):
+        """计算时间窗口内每个模型某指标的增量与速率，按增量降序排列
+        Args:
+            metric: likes / downloads / followers
+            since, until: 时间窗口（秒级时间戳），since 默认为 24 小时前
+            subscription: 只统计指定订阅源
+            limit: 最多返回的模型数
+        Returns:
+            list: 每项包含 subscription、title、start、end、delta、rate_per_day
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        until = int(until) if until is not None else int(time.time())
+        since = int(since) if since is not None else until - 24 * 3600
+
+        query = f"""
+            WITH bounds AS (
+                SELECT model_id, MIN(ts) AS t0, MAX(ts) AS t1
+                FROM stats_samples
+                WHERE ts BETWEEN ? AND ? AND {metric} IS NOT NULL
+                GROUP BY model_id
+                HAVING t1 > t0
+            )
+            SELECT m.subscription, m.title, b.t0, b.t1, s0.{metric}, s1.{metric}
+            FROM bounds b
+            JOIN stats_samples s0 ON s0.model_id = b.model_id AND s0.ts = b.t0
+            JOIN stats_samples s1 ON s1.model_id = b.model_id AND s1.ts = b.t1
+            JOIN stats_models m ON m.model_id = b.model_id
+        """
+        params = [since, until]
+        if subscription is not None:
+            query += " WHERE m.subscription = ?"
+            params.append(subscription)
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        results = []
+        for sub, title, t0, t1, start, end in rows:
+            delta = end - start
+            results.append({
+                "subscription": sub,
+                "title": title,
+                "start": start,
+                "end": end,
+                "delta": delta,
+                "rate_per_day": delta * 86400 / (t1 - t0),
+            })
+        results.sort(key=lambda item: item["delta"], reverse=True)
+        return results[:limit] if limit else results
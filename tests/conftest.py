@@ -0,0 +1,87 @@
+import logging
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.stand_in_server import StandInState, make_server  # noqa: E402
+
+
+@pytest.fixture
+def stand_in():
+    """启动本地替身站点，返回 start(**StandInState 参数) -> (state, base_url)，测试结束后关闭"""
+    servers = []
+
+    def start(**kwargs):
+        state = StandInState(**kwargs)
+        server = make_server(state)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return state, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_fetcher(tmp_path, monkeypatch):
+    """按给定订阅源和 fetcher 配置创建指向临时目录的 HuggingFaceModelFetcher"""
+    from fetcher.fetcher import HuggingFaceModelFetcher
+
+    # 不导入仓库中的 data/models.json 等相对路径文件
+    monkeypatch.chdir(tmp_path)
+    fetchers = []
+
+    def make(subscriptions, fetcher_settings=None, **sections):
+        config = {
+            "subscriptions": subscriptions,
+            "fetcher": {"requests_per_second": 1_000_000, "burst": 16, **(fetcher_settings or {})},
+            "http_cache": {"directory": str(tmp_path / "http_cache")},
+            "storage": {"database": str(tmp_path / "models.db"), "journal": str(tmp_path / "journal.ndjson")},
+        }
+        config.update(sections)
+        fetcher = HuggingFaceModelFetcher(config)
+        fetcher.logger.setLevel(logging.WARNING)
+        fetchers.append(fetcher)
+        return fetcher
+
+    yield make
+    for fetcher in fetchers:
+        fetcher.close()
+
+
+@pytest.fixture
+def make_scheduler(tmp_path, monkeypatch):
+    """写入指向临时目录的配置文件并创建 ModelScheduler，测试结束后关闭"""
+    import json
+
+    from scheduler.scheduler import ModelScheduler
+
+    monkeypatch.chdir(tmp_path)
+    schedulers = []
+
+    def make(subscriptions, scheduler_settings=None, **sections):
+        config = {
+            "subscriptions": subscriptions,
+            "fetcher": {"requests_per_second": 1_000_000, "burst": 16},
+            "http_cache": {"directory": str(tmp_path / "http_cache")},
+            "storage": {"database": str(tmp_path / "models.db"), "journal": str(tmp_path / "journal.ndjson")},
+            "scheduler": {"state_file": str(tmp_path / "state.json"), **(scheduler_settings or {})},
+        }
+        config.update(sections)
+        config_path = tmp_path / "config.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        scheduler = ModelScheduler(str(config_path))
+        scheduler.logger.setLevel(logging.WARNING)
+        scheduler.fetcher.logger.setLevel(logging.WARNING)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+import analyzer.analyzer as analyzer_module
+from analyzer.analyzer import Analyzer
+from fetcher.change_detector import ADDED, REMOVED, UPDATED
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, content, **options):
+        self.calls.append(content)
+        return f"summary: {content.split('.')[0]}"
+
+
+@pytest.fixture
+def fake_summarizer(monkeypatch):
+    summarizer = FakeSummarizer()
+    monkeypatch.setattr(analyzer_module, "_load_summarizer", lambda options: summarizer)
+    return summarizer
+
+
+def test_summaries_are_deduplicated_and_cached(tmp_path, fake_summarizer):
+    analyzer = Analyzer(cache_path=str(tmp_path / "cache.db"))
+    assert analyzer.summarize_many(["A. x", "B. y", "A. x"]) == ["summary: A", "summary: B", "summary: A"]
+    assert fake_summarizer.calls == ["A. x", "B. y"]
+    analyzer.close()
+
+    analyzer = Analyzer(cache_path=str(tmp_path / "cache.db"))
+    assert analyzer.summarize_many(["B. y"]) == ["summary: B"]
+    assert fake_summarizer.calls == ["A. x", "B. y"]
+    analyzer.close()
+
+
+def test_analyze_changes_skips_placeholders_and_unchanged(tmp_path, fake_summarizer):
+    analyzer = Analyzer(cache_path=str(tmp_path / "cache.db"))
+    events = [
+        {"type": ADDED, "title": "a", "model": {"introduction": "Real text. More."}},
+        {"type": ADDED, "title": "b", "model": {"introduction": "Not fetched"}},
+        {"type": UPDATED, "title": "c", "model": {"introduction": "Not found..."}},
+        {"type": REMOVED, "title": "d", "model": {"introduction": "Gone. Text."}},
+    ]
+    assert analyzer.analyze_changes(events) == {"a": "summary: Real text"}
+    analyzer.close()
+
+
+def test_scheduler_check_summarizes_fetched_introductions(tmp_path, monkeypatch, stand_in, fake_summarizer):
+    from scheduler.scheduler import ModelScheduler
+
+    _, base_url = stand_in(org="org", models=5, page_kb=4)
+    subscription = {"name": "org", "url": f"{base_url}/org", "type": "api"}
+    config = {
+        "subscriptions": [subscription],
+        "fetcher": {"requests_per_second": 1_000_000, "burst": 16},
+        "http_cache": {"directory": str(tmp_path / "http_cache")},
+        "storage": {"database": str(tmp_path / "models.db"), "journal": str(tmp_path / "journal.ndjson")},
+        "scheduler": {"state_file": str(tmp_path / "state.json")},
+        "analyzer": {"enabled": True, "cache": {"path": str(tmp_path / "summaries.db")}},
+    }
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    scheduler = ModelScheduler(str(config_path))
+    try:
+        assert scheduler.check_subscription(subscription) == 5
+        models = scheduler.fetcher.model_store.get_subscription_models("org")
+    finally:
+        scheduler.close()
+    assert len(fake_summarizer.calls) == 5
+    for title, model in models.items():
+        assert model["introduction"].startswith(f"We introduce{title}")
+        assert model["summary"] == f"summary: We introduce{title}, a synthetic benchmark model"
+
+
+def test_enabling_fetch_introduction_backfills_existing_models(stand_in, make_fetcher):
+    _, base_url = stand_in(org="org", models=4, page_kb=4)
+    subscriptions = [{"name": "org", "url": f"{base_url}/org", "type": "api"}]
+
+    fetcher = make_fetcher(subscriptions, {"fetch_introduction": False})
+    models = fetcher.fetch()["subscriptions"]["org"]
+    assert {model["introduction"] for model in models.values()} == {"Not fetched"}
+    fetcher.close()
+
+    fetcher = make_fetcher(subscriptions)
+    models = fetcher.fetch()["subscriptions"]["org"]
+    assert all(model["introduction"].startswith("We introduce") for model in models.values())
+    # 补抓之后不再重复抓取
+    assert fetcher.model_store.get_subscription_index("org")["org/model-00000"]["introduction_pending"] is False
+
+
+def test_backfilled_introductions_are_summarized(stand_in, make_scheduler, fake_summarizer):
+    _, base_url = stand_in(org="org", models=3, page_kb=4)
+    subscription = {"name": "org", "url": f"{base_url}/org", "type": "api"}
+    analyzer = {"enabled": True, "cache": {"path": "summaries.db"}}
+    fetcher = {"requests_per_second": 1_000_000, "burst": 16}
+
+    scheduler = make_scheduler([subscription], fetcher={**fetcher, "fetch_introduction": False}, analyzer=analyzer)
+    assert scheduler.check_subscription(subscription) == 3
+    assert fake_summarizer.calls == []
+    scheduler.close()
+
+    scheduler = make_scheduler([subscription], fetcher=fetcher, analyzer=analyzer)
+    # 补抓 Introduction 的模型以 updated 事件报告
+    assert scheduler.check_subscription(subscription) == 3
+    events = scheduler.fetcher.changes["org"]
+    assert {(e["type"], e.get("reason")) for e in events} == {(UPDATED, "introduction_backfill")}
+    models = scheduler.fetcher.model_store.get_subscription_models("org")
+    assert len(fake_summarizer.calls) == 3
+    assert all(model["summary"].startswith("summary: We introduce") for model in models.values())
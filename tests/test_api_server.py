@@ -0,0 +1,70 @@
+import pytest
+
+from api.server import create_app
+from storage.model_store import ModelStore
+from storage.search_index import SearchIndex
+
+
+def model(title, likes, introduction="A context length of 128K tokens.", tags=()):
+    return {"title": title, "link": f"https://hub/{title}", "tags": list(tags),
+            "model_stats": {"likes": likes}, "introduction": introduction}
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "models.db")
+    store = ModelStore(path)
+    search_index = SearchIndex(path)
+    models = [model("org/a", 10, tags=["moe"]), model("org/b", 200), model("org/c", 3, "Small model.")]
+    store.upsert_models("org", models)
+    search_index.index_models("org", models)
+    yield path, store, search_index
+    store.close()
+    search_index.close()
+
+
+def client(path):
+    app = create_app({"storage": {"database": path}, "api": {"refresh_interval_seconds": 0}})
+    return app.test_client()
+
+
+def test_filters_and_pagination(database):
+    api = client(database[0])
+    assert api.get("/api/subscriptions").json == {"subscriptions": [{"name": "org", "models": 3}]}
+    data = api.get("/api/models?likes_min=5&per_page=1&page=2").json
+    assert data["total"] == 2 and [m["title"] for m in data["models"]] == ["org/b"]
+    assert [m["title"] for m in api.get("/api/models?tag=moe").json["models"]] == ["org/a"]
+    assert api.get("/api/models/org/org/c").json["introduction"] == "Small model."
+    assert api.get("/api/models/org/missing").status_code == 404
+    assert api.get("/api/models?page=0").status_code == 400
+
+
+def test_etag_survives_restart_and_changes_with_content(database):
+    path, store, _ = database
+    first = client(path).get("/api/models")
+    # 新进程中的 API：内容未变，客户端持有的 ETag 仍然有效
+    restarted = client(path)
+    assert restarted.get("/api/models", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    # API 停止期间数据发生变化：重启后不能返回过期的 304
+    store.upsert_models("org", [model("org/a", 11, tags=["moe"])])
+    response = client(path).get("/api/models", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.json["models"][0]["model_stats"]["likes"] == 11
+    assert restarted.get("/api/models").headers["ETag"] == response.headers["ETag"]
+
+
+def test_search_etag_follows_search_index(database):
+    path, store, search_index = database
+    api = client(path)
+    first = api.get("/api/search?q=%22context+length%22")
+    assert [r["title"] for r in first.json["results"]] == ["org/b", "org/a"]
+    etag = first.headers["ETag"]
+    assert client(path).get("/api/search?q=%22context+length%22",
+                            headers={"If-None-Match": etag}).status_code == 304
+
+    # 只有搜索索引变化（模型存储未变）时，ETag 也必须变化
+    search_index.index_models("org", [model("org/c", 3, "Now with a context length of 1M.")])
+    response = api.get("/api/search?q=%22context+length%22", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json["total"] == 3
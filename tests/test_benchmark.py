@@ -0,0 +1,27 @@
+from benchmark.run_benchmark import compare_introductions, run_scenario
+
+
+def test_scenario_reports_cold_and_warm_runs(stand_in, tmp_path, monkeypatch):
+    # run_scenario 会切换到临时工作目录，测试结束后恢复
+    monkeypatch.chdir(tmp_path)
+    _, base_url = stand_in(org="bench-org", models=5, page_kb=4)
+    runs, introductions = run_scenario([("bench-org", base_url)], "api", "stream", concurrency=4, runs=2,
+                                       fetch_introduction=True)
+    cold, warm = runs
+    assert cold["run"] == "cold" and cold["models_collected"] == 5 and cold["details_fetched"] == 5
+    assert cold["requests"] > warm["requests"] and warm["details_fetched"] == 0
+    assert warm["models_collected"] == 5
+    # diff 阶段计时的是每张卡片的比较和一次删除检测，而不是读取已知模型索引
+    assert cold["stages"]["diff"]["calls"] == 5 + 1
+    assert cold["stages"]["known_index"]["calls"] == 1
+    assert len(introductions) == 5
+    assert all(text.startswith("We introduce") for text in introductions.values())
+
+
+def test_introduction_parity_ignores_whitespace():
+    parity = compare_introductions({
+        "page": {"a": "We introduce x.", "b": "Not found...", "c": "One"},
+        "raw": {"a": "We introduce  x .", "b": "Not found...", "c": "Two"},
+    })
+    assert parity["mismatches"] == 1 and parity["examples"][0]["title"] == "c"
+    assert parity["not_found"] == {"page": 1, "raw": 1}
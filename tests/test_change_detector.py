@@ -0,0 +1,110 @@
+from fetcher.change_detector import (
+    ADDED, FETCH, REFRESH, REMOVED, RENAMED, STATS_CHANGED, UPDATED, ChangeDetector, card_hash,
+)
+
+
+def card(title, time="2025-03-01", model_id=None, likes=None):
+    result = {"title": title, "link": f"https://hub/{title}", "time": time}
+    if model_id:
+        result["model_id"] = model_id
+    if likes is not None:
+        result["model_stats"] = {"likes": likes}
+    return result
+
+
+def known(*cards):
+    return {c["title"]: {"card_hash": card_hash(c), "model_id": c.get("model_id"),
+                         "model_stats": c.get("model_stats")} for c in cards}
+
+
+def events(diff):
+    return sorted((event["type"], event["title"]) for event in diff.events)
+
+
+def test_card_hash_ignores_stats():
+    assert card_hash(card("org/a", likes=1)) == card_hash(card("org/a", likes=2))
+    assert card_hash(card("org/a")) != card_hash(card("org/a", time="2025-03-02"))
+
+
+def test_diff_classifies_every_kind_of_change():
+    existing = known(card("org/same", likes=1), card("org/stats", likes=1), card("org/updated"),
+                     card("org/gone"), card("org/old-name", model_id="id-1"))
+    cards = [card("org/same", likes=1), card("org/stats", likes=5), card("org/updated", time="2025-04-01"),
+             card("org/new"), card("org/new-name", model_id="id-1")]
+    diff = ChangeDetector().diff("org", existing, cards)
+    assert events(diff) == [
+        (ADDED, "org/new"), (REMOVED, "org/gone"), (RENAMED, "org/new-name"),
+        (STATS_CHANGED, "org/stats"), (UPDATED, "org/updated"),
+    ]
+    assert sorted(c["title"] for c in diff.fetch) == ["org/new", "org/new-name", "org/updated"]
+    assert [c["title"] for c in diff.refresh] == ["org/stats"]
+    assert diff.unchanged == 1
+    renamed = [e for e in diff.events if e["type"] == RENAMED][0]
+    assert renamed["old_title"] == "org/old-name"
+    stats = [e for e in diff.events if e["type"] == STATS_CHANGED][0]
+    assert stats["changes"] == {"likes": {"old": 1, "new": 5}}
+
+
+def test_same_model_id_still_listed_is_an_addition():
+    existing = known(card("org/a", model_id="id-1"))
+    diff = ChangeDetector().diff("org", existing, [card("org/a", model_id="id-1"), card("org/b", model_id="id-1")])
+    assert events(diff) == [(ADDED, "org/b")]
+
+
+def test_legacy_rows_without_hash_are_refreshed_not_refetched():
+    diff = ChangeDetector().diff("org", {"org/a": {"model_stats": None}}, [card("org/a")])
+    assert diff.events == [] and [c["title"] for c in diff.refresh] == ["org/a"] and diff.fetch == []
+
+
+def test_card_without_time_keeps_the_stored_hash():
+    stored = card("org/a")
+    browser_card = {"title": "org/a", "link": stored["link"]}
+    diff = ChangeDetector().diff("org", known(stored), [browser_card])
+    assert diff.events == [] and diff.fetch == [] and diff.unchanged == 1
+    assert browser_card["card_hash"] == card_hash(stored)
+
+
+def test_streaming_diff_routes_cards_without_keeping_them():
+    stream = ChangeDetector().stream("org", known(card("org/a"), card("org/b", likes=1)))
+    assert stream.feed(card("org/a")) is None
+    assert stream.feed(card("org/b", likes=2)) == REFRESH
+    assert stream.feed(card("org/c")) == FETCH
+    stream.finish()
+    assert stream.fetch == [] and stream.refresh == []
+    assert stream.count(ADDED, STATS_CHANGED) == 2 and stream.count(REMOVED) == 0
+
+
+def test_unchanged_models_are_not_refetched(stand_in, make_fetcher):
+    state, base_url = stand_in(org="org", models=5, page_kb=4)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api"}])
+    fetcher.fetch()
+    state.reset()
+    fetcher.fetch()
+    # 只请求列表，不重新抓取任何详情
+    assert state.counters["requests"] == 1
+    assert fetcher.changes["org"] == []
+
+
+def test_listing_source_switch_does_not_refetch(stand_in, make_fetcher, monkeypatch):
+    state, base_url = stand_in(org="org", models=3, page_kb=4)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api"}])
+    fetcher.fetch()
+
+    # api 列表失败一次，回退到浏览器：浏览器得到的卡片只有标题和链接
+    def failing_listing(url, listing_type):
+        raise RuntimeError("listing down")
+        yield
+
+    def browser_cards(name, url):
+        return [{"title": f"org/model-{i:05d}", "link": f"{base_url}/org/model-{i:05d}"} for i in range(3)]
+
+    with monkeypatch.context() as patch:
+        patch.setattr(fetcher.listing, "iter_models", failing_listing)
+        patch.setattr(fetcher, "list_models_with_browser", browser_cards)
+        state.reset()
+        fetcher.fetch()
+        assert fetcher.changes["org"] == [] and state.counters["requests"] == 0
+
+    state.reset()
+    fetcher.fetch()
+    assert fetcher.changes["org"] == [] and state.counters["requests"] == 1
@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+
+import fetcher.driver_pool as driver_pool
+from fetcher.driver_pool import PooledDriver, WebDriverPool
+
+
+def make_pool(caplog, **kwargs):
+    logger = logging.getLogger("test_driver_pool")
+    with caplog.at_level(logging.WARNING, logger="test_driver_pool"):
+        pool = WebDriverPool(logger, **kwargs)
+    pool.shutdown()
+    return pool
+
+
+def test_warns_when_rss_limit_cannot_be_enforced(monkeypatch, caplog):
+    monkeypatch.setattr(driver_pool, "psutil", None)
+    make_pool(caplog, max_rss_mb=512)
+    assert "psutil is not installed: max_rss_mb=512 is not enforced" in caplog.text
+
+    caplog.clear()
+    make_pool(caplog, max_rss_mb=0)
+    assert caplog.text == ""
+
+
+def test_no_warning_with_psutil(monkeypatch, caplog):
+    monkeypatch.setattr(driver_pool, "psutil", object())
+    make_pool(caplog, max_rss_mb=512)
+    assert caplog.text == ""
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """创建用假浏览器代替 Chrome 的浏览器池，started 记录启动过的浏览器"""
+    monkeypatch.setattr(driver_pool, "psutil", None)
+    pool = WebDriverPool(logging.getLogger("test_driver_pool"), size=1, max_pages=3, max_rss_mb=100)
+    pool.started = []
+
+    def create_driver():
+        pooled = PooledDriver(FakeDriver(), 1)
+        pool.started.append(pooled)
+        return pooled
+
+    monkeypatch.setattr(pool, "create_driver", create_driver)
+    yield pool
+    pool.shutdown()
+
+
+def test_browser_starts_lazily_and_is_reused(pool):
+    assert pool.started == []
+    for _ in range(2):
+        with pool.acquire() as pooled:
+            assert pooled is pool.started[0]
+    assert len(pool.started) == 1 and pool.started[0].pages == 2
+
+
+def test_browser_is_recycled_after_max_pages(pool):
+    for _ in range(4):
+        with pool.acquire():
+            pass
+    assert len(pool.started) == 2
+    assert pool.started[0].driver.quit_called and not pool.started[1].driver.quit_called
+
+
+def test_browser_is_recycled_over_rss_limit(pool):
+    with pool.acquire() as pooled:
+        pooled.rss_mb = lambda: 150.0
+    with pool.acquire() as pooled:
+        assert pooled is pool.started[1]
+    assert pool.started[0].driver.quit_called
+
+
+def test_dead_browser_is_replaced(pool):
+    with pool.acquire() as pooled:
+        pass
+    pooled.driver.alive = False
+    with pool.acquire() as replacement:
+        assert replacement is not pooled
+    assert pooled.driver.quit_called and pool.created == 1
+
+
+def test_shut_down_pool_rejects_acquire(pool):
+    with pool.acquire():
+        pass
+    pool.shutdown()
+    assert pool.started[0].driver.quit_called
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
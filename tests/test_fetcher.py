@@ -0,0 +1,56 @@
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException
+
+
+def fetch_time(stand_in, make_fetcher, subscription_workers):
+    subscriptions = []
+    for i in range(4):
+        _, base_url = stand_in(org=f"org{i}", models=1, page_kb=4, latency=0.2)
+        subscriptions.append({"name": f"org{i}", "url": f"{base_url}/org{i}", "type": "api"})
+    fetcher = make_fetcher(subscriptions, {"max_concurrency": 4,
+                                           "pipeline": {"subscription_workers": subscription_workers}})
+    started = time.monotonic()
+    data = fetcher.fetch()
+    assert sorted(data["subscriptions"]) == ["org0", "org1", "org2", "org3"]
+    assert all(len(models) == 1 for models in data["subscriptions"].values())
+    return time.monotonic() - started
+
+
+def test_subscriptions_are_listed_in_parallel(stand_in, make_fetcher):
+    serial = fetch_time(stand_in, make_fetcher, subscription_workers=1)
+    parallel = fetch_time(stand_in, make_fetcher, subscription_workers=4)
+    assert parallel < serial * 0.7
+
+
+class FakeWait:
+    def until(self, condition):
+        raise TimeoutException("no div#models")
+
+
+class FakeDriver:
+    def __init__(self):
+        self.loaded = []
+
+    def get(self, url):
+        self.loaded.append(url)
+
+
+def test_org_page_is_loaded_once_by_the_browser(stand_in, make_fetcher, monkeypatch):
+    state, base_url = stand_in(org="org", models=3)
+    subscription = {"name": "org", "url": f"{base_url}/org", "type": "html"}
+    fetcher = make_fetcher([subscription], {"retry": {"subscription_attempts": 1}})
+    driver = FakeDriver()
+
+    @contextmanager
+    def acquire():
+        yield type("Pooled", (), {"driver": driver, "wait": FakeWait()})()
+
+    monkeypatch.setattr(fetcher.driver_pool, "acquire", acquire)
+    data = fetcher.fetch()
+    # 缺少 div#models 时报告失败，而不是返回空列表
+    assert "org" not in data["subscriptions"]
+    assert driver.loaded == [subscription["url"]]
+    # 存在性检查不再额外通过 HTTP 下载组织页面
+    assert state.counters["requests"] == 0
@@ -0,0 +1,104 @@
+import json
+import multiprocessing
+import os
+import threading
+
+from fetcher.http_cache import HTTPCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+
+
+class FakeSession:
+    """每个 URL 的 ETag 固定，带 If-None-Match 时返回 304"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests += 1
+        etag = f'"{url}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return FakeResponse(304, b"")
+        return FakeResponse(200, f"body of {url}".encode(), {"ETag": etag, "Link": "<next>"})
+
+
+def test_not_modified_response_uses_cached_body(tmp_path):
+    cache = HTTPCache(FakeSession(), directory=str(tmp_path))
+    assert cache.get("http://hub/a").not_modified is False
+    cache.store_parsed("http://hub/a", "cards", [1])
+    cache.save()
+
+    reloaded = HTTPCache(FakeSession(), directory=str(tmp_path))
+    response = reloaded.get("http://hub/a")
+    assert response.not_modified and response.text == "body of http://hub/a"
+    assert response.headers["Link"] == "<next>"
+    assert reloaded.get_parsed("http://hub/a", "cards") == [1]
+
+
+def test_lru_eviction_keeps_total_under_limit(tmp_path):
+    cache = HTTPCache(FakeSession(), directory=str(tmp_path), max_bytes=30)
+    for name in "abc":
+        cache.get(f"http://hub/{name}")
+    assert list(cache.entries) == ["http://hub/c"]
+    assert cache.stats["evictions"] == 2
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".body")]) == 1
+
+
+def test_concurrent_saves_do_not_race(tmp_path):
+    cache = HTTPCache(FakeSession(), directory=str(tmp_path))
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                cache.get(f"http://hub/{n}/{i}")
+                cache.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    with open(tmp_path / "index.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 160
+
+
+def test_instances_sharing_a_directory_merge_their_indexes(tmp_path):
+    first = HTTPCache(FakeSession(), directory=str(tmp_path))
+    second = HTTPCache(FakeSession(), directory=str(tmp_path))
+    first.get("http://hub/a")
+    second.get("http://hub/b")
+    first.save()
+    second.save()
+    # 第二个实例写回时保留第一个实例的条目，并把它并入自己的内存索引
+    assert set(second.entries) == {"http://hub/a", "http://hub/b"}
+    assert set(HTTPCache(FakeSession(), directory=str(tmp_path)).entries) == {"http://hub/a", "http://hub/b"}
+
+
+def _worker_process(directory, worker):
+    cache = HTTPCache(FakeSession(), directory=directory)
+    for i in range(25):
+        cache.get(f"http://hub/{worker}/{i}")
+        if i % 5 == 4:
+            cache.save()
+
+
+def test_worker_processes_sharing_a_directory_keep_all_entries(tmp_path):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_worker_process, args=(str(tmp_path), n)) for n in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert len(HTTPCache(FakeSession(), directory=str(tmp_path)).entries) == 100
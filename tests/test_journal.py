@@ -0,0 +1,58 @@
+import json
+
+import fetcher.journal as journal_module
+from fetcher.journal import MODEL_DONE, RunJournal
+
+
+def test_models_done_appends_a_batch_with_one_fsync(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(journal_module.os, "fsync", lambda fd: calls.append(fd))
+    journal = RunJournal(str(tmp_path / "journal.ndjson"))
+    journal.start()
+    calls.clear()
+    journal.models_done("org", [{"title": f"org/m{i}"} for i in range(20)])
+    journal.models_done("org", [])
+    assert len(calls) == 1
+    journal.close()
+
+    with open(tmp_path / "journal.ndjson", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["type"] for record in records[1:]] == [MODEL_DONE] * 20
+
+
+def test_interrupted_run_is_resumed_and_torn_line_ignored(tmp_path):
+    path = tmp_path / "journal.ndjson"
+    journal = RunJournal(str(path), fsync=False)
+    journal.start(run_ts=100)
+    journal.models_done("a", [{"title": "a/1"}])
+    journal.subscription_done("a")
+    journal.models_done("b", [{"title": "b/1", "likes": 1}])
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "model_done", "subscri')
+
+    resumed = RunJournal(str(path), fsync=False)
+    assert resumed.start(resume=True) is True
+    assert resumed.run_ts == 100
+    assert resumed.is_subscription_done("a")
+    assert resumed.completed_models("b") == {"b/1": {"title": "b/1", "likes": 1}}
+    resumed.models_done("b", [{"title": "b/2"}])
+    resumed.finish()
+    assert not path.exists()
+
+
+def test_resumed_fetch_skips_completed_subscriptions(tmp_path, stand_in, make_fetcher):
+    done_state, done_url = stand_in(org="done", models=3, page_kb=4)
+    _, todo_url = stand_in(org="todo", models=3, page_kb=4)
+    subscriptions = [{"name": "done", "url": f"{done_url}/done", "type": "api"},
+                     {"name": "todo", "url": f"{todo_url}/todo", "type": "api"}]
+    journal = RunJournal(str(tmp_path / "journal.ndjson"))
+    journal.start()
+    journal.subscription_done("done")
+    journal.close()
+
+    fetcher = make_fetcher(subscriptions)
+    result = fetcher.fetch(resume=True)
+    assert done_state.counters["requests"] == 0
+    assert len(result["subscriptions"]["todo"]) == 3
+    assert not (tmp_path / "journal.ndjson").exists()
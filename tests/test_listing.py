@@ -0,0 +1,54 @@
+import pytest
+
+from fetcher.listing import split_org_url
+
+
+def test_split_org_url():
+    assert split_org_url("https://huggingface.co/deepseek-ai/") == ("https://huggingface.co", "deepseek-ai")
+
+
+def test_api_listing_follows_link_pagination(stand_in, make_fetcher):
+    state, base_url = stand_in(org="org", models=25)
+    fetcher = make_fetcher([], {"listing": {"page_size": 10}})
+    cards = list(fetcher.listing.iter_models(f"{base_url}/org", "api"))
+    assert [card["title"] for card in cards] == [f"org/model-{i:05d}" for i in range(25)]
+    assert state.counters["requests"] == 3
+    assert cards[1] == {
+        "title": "org/model-00001", "link": f"{base_url}/org/model-00001", "time": "2025-03-02T00:00:00.000Z",
+        "tags": ["transformers", "family-1"], "model_stats": {"likes": 37, "downloads": 370},
+    }
+
+
+def test_next_page_is_requested_only_when_consumed(stand_in, make_fetcher):
+    state, base_url = stand_in(org="org", models=25)
+    fetcher = make_fetcher([], {"listing": {"page_size": 10}})
+    cards = fetcher.listing.iter_models(f"{base_url}/org", "api")
+    for _ in range(10):
+        next(cards)
+    assert state.counters["requests"] == 1
+    next(cards)
+    assert state.counters["requests"] == 2
+
+
+def test_html_pages_listing_stops_at_empty_page(stand_in, make_fetcher):
+    state, base_url = stand_in(org="org", models=45)
+    fetcher = make_fetcher([])
+    cards = list(fetcher.listing.iter_models(f"{base_url}/org", "html_pages"))
+    assert [card["title"] for card in cards] == [f"org/model-{i:05d}" for i in range(45)]
+    assert cards[0]["link"] == f"{base_url}/org/model-00000"
+    assert cards[0]["time"] == "2025-03-01T00:00:00"
+    # 两页数据 + 一个空页
+    assert state.counters["requests"] == 3
+
+
+def test_unsupported_listing_type_is_rejected(make_fetcher):
+    with pytest.raises(ValueError):
+        make_fetcher([]).listing.iter_models("https://huggingface.co/org", "browser")
+
+
+@pytest.mark.parametrize("listing_type", ["api", "html_pages"])
+def test_listing_modes_never_start_a_browser(stand_in, make_fetcher, listing_type):
+    _, base_url = stand_in(org="org", models=5, page_kb=4)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": listing_type}])
+    assert len(fetcher.fetch()["subscriptions"]["org"]) == 5
+    assert fetcher.driver_pool.created == 0
@@ -0,0 +1,127 @@
+import os
+import threading
+
+import pytest
+import requests
+
+from metrics import metrics
+from metrics.metrics import MetricsRegistry
+from scheduler.scheduler import worker_metrics_settings
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry(buckets=(0.1, 1))
+    yield registry.configure({"enabled": True})
+    registry.shutdown()
+
+
+@pytest.fixture
+def global_metrics():
+    """启用进程级注册表，测试结束后恢复为关闭状态"""
+    metrics.REGISTRY.reset()
+    metrics.REGISTRY.enabled = True
+    yield metrics.REGISTRY
+    metrics.REGISTRY.enabled = False
+    metrics.REGISTRY.reset()
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry().configure({"enabled": False})
+
+    @registry.timed("stage")
+    def work():
+        return 42
+
+    assert work() == 42
+    with registry.timer("stage"):
+        registry.inc("requests_total")
+        registry.set_gauge("depth", 3)
+    assert registry.render() == "\n"
+
+
+def test_render_uses_prometheus_text_format(registry):
+    registry.observe("parse", 0.05)
+    registry.observe("parse", 0.5)
+    registry.observe("parse", 5)
+    registry.inc("http_requests_total", status=200)
+    registry.inc("http_requests_total", 2, status=200)
+    registry.set_gauge("queue_depth", 7, queue='a"b')
+    assert registry.render().splitlines() == [
+        "# TYPE llminfo_stage_seconds histogram",
+        'llminfo_stage_seconds_bucket{stage="parse",le="0.1"} 1',
+        'llminfo_stage_seconds_bucket{stage="parse",le="1.0"} 2',
+        'llminfo_stage_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'llminfo_stage_seconds_sum{stage="parse"} 5.55',
+        'llminfo_stage_seconds_count{stage="parse"} 3',
+        "# TYPE llminfo_http_requests_total counter",
+        'llminfo_http_requests_total{status="200"} 3',
+        "# TYPE llminfo_queue_depth gauge",
+        'llminfo_queue_depth{queue="a\\"b"} 7',
+    ]
+
+
+def test_timer_counts_errors(registry):
+    @registry.timed("fetch")
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        fail()
+    assert 'llminfo_errors_total{stage="fetch"} 1' in registry.render()
+    assert 'llminfo_stage_seconds_count{stage="fetch"} 1' in registry.render()
+
+
+def test_dump_and_serve(registry, tmp_path):
+    registry.inc("runs_total")
+    path = registry.dump(str(tmp_path / "metrics" / "metrics.prom"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == registry.render()
+
+    server = registry.serve("127.0.0.1", 0)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    response = requests.get(f"{base_url}/metrics", timeout=5)
+    assert response.status_code == 200 and "llminfo_runs_total 1" in response.text
+    assert requests.get(f"{base_url}/other", timeout=5).status_code == 404
+
+
+def test_worker_metrics_settings_are_offset_per_worker():
+    settings = {"enabled": True, "port": 9108, "dump_file": "data/metrics.prom"}
+    assert worker_metrics_settings(settings, None) is settings
+    assert worker_metrics_settings(settings, 2) == {"enabled": True, "port": 9110, "dump_file": "data/metrics.2.prom"}
+
+
+def test_fetch_records_stage_timings(global_metrics, stand_in, make_fetcher):
+    _, base_url = stand_in(org="org", models=3, page_kb=4)
+    subscription = {"name": "org", "url": f"{base_url}/org", "type": "api"}
+    fetcher = make_fetcher([subscription])
+    fetcher.fetch()
+    text = global_metrics.render()
+    for stage in ("fetch", "http_request", "store_upsert", "stats_record", "discovery_to_persist"):
+        assert f'llminfo_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'llminfo_http_requests_total{status="200"} 4' in text
+
+    # 定时检查逐个订阅源抓取
+    fetcher.fetch_subscription(subscription)
+    assert 'llminfo_stage_seconds_count{stage="fetch_subscription"} 1' in global_metrics.render()
+
+
+def test_concurrent_dumps_do_not_clash(registry, tmp_path):
+    path = str(tmp_path / "metrics.prom")
+    errors = []
+
+    def dump():
+        try:
+            for _ in range(50):
+                registry.inc("dumps_total")
+                registry.dump(path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=dump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert os.listdir(tmp_path) == ["metrics.prom"]
@@ -0,0 +1,149 @@
+import logging
+
+import pytest
+
+from fetcher.http_cache import HTTPCache
+from fetcher.model_card import RawModelCard, ReadmeIntroductionParser
+from fetcher.parser import NOT_FOUND
+
+README = (
+    "---\nlicense: mit\n---\n"
+    "# Model\n\n<p align=\"center\"><img src=\"logo.svg\"></p>\n\n"
+    "## 1. Introduction\n\n"
+    "We introduce **Model**, a [synthetic](http://x) model.\n"
+    "It continues here.\n\n"
+    "- a list item\n\n"
+    "```\n## 2. Model Summary\n```\n\n"
+    "Second paragraph.\n\n"
+    "### 1.1 Model Summary\n\nThird paragraph.\n\n"
+    "## 2. Model Summary\n\nSummary text.\n"
+)
+EXPECTED = "We introduce Model, a synthetic model. It continues here.\nSecond paragraph.\nThird paragraph."
+
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """按 Range 头返回 206 的最小会话，ranged=False 时模拟忽略 Range 的服务器"""
+
+    def __init__(self, bodies, ranged=True):
+        self.bodies = bodies
+        self.ranged = ranged
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append(headers)
+        body = self.bodies.get(url)
+        if body is None:
+            return FakeResponse(404, b"Not Found")
+        etag = '"%d"' % hash(body)
+        if headers.get("If-None-Match") == etag:
+            return FakeResponse(304, b"", {"ETag": etag})
+        end = headers.get("Range", "").rpartition("-")[2]
+        if self.ranged and end.isdigit() and int(end) + 1 < len(body):
+            return FakeResponse(206, body[:int(end) + 1],
+                                {"ETag": etag, "Content-Range": f"bytes 0-{end}/{len(body)}"})
+        return FakeResponse(200, body, {"ETag": etag})
+
+
+def parse(text, chunk):
+    parser = ReadmeIntroductionParser()
+    data = text.encode("utf-8")
+    for start in range(0, len(data), chunk):
+        if parser.feed(data[start:start + chunk]):
+            break
+    return parser.finish()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 100000])
+def test_readme_parser_matches_page_rules_for_any_chunking(chunk):
+    assert parse(README, chunk) == EXPECTED
+
+
+def test_readme_parser_requires_introduction_as_first_h2():
+    assert parse("## Overview\n\n## Introduction\n\ntext\n", 1000) == NOT_FOUND
+
+
+def test_readme_parser_drops_multibyte_character_cut_by_cap():
+    data = "## Introduction\n\n介绍 模型".encode("utf-8")[:-2]
+    parser = ReadmeIntroductionParser()
+    parser.feed(data)
+    assert parser.finish() == "介绍 模"
+
+
+def raw_card(tmp_path, bodies, max_bytes, ranged=True):
+    session = FakeSession(bodies, ranged)
+    cache = HTTPCache(session, directory=str(tmp_path / "cache"))
+    return RawModelCard(cache, logging.getLogger("test"), max_readme_bytes=max_bytes), cache, session
+
+
+@pytest.mark.parametrize("ranged", [True, False])
+def test_introduction_closing_in_capped_chunk_is_parsed(tmp_path, ranged):
+    # 上限恰好落在 Model Summary 标题行之后：最后一块被截断，但其中的内容必须交给解析器
+    readme = README + "filler\n" * 5000
+    cap = README.index("Summary text")
+    url = "http://hub/org/model/raw/main/README.md"
+    card, cache, _ = raw_card(tmp_path, {url: readme.encode()}, cap, ranged)
+    assert card.fetch_introduction("http://hub", "org/model") == EXPECTED
+    assert cache.get_parsed(url, "introduction") == EXPECTED
+
+
+def test_unclosed_introduction_at_cap_is_not_cached(tmp_path):
+    readme = "## Introduction\n\n" + "".join(f"Paragraph {i}.\n\n" for i in range(2000))
+    url = "http://hub/org/model/raw/main/README.md"
+    card, cache, session = raw_card(tmp_path, {url: readme.encode()}, 4096)
+    first = card.fetch_introduction("http://hub", "org/model")
+    assert first.startswith("Paragraph 0.") and "Paragraph 1999." not in first
+    assert cache.get_parsed(url, "introduction") is None
+    # 304 时重新解析缓存的前缀，结果相同
+    assert card.fetch_introduction("http://hub", "org/model") == first
+    assert session.requests[-1].get("If-None-Match")
+
+
+def test_missing_readme_is_not_found(tmp_path):
+    card, _, _ = raw_card(tmp_path, {}, 4096)
+    assert card.fetch_introduction("http://hub", "org/model") == NOT_FOUND
+
+
+def test_raw_and_page_sources_extract_the_same_introductions(tmp_path, stand_in, make_fetcher):
+    _, base_url = stand_in(org="org", models=12, page_kb=8, readme_kb=64)
+    results = {}
+    for source in ("page", "raw"):
+        fetcher = make_fetcher(
+            [{"name": "org", "url": f"{base_url}/org", "type": "api", "detail_source": source}],
+            {"raw_detail": {"max_readme_bytes": 8192}},
+            http_cache={"enabled": False},
+            storage={"database": str(tmp_path / f"{source}.db"), "journal": str(tmp_path / f"{source}.ndjson")},
+        )
+        models = fetcher.fetch(fetch_introduction=True)["subscriptions"]["org"]
+        results[source] = {title: "".join(model["introduction"].split()) for title, model in models.items()}
+        fetcher.close()
+    assert len(results["raw"]) == 12
+    assert NOT_FOUND not in results["raw"].values()
+    assert results["raw"] == results["page"]
+
+
+def test_listed_zero_likes_skip_the_stats_request(stand_in, make_fetcher):
+    # model-00000 的点赞数为 0
+    state, base_url = stand_in(org="org", models=1)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api", "detail_source": "raw"}],
+                           {"fetch_introduction": False})
+    model = fetcher.fetch()["subscriptions"]["org"]["org/model-00000"]
+    assert model["model_stats"]["likes"] == 0
+    # 只请求列表接口和组织信息，不再单独请求模型元数据
+    assert state.counters["requests"] == 2
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+from storage.model_store import ModelStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUBSCRIPTIONS = [{"name": "Deepseek", "url": "https://huggingface.co/deepseek-ai/", "type": "html"}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ModelStore(str(tmp_path / "models.db"))
+    yield store
+    store.close()
+
+
+def model(title, **fields):
+    return {"title": title, "link": f"https://huggingface.co/{title}", **fields}
+
+
+def test_upsert_only_writes_changed_rows(store):
+    assert store.upsert_models("s", [model("o/a", likes=1), model("o/b")]) == 2
+    assert store.upsert_models("s", [model("o/a", likes=1), model("o/b", likes=2)]) == 1
+    assert store.get_model("s", "o/b")["likes"] == 2
+
+
+def test_export_and_import_round_trip(store, tmp_path):
+    store.upsert_models("s", [model("o/a", introduction="x")])
+    path = str(tmp_path / "out" / "models.json")
+    store.export_json(path)
+    other = ModelStore(str(tmp_path / "other.db"))
+    assert other.import_json(path) == 1
+    assert other.get_model("s", "o/a") == model("o/a", introduction="x")
+    other.close()
+
+
+def test_imports_shipped_legacy_models_file(store):
+    count = store.import_json(os.path.join(ROOT, "data", "models.json"), SUBSCRIPTIONS)
+    assert count == 10
+    stored = store.get_model("Deepseek", "deepseek-ai/DeepSeek-R1")
+    assert "details" not in stored
+    assert stored["introduction"].startswith("We introduce")
+
+
+def test_legacy_models_are_grouped_by_link_or_org(store, tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"models": [
+        model("deepseek-ai/a", details={"introduction": "a"}),
+        {"title": "Qwen/b", "link": "https://mirror/Qwen/b"},
+        model("someone/c"),
+    ]}), encoding="utf-8")
+    subscriptions = SUBSCRIPTIONS + [{"name": "Qwen", "url": "https://huggingface.co/Qwen"}]
+    assert store.import_json(str(path), subscriptions) == 2
+    assert list(store.get_subscription_models("Deepseek")) == ["deepseek-ai/a"]
+    assert list(store.get_subscription_models("Qwen")) == ["Qwen/b"]
+
+
+def test_legacy_models_without_matching_subscription_raise(store, tmp_path):
+    with pytest.raises(ValueError, match="match a configured subscription"):
+        store.import_json(os.path.join(ROOT, "data", "models.json"), [{"name": "x", "url": "https://hub/x"}])
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"items": []}), encoding="utf-8")
+    with pytest.raises(ValueError, match="Unrecognized layout"):
+        store.import_json(str(path))
+    assert store.is_empty()
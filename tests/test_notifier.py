@@ -0,0 +1,140 @@
+import json
+import socket
+import threading
+import time
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from notifier.notifier import EmailChannel, Notifier, WebhookChannel
+
+
+class RecordingHandler:
+    """记录收到的邮件以及投递所用的 SMTP 会话"""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+@pytest.fixture
+def webhook_server():
+    """本地 webhook 接收端，前 failures 个请求返回 500"""
+    state = {"failures": 0, "payloads": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["payloads"].append(payload)
+            status = 500 if len(state["payloads"]) <= state["failures"] else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield state, f"http://127.0.0.1:{server.server_address[1]}/hook"
+    server.shutdown()
+    server.server_close()
+
+
+def email_settings(port, **settings):
+    return {"method": "email", "email": "to@example.com",
+            "smtp": {"host": "127.0.0.1", "port": port, "sender": "from@example.com", "username": ""},
+            **settings}
+
+
+def test_email_channel_reuses_pooled_connection(smtp_server):
+    handler, port = smtp_server
+    channel = EmailChannel(email_settings(port))
+    for i in range(3):
+        channel.send(f"subject {i}", "body")
+    assert [m["Subject"] for m in handler.messages] == ["subject 0", "subject 1", "subject 2"]
+    assert len(handler.sessions) == 1
+
+    # 空闲连接失效时 NOOP 检查失败，自动建立新连接
+    channel.pool.idle.queue[-1].close()
+    channel.send("subject 3", "body")
+    assert handler.messages[-1]["Subject"] == "subject 3"
+    assert len(handler.sessions) == 2
+    channel.close()
+    assert channel.pool.idle.empty()
+
+
+def test_notifications_within_window_are_sent_as_one_digest(smtp_server):
+    handler, port = smtp_server
+    notifier = Notifier(email_settings(port, digest_window_seconds=0.5))
+    for i in range(3):
+        notifier.send_notification(f"New model {i}", f"org/model-{i}")
+    notifier.flush()
+    assert len(handler.messages) == 1
+    digest = handler.messages[0]
+    assert digest["Subject"] == "LLMInfoSentinel: 3 notifications"
+    body = digest.get_payload().replace("\r\n", "\n")
+    assert all(f"== New model {i} ==\norg/model-{i}" in body for i in range(3))
+
+    # 单条通知保持原来的标题
+    notifier.send_notification("Only one", "org/model-9")
+    notifier.close()
+    assert handler.messages[-1]["Subject"] == "Only one"
+
+
+def test_webhook_retries_with_backoff(webhook_server):
+    state, url = webhook_server
+    state["failures"] = 2
+    notifier = Notifier({"method": "webhook", "webhook_url": url, "digest_window_seconds": 0,
+                         "max_retries": 3, "backoff_base_seconds": 0.01})
+    assert notifier.deliver("New model", "org/model-0") is True
+    assert state["payloads"] == [{"text": "*New model*\norg/model-0"}] * 3
+    notifier.close()
+
+
+def test_webhook_gives_up_after_max_retries(webhook_server, caplog):
+    state, url = webhook_server
+    state["failures"] = 100
+    notifier = Notifier({"method": "slack", "webhook_url": url, "max_retries": 2, "backoff_base_seconds": 0.01})
+    assert notifier.deliver("New model", "org/model-0") is False
+    assert len(state["payloads"]) == 3
+    assert "Giving up on notification 'New model' after 3 attempts" in caplog.text
+    notifier.close()
+
+
+def test_close_does_not_wait_for_backoff(webhook_server):
+    state, url = webhook_server
+    state["failures"] = 100
+    notifier = Notifier({"method": "webhook", "webhook_url": url, "digest_window_seconds": 60,
+                         "max_retries": 2, "backoff_base_seconds": 60})
+    notifier.send_notification("New model", "org/model-0")
+    started = time.monotonic()
+    notifier.close()
+    assert time.monotonic() - started < 5
+    assert len(state["payloads"]) == 3
+
+
+def test_webhook_requires_url():
+    with pytest.raises(ValueError):
+        WebhookChannel({"method": "webhook"})
+    with pytest.raises(ValueError):
+        Notifier({"method": "pigeon"})
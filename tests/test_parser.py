@@ -0,0 +1,93 @@
+import logging
+import os
+
+import pytest
+
+from fetcher.http_cache import CachedResponse
+from fetcher.listing import ModelListing
+from fetcher.parser import NOT_FOUND, PARSER_BACKENDS, ModelPageParser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# 固定页面为 huggingface.co 模型页和分页模型列表的精简版本，保留了真实页面的标签结构
+FIRST_PARAGRAPH = "We introduce our first-generation reasoning models, DeepSeek-R1-Zero and DeepSeek-R1."
+NOTE = ("NOTE: Before running DeepSeek-R1 series models locally, we kindly recommend reviewing "
+        "theUsage Recommendationsection.")
+SCORES = "Scores usepass@1& are averaged over 64 samples <k=64> — 中文测试段落。"
+POST_TRAINING = ("We directly apply reinforcement learning (RL) to the base model without relying on "
+                 "supervised fine-tuning (SFT) as a preliminary step.")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_all(html, fetch_introduction=True):
+    return {backend: ModelPageParser(backend).parse(html, fetch_introduction) for backend in PARSER_BACKENDS}
+
+
+def test_model_page_details_are_identical_across_backends():
+    results = parse_all(fixture("model_page.html"))
+    stats, introduction = results["html.parser"]
+    assert stats == {"likes": "12.3k", "followers": "74.2k"}
+    paragraphs = introduction.split("\n")
+    assert paragraphs[0] == FIRST_PARAGRAPH
+    assert paragraphs[-3:] == [NOTE, SCORES, POST_TRAINING]
+    assert len(paragraphs) == 10
+    assert results["lxml"] == results["stream"] == results["html.parser"]
+
+
+def test_introduction_without_model_summary_ends_with_its_parent():
+    results = parse_all(fixture("model_page_no_summary.html"))
+    introduction = results["html.parser"][1]
+    assert introduction.endswith(f"{POST_TRAINING}\nClosing paragraph of a card without a Model Summary section.")
+    assert "Model tree" not in introduction
+    assert results["lxml"] == results["stream"] == results["html.parser"]
+
+
+def test_page_without_introduction_heading():
+    results = parse_all(fixture("model_page_no_intro.html"))
+    assert results["html.parser"] == ({"likes": "12.3k"}, NOT_FOUND)
+    assert results["lxml"] == results["stream"] == results["html.parser"]
+
+
+def test_stats_only_parse_skips_introduction():
+    results = parse_all(fixture("model_page.html"), fetch_introduction=False)
+    assert all(result == ({"likes": "12.3k", "followers": "74.2k"}, None) for result in results.values())
+
+
+def test_model_list_cards_are_identical_across_backends():
+    html = fixture("models_page.html")
+    results = {backend: ModelPageParser(backend).parse_model_cards(html) for backend in PARSER_BACKENDS}
+    assert [card["title"] for card in results["html.parser"]] == [
+        "deepseek-ai/DeepSeek-R1-0528", "deepseek-ai/DeepSeek-Prover-V2-671B", "deepseek-ai/DeepSeek-V3-0324",
+        "deepseek-ai/DeepSeek-R1-0528", "deepseek-ai/Janus-Pro-7B",
+    ]
+    assert results["html.parser"][2]["time"] is None
+    assert results["lxml"] == results["stream"] == results["html.parser"]
+
+
+class FixtureCache:
+    """第一页返回列表固定页面，之后的页面没有模型"""
+
+    def __init__(self):
+        self.pages = [fixture("models_page.html")]
+
+    def get(self, url, **kwargs):
+        body = self.pages.pop(0) if self.pages else "<html><body></body></html>"
+        return CachedResponse(url, 200, body.encode("utf-8"))
+
+
+@pytest.mark.parametrize("backend", PARSER_BACKENDS)
+def test_paginated_html_listing_uses_the_configured_backend(backend):
+    listing = ModelListing(FixtureCache(), logging.getLogger("test"), page_parser=ModelPageParser(backend))
+    cards = list(listing.iter_models("https://huggingface.co/deepseek-ai", "html_pages"))
+    assert cards == [
+        {"title": "deepseek-ai/DeepSeek-R1-0528", "link": "https://huggingface.co/deepseek-ai/DeepSeek-R1-0528",
+         "time": "2025-05-29T03:42:56"},
+        {"title": "deepseek-ai/DeepSeek-Prover-V2-671B",
+         "link": "https://huggingface.co/deepseek-ai/DeepSeek-Prover-V2-671B", "time": "2025-04-30T09:19:05"},
+        {"title": "deepseek-ai/DeepSeek-V3-0324", "link": "https://huggingface.co/deepseek-ai/DeepSeek-V3-0324"},
+        {"title": "deepseek-ai/Janus-Pro-7B", "link": "https://huggingface.co/deepseek-ai/Janus-Pro-7B",
+         "time": "2025-02-01T08:00:16"},
+    ]
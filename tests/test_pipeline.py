@@ -0,0 +1,34 @@
+import logging
+
+from fetcher.change_detector import ADDED
+
+
+def test_new_models_are_persisted_before_notification(stand_in, make_fetcher):
+    _, base_url = stand_in(org="org", models=8, page_kb=4)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api"}],
+                           {"pipeline": {"sink_batch_size": 3, "queue_size": 2}})
+    seen = []
+
+    def on_event(event):
+        # 回调时模型已经写入存储
+        seen.append((event["type"], fetcher.model_store.get_model("org", event["title"]) is not None))
+
+    fetcher.fetch(on_event=on_event)
+    assert seen == [(ADDED, True)] * 8
+
+
+def test_each_subscription_reports_fetch_rate(stand_in, make_fetcher, caplog):
+    _, base_url = stand_in(org="org", models=6, page_kb=4)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api"}])
+    fetcher.logger.setLevel(logging.INFO)
+    with caplog.at_level(logging.INFO, logger=fetcher.logger.name):
+        fetcher.fetch()
+    assert any(message.startswith("Fetched details for 6 models in org:") and "requests/sec" in message
+               for message in caplog.messages)
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger=fetcher.logger.name):
+        fetcher.fetch()
+    # 没有需要抓取详情的模型时不报告速率
+    assert not any(message.startswith("Fetched details") for message in caplog.messages)
+    assert any("0 added" in message and "6 unchanged" in message for message in caplog.messages)
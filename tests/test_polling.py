@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from scheduler.polling import PollingPlanner
+
+
+@pytest.fixture
+def planner(tmp_path):
+    return PollingPlanner(str(tmp_path / "state.json"), min_interval=100, max_interval=1000,
+                          initial_interval=400, jitter=0, speedup=0.5, slowdown=2)
+
+
+def test_interval_adapts_to_changes_within_bounds(planner):
+    assert planner.advance(None, changes=0) == (800, 800)
+    assert planner.advance(800, changes=0) == (1000, 1000)
+    assert planner.advance(400, changes=3) == (200, 200)
+    assert planner.advance(150, changes=1) == (100, 100)
+    # 失败时间隔不变，按最小间隔重试
+    assert planner.advance(800, changes=0, failed=True) == (800, 100)
+
+
+def test_jitter_stays_within_ratio(tmp_path):
+    planner = PollingPlanner(str(tmp_path / "state.json"), min_interval=100, max_interval=1000,
+                             initial_interval=500, jitter=0.1, slowdown=1)
+    delays = [planner.advance(500, changes=0)[1] for _ in range(200)]
+    assert all(450 <= delay <= 550 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_state_survives_restart(tmp_path, planner):
+    before = time.time()
+    assert planner.next_due("org") <= time.time()
+    next_due = planner.record("org", changes=0)
+    assert before + 800 <= next_due <= time.time() + 800
+
+    restarted = PollingPlanner(planner.state_file, min_interval=100, max_interval=1000, jitter=0)
+    assert restarted.next_due("org") == next_due
+    assert restarted.interval("org") == 800
+    assert restarted.state["org"]["last_changes"] == 0 and restarted.state["org"]["last_failed"] is False
+
+
+def test_unreadable_state_file_starts_fresh(tmp_path):
+    state_file = tmp_path / "state.json"
+    state_file.write_text("{not json", encoding="utf-8")
+    planner = PollingPlanner(str(state_file), min_interval=100, max_interval=1000, initial_interval=5000)
+    assert planner.state == {}
+    assert planner.interval("org") == 1000
+
+
+def test_poll_subscription_adapts_interval_to_check_results(stand_in, make_scheduler):
+    state, base_url = stand_in(org="org", models=3, page_kb=4)
+    subscription = {"name": "org", "url": f"{base_url}/org", "type": "api"}
+    scheduler = make_scheduler([subscription], {"min_interval_minutes": 10, "max_interval_minutes": 100,
+                                                "initial_interval_minutes": 40, "jitter": 0,
+                                                "slowdown_factor": 2})
+    scheduler.poll_subscription(subscription)
+    assert scheduler.planner.state["org"]["last_changes"] == 3
+    assert scheduler.planner.interval("org") == 20 * 60
+
+    scheduler.poll_subscription(subscription)
+    assert scheduler.planner.state["org"]["last_changes"] == 0
+    assert scheduler.planner.interval("org") == 40 * 60
+
+    # 检查失败时间隔不变，按最小间隔重试
+    state.error_rate, state.fault_status = 1.0, 404
+    scheduler.poll_subscription(subscription)
+    assert scheduler.planner.state["org"]["last_failed"] is True
+    assert scheduler.planner.interval("org") == 40 * 60
+    assert scheduler.planner.next_due("org") <= time.time() + 10 * 60
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from fetcher.rate_limiter import HostRateLimiter, TokenBucket
+
+
+def timed(action, times):
+    started = time.monotonic()
+    for _ in range(times):
+        action()
+    return time.monotonic() - started
+
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=3)
+    assert timed(bucket.acquire, 3) < 0.05
+    # 突发用完后每个令牌需要 1/rate 秒
+    assert timed(bucket.acquire, 4) >= 4 / 20 * 0.9
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_hosts_have_independent_buckets():
+    limiter = HostRateLimiter(rate=5, capacity=1)
+    limiter.acquire("http://a.example/x")
+    assert timed(lambda: limiter.acquire("http://b.example/y"), 1) < 0.05
+    assert limiter.bucket_for("http://a.example/z") is limiter.bucket_for("http://a.example/x")
+    assert timed(lambda: limiter.acquire("http://a.example/z"), 1) >= 1 / 5 * 0.9
+
+
+def fetch_time(stand_in, make_fetcher, **settings):
+    state, base_url = stand_in(org="org", models=8, page_kb=4, latency=0.05)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api"}], settings)
+    started = time.monotonic()
+    models = fetcher.fetch()["subscriptions"]["org"]
+    assert len(models) == 8
+    return time.monotonic() - started, state.counters["requests"]
+
+
+def test_details_are_fetched_concurrently(stand_in, make_fetcher):
+    serial, _ = fetch_time(stand_in, make_fetcher, max_concurrency=1)
+    concurrent, _ = fetch_time(stand_in, make_fetcher, max_concurrency=8)
+    assert concurrent < serial / 2
+
+
+def test_concurrent_fetch_respects_requests_per_second(stand_in, make_fetcher):
+    elapsed, requests = fetch_time(stand_in, make_fetcher, max_concurrency=8, requests_per_second=40, burst=1)
+    assert requests > 8
+    assert elapsed >= (requests - 1) / 40 * 0.9
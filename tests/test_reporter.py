@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from reporter.reporter import JSONReporter
+
+
+@pytest.fixture
+def reporter(tmp_path):
+    return JSONReporter(str(tmp_path / "reports"))
+
+
+def records(reporter):
+    result = []
+    for _, path in reporter.list_segments():
+        with open(path, encoding="utf-8") as f:
+            result += [json.loads(line) for line in f]
+    return result
+
+
+def model(title, likes):
+    return {"title": title, "model_stats": {"likes": likes}}
+
+
+def test_each_run_publishes_its_own_segment(reporter):
+    with reporter.open_stream() as stream:
+        assert stream.write_models("org", [model("org/a", 1), model("org/b", 1)]) == 2
+    first = reporter.list_segments()
+    assert len(first) == 1
+    with open(first[0][1], "rb") as f:
+        published = f.read()
+
+    with reporter.open_stream() as stream:
+        # 内容未变化的模型不再写入
+        assert stream.write_models("org", [model("org/a", 1), model("org/b", 2)]) == 1
+        assert stream.remove_missing("org", ["org/b"]) == 1
+    segments = reporter.list_segments()
+    assert len(segments) == 2 and segments[0] == first[0]
+    # 之前发布的分段不会被重写
+    with open(first[0][1], "rb") as f:
+        assert f.read() == published
+    assert [(r["title"], r.get("removed", False)) for r in records(reporter)] == [
+        ("org/a", False), ("org/b", False), ("org/b", False), ("org/a", True),
+    ]
+    assert not [name for name in os.listdir(reporter.ndjson_dir) if name.startswith(".part-")]
+
+
+def test_failed_run_is_discarded(reporter):
+    with pytest.raises(RuntimeError):
+        with reporter.open_stream() as stream:
+            stream.write_models("org", [model("org/a", 1)])
+            raise RuntimeError("boom")
+    assert reporter.list_segments() == []
+    assert reporter.published_hash("org", "org/a") is None
+
+
+def test_compaction_keeps_latest_record_and_reads_single_models(reporter):
+    legacy = os.path.join(reporter.ndjson_dir, "models-2020-01-01.ndjson")
+    os.makedirs(reporter.ndjson_dir, exist_ok=True)
+    with open(legacy, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"subscription": "org", "title": "org/old", "model": model("org/old", 0)}) + "\n")
+    with reporter.open_stream() as stream:
+        stream.write_models("org", [model("org/a", 1), model("org/b", 1)])
+    with reporter.open_stream() as stream:
+        stream.write_models("org", [model("org/a", 2)])
+        stream.remove_missing("org", ["org/a", "org/old"])
+
+    index = reporter.compact(include_today=True)
+    assert {title for titles in index["records"].values() for title in titles} == {"org/a", "org/old"}
+    assert reporter.list_segments() == []
+    assert reporter.read_model("org", "org/a") == model("org/a", 2)
+    assert reporter.read_model("org", "org/b") is None
+
+
+def test_read_model_reloads_index_after_another_compaction(reporter):
+    with reporter.open_stream() as stream:
+        stream.write_models("org", [model("org/a", 1)])
+    reporter.compact(include_today=True)
+    assert reporter.read_model("org", "org/a") == model("org/a", 1)
+
+    # 另一个进程合并后删除了本实例缓存的索引所指向的快照
+    other = JSONReporter(reporter.output_dir)
+    with other.open_stream() as stream:
+        stream.write_models("org", [model("org/a", 2)])
+    other.compact(include_today=True)
+    assert reporter.read_model("org", "org/a") == model("org/a", 2)
+
+
+def test_scheduler_streams_report_records_during_check(tmp_path, monkeypatch, stand_in):
+    from scheduler.scheduler import ModelScheduler
+
+    state, base_url = stand_in(org="org", models=4, page_kb=4)
+    subscription = {"name": "org", "url": f"{base_url}/org", "type": "api"}
+    config = {
+        "subscriptions": [subscription],
+        "fetcher": {"requests_per_second": 1_000_000, "burst": 16, "pipeline": {"sink_batch_size": 1}},
+        "http_cache": {"directory": str(tmp_path / "http_cache")},
+        "storage": {"database": str(tmp_path / "models.db"), "journal": str(tmp_path / "journal.ndjson")},
+        "scheduler": {"state_file": str(tmp_path / "state.json")},
+        "reporter": {"enabled": True, "output_dir": str(tmp_path / "reports")},
+    }
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    scheduler = ModelScheduler(str(config_path))
+    batches = []
+    write_models = type(scheduler.reporter.open_stream()).write_models
+
+    def spy(stream, subscription, models):
+        batches.append(len(models))
+        return write_models(stream, subscription, models)
+
+    monkeypatch.setattr(type(scheduler.reporter.open_stream()), "write_models", spy)
+    try:
+        scheduler.check_subscription(subscription)
+        # 记录随流水线每批写入，而不是检查结束后整体写入
+        assert batches and max(batches) < 4
+        assert sorted(r["title"] for r in records(scheduler.reporter)) == [
+            f"org/model-{i:05d}" for i in range(4)]
+
+        state.models = 3
+        scheduler.check_subscription(subscription)
+        assert [r for r in records(scheduler.reporter) if r.get("removed")][0]["title"] == "org/model-00003"
+    finally:
+        scheduler.close()
+
+
+def test_reporters_sharing_a_directory_merge_published_hashes(reporter):
+    other = JSONReporter(reporter.output_dir)
+    first, second = reporter.open_stream(), other.open_stream()
+    first.write_models("org", [model("org/a", 1)])
+    second.write_models("org", [model("org/b", 1)])
+    first.commit()
+    second.commit()
+    assert other.published_hash("org", "org/a") is not None
+
+    # 另一个 worker 发布过的模型不会被重复写入，也能写入墓碑
+    with reporter.open_stream() as stream:
+        assert stream.write_models("org", [model("org/a", 1), model("org/b", 1)]) == 0
+        assert stream.remove_missing("org", ["org/a"]) == 1
+    with other.open_stream() as stream:
+        assert stream.write_models("org", [model("org/b", 1)]) == 1
+
+
+def publish_models(output_dir, worker):
+    with JSONReporter(output_dir).open_stream() as stream:
+        stream.write_models("org", [model(f"org/{worker}-{i}", i) for i in range(20)])
+
+
+def test_worker_processes_publishing_concurrently_keep_all_hashes(reporter):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=publish_models, args=(reporter.output_dir, w)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    with open(os.path.join(reporter.ndjson_dir, "hashes.json"), encoding="utf-8") as f:
+        assert len(json.load(f)["org"]) == 80
+    assert len(reporter.list_segments()) == 4
+    assert not [name for name in os.listdir(reporter.ndjson_dir) if name.endswith(".tmp")]
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+import requests
+
+from fetcher.retry import CircuitOpenError, ResilientSession
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """按顺序返回预设的响应，元素为异常时抛出"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def test_failed_responses_are_closed_before_retrying():
+    failures = [FakeResponse(503), FakeResponse(500)]
+    session = ResilientSession(FakeSession(*failures, FakeResponse(200)), backoff_base=0)
+    response = session.get("http://hub/a")
+    assert response.status_code == 200 and not response.closed
+    assert all(failure.closed for failure in failures)
+
+
+def test_last_response_is_returned_open_when_giving_up():
+    session = ResilientSession(FakeSession(FakeResponse(502), FakeResponse(502)), max_retries=1, backoff_base=0)
+    response = session.get("http://hub/a")
+    assert response.status_code == 502 and not response.closed
+
+    session = ResilientSession(FakeSession(FakeResponse(429, {"Retry-After": "3600"})))
+    response = session.get("http://hub/a")
+    assert response.status_code == 429 and not response.closed
+    with pytest.raises(CircuitOpenError):
+        session.get("http://hub/b")
+
+
+def test_probe_is_released_after_unexpected_error():
+    fake = FakeSession(requests.ConnectionError("down"), RuntimeError("boom"), FakeResponse(200))
+    session = ResilientSession(fake, max_retries=0, failure_threshold=1, reset_timeout=0.01)
+    with pytest.raises(requests.ConnectionError):
+        session.get("http://hub/a")
+    time.sleep(0.02)
+    # 半开状态下的探测请求抛出意外异常后，下一个请求仍然可以探测
+    with pytest.raises(RuntimeError):
+        session.get("http://hub/a")
+    assert session.breaker_for("http://hub/a").state == "half_open"
+    assert session.get("http://hub/a").status_code == 200
+    assert session.breaker_for("http://hub/a").state == "closed"
@@ -0,0 +1,65 @@
+import pytest
+
+from storage.search_index import WATCH_MATCHED, SearchIndex, WatchRule, parse_query
+
+
+def test_parse_query_splits_phrases_and_words():
+    assert parse_query('"context length 1M"') == [("context", "length", "1m")]
+    assert parse_query("MoE 128k") == [("moe",), ("128k",)]
+    assert parse_query("Qwen2.5-7B") == [("qwen2", "5", "7b")]
+
+
+def test_search_and_incremental_reindex(tmp_path):
+    index = SearchIndex(str(tmp_path / "models.db"))
+    models = [
+        {"title": "org/a", "tags": ["moe"], "introduction": "Supports a context length of 128K tokens."},
+        {"title": "org/b", "tags": [], "introduction": "Not fetched"},
+    ]
+    index.index_models("org", models)
+    assert [r["title"] for r in index.search('"context length"')["results"]] == ["org/a"]
+    # 占位 introduction 不建索引
+    assert index.search("fetched")["total"] == 0
+    # 短语不跨字段匹配
+    assert index.search('"moe supports"')["total"] == 0
+
+    models[0]["introduction"] = "Short context."
+    index.index_models("org", models)
+    assert index.search("length")["total"] == 0
+    assert index.remove_missing("org", ["org/b"]) == 1
+    assert index.search("context")["total"] == 0
+    index.close()
+
+
+def test_watch_rule_reports_each_model_once(tmp_path):
+    index = SearchIndex(str(tmp_path / "models.db"))
+    rules = [WatchRule("long", '"context length"', subscriptions=["org"])]
+    model = {"title": "org/a", "introduction": "A context length of 1M."}
+    assert [(rule.name, m["title"]) for rule, m in index.index_models("org", [model], rules)] == [("long", "org/a")]
+    model["introduction"] = "A context length of 2M."
+    assert index.index_models("org", [model], rules) == []
+    assert index.index_models("other", [{"title": "other/a", "introduction": model["introduction"]}], rules) == []
+    index.close()
+
+
+def test_empty_watch_query_is_rejected():
+    with pytest.raises(ValueError):
+        WatchRule("empty", '""')
+
+
+def test_watch_rule_fires_on_fetched_introduction(stand_in, make_fetcher):
+    # "synthetic benchmark" 只出现在 introduction 中，标题和标签里没有
+    _, base_url = stand_in(org="org", models=3, page_kb=4)
+    subscriptions = [{"name": "org", "url": f"{base_url}/org", "type": "api"}]
+    rules = [{"name": "synthetic", "query": '"synthetic benchmark"'}]
+
+    fetcher = make_fetcher(subscriptions, {"fetch_introduction": False}, watch_rules=rules)
+    fetcher.fetch()
+    assert [e for e in fetcher.changes["org"] if e["type"] == WATCH_MATCHED] == []
+    fetcher.close()
+
+    fetcher = make_fetcher(subscriptions, watch_rules=rules)
+    fetcher.fetch()
+    events = [e for e in fetcher.changes["org"] if e["type"] == WATCH_MATCHED]
+    assert sorted(e["title"] for e in events) == ["org/model-00000", "org/model-00001", "org/model-00002"]
+    assert {e["rule"] for e in events} == {"synthetic"}
+    assert fetcher.search_index.search("synthetic benchmark")["total"] == 3
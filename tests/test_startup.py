@@ -0,0 +1,36 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from benchmark.startup_benchmark import (
+    COMMANDS, FORBIDDEN_MODULES, LAZY_MODULES, REPO_ROOT, check_lazy_module, offending, time_command,
+)
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    os.makedirs(tmp_path / "config")
+    shutil.copy(os.path.join(REPO_ROOT, "config", "config.json"), tmp_path / "config" / "config.json")
+    return tmp_path
+
+
+def subscription_names(workdir):
+    with open(workdir / "config" / "config.json", encoding="utf-8") as f:
+        return [sub["name"] for sub in json.load(f)["subscriptions"]]
+
+
+def test_subscription_commands_skip_heavy_imports(workdir):
+    before = subscription_names(workdir)
+    for name in ("list", "add", "remove"):
+        _, modules = time_command(COMMANDS[name], str(workdir), runs=1)
+        assert offending(modules, FORBIDDEN_MODULES) == []
+        if name == "add":
+            assert subscription_names(workdir) == before + ["bench-sub"]
+    assert subscription_names(workdir) == before
+
+
+@pytest.mark.parametrize("module", sorted(LAZY_MODULES))
+def test_importing_module_defers_heavy_dependencies(module):
+    assert check_lazy_module(module, LAZY_MODULES[module]) == []
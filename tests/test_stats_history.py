@@ -0,0 +1,53 @@
+import pytest
+
+from storage.stats_history import StatsHistory, parse_count
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1.2k", 1200), ("876", 876), (876.0, 876), ("1,234", 1234), (" 3M ", 3_000_000),
+    ("2.5B", 2_500_000_000), (None, None), (True, None), ("n/a", None), ("", None),
+])
+def test_parse_count(value, expected):
+    assert parse_count(value) == expected
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = StatsHistory(str(tmp_path / "models.db"))
+    yield history
+    history.close()
+
+
+def test_history_returns_parsed_samples_in_window(history):
+    assert history.record("org", {"org/a": {"likes": "1.2k", "downloads": 10}, "org/b": {}}, ts=100) == 1
+    history.record("org", {"org/a": {"likes": "1.5k"}}, ts=200)
+    history.record("org", {"org/a": {"likes": "1.6k"}}, ts=300)
+    assert history.history("org", "org/a", since=150, until=300) == [
+        {"ts": 200, "likes": 1500, "downloads": None, "followers": None},
+        {"ts": 300, "likes": 1600, "downloads": None, "followers": None},
+    ]
+    assert history.history("org", "org/b", since=0, until=300) == []
+
+
+def test_growth_ranks_models_by_delta(history):
+    day = 86400
+    history.record("org", {"org/a": {"likes": 10}, "org/b": {"likes": 100}, "org/c": {"likes": 5}}, ts=0)
+    history.record("other", {"other/x": {"likes": 1}}, ts=0)
+    history.record("org", {"org/a": {"likes": 40}, "org/b": {"likes": 110}}, ts=day // 2)
+    history.record("other", {"other/x": {"likes": 500}}, ts=day // 2)
+
+    growth = history.growth("likes", since=0, until=day, subscription="org")
+    assert [(item["title"], item["delta"]) for item in growth] == [("org/a", 30), ("org/b", 10)]
+    # 只有一个样本的模型（org/c）不参与计算；速率按天折算
+    assert growth[0]["rate_per_day"] == 60
+    assert [item["title"] for item in history.growth("likes", since=0, until=day, limit=1)] == ["other/x"]
+    with pytest.raises(ValueError):
+        history.growth("stars")
+
+
+def test_fetch_records_a_sample_per_run(stand_in, make_fetcher):
+    _, base_url = stand_in(org="org", models=3, page_kb=4)
+    fetcher = make_fetcher([{"name": "org", "url": f"{base_url}/org", "type": "api"}])
+    fetcher.fetch()
+    samples = fetcher.stats_history.history("org", "org/model-00002")
+    assert len(samples) == 1 and samples[0]["likes"] == 74 and samples[0]["downloads"] == 740
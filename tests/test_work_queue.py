@@ -0,0 +1,113 @@
+import multiprocessing
+import time
+
+import pytest
+
+from scheduler.work_queue import WorkQueue
+
+
+def subscription(name):
+    return {"name": name, "url": f"https://hub/{name}"}
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / "work_queue.db")
+
+
+def test_sync_adds_updates_and_removes_jobs(queue_path):
+    queue = WorkQueue(queue_path, owner="a")
+    assert queue.sync([subscription("x"), subscription("y")]) == (2, 0)
+    updated = {**subscription("x"), "type": "api"}
+    assert queue.sync([updated]) == (0, 1)
+    assert [job["name"] for job in queue.status()] == ["x"]
+    assert queue.claim().subscription == updated
+    queue.close()
+
+
+def test_lease_is_exclusive_until_it_expires(queue_path):
+    first = WorkQueue(queue_path, lease_seconds=0.2, owner="a")
+    second = WorkQueue(queue_path, lease_seconds=0.2, owner="b")
+    first.sync([subscription("x")])
+    lease = first.claim()
+    assert lease.name == "x" and lease.reclaimed_from is None
+    assert second.claim() is None
+    assert first.heartbeat(lease)
+
+    time.sleep(0.3)
+    # 租约过期后被其他 worker 接手，原持有者的续约和结果都被拒绝
+    taken = second.claim()
+    assert taken.name == "x" and taken.reclaimed_from == "a"
+    assert not first.heartbeat(lease)
+    assert not first.complete(lease, time.time() + 60, 60, 1)
+    assert second.complete(taken, time.time() + 60, 60, 2)
+    job = second.status()[0]
+    assert job["claims"] == 2 and job["last_owner"] == "b" and job["last_changes"] == 2
+    first.close()
+    second.close()
+
+
+def test_complete_fail_and_release_schedule_the_job(queue_path):
+    queue = WorkQueue(queue_path, owner="a")
+    queue.sync([subscription("x")])
+    next_due = time.time() + 60
+    assert queue.complete(queue.claim(), next_due, 60, 0)
+    assert queue.claim() is None
+    assert queue.next_claimable() == pytest.approx(next_due)
+
+    queue.sync([subscription("x"), subscription("y")])
+    lease = queue.claim()
+    assert lease.name == "y"
+    assert queue.fail(lease, time.time() - 1, "boom")
+    lease = queue.claim()
+    assert lease.name == "y"
+    queue.release(lease)
+    assert queue.claim().name == "y"
+    job = {job["name"]: job for job in queue.status()}["y"]
+    assert job["failures"] == 1 and job["last_error"] == "boom"
+    queue.close()
+
+
+def claim_all(path, owner, results):
+    queue = WorkQueue(path, owner=owner)
+    claimed = []
+    while True:
+        lease = queue.claim()
+        if lease is None:
+            break
+        claimed.append(lease.name)
+        queue.complete(lease, time.time() + 3600, 3600, 0)
+    queue.close()
+    results.put(claimed)
+
+
+def test_processes_claim_each_job_once(queue_path):
+    names = [f"sub-{i:02d}" for i in range(40)]
+    queue = WorkQueue(queue_path)
+    queue.sync([subscription(name) for name in names])
+    queue.close()
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=claim_all, args=(queue_path, f"w{i}", results)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = [name for _ in workers for name in results.get(timeout=30)]
+    for worker in workers:
+        worker.join()
+    assert sorted(claimed) == names
+
+
+def test_worker_processes_due_subscriptions(tmp_path, stand_in, make_scheduler):
+    _, base_url = stand_in(org="org", models=3, page_kb=4)
+    queue_path = str(tmp_path / "work_queue.db")
+    scheduler = make_scheduler([{"name": "org", "url": f"{base_url}/org", "type": "api"}],
+                               {"work_queue": {"path": queue_path}, "jitter": 0})
+    scheduler.run_worker(exit_when_idle=True)
+
+    queue = WorkQueue(queue_path)
+    job = queue.status()[0]
+    assert job["name"] == "org" and job["claims"] == 1 and job["last_changes"] == 3
+    assert job["lease_owner"] is None and job["due_at"] > time.time() + 3600
+    assert queue.claim() is None
+    queue.close()